@@ -1,115 +1,67 @@
-from flask import Flask, request, jsonify, send_from_directory, session
+from flask import (Flask, Response, g, request, jsonify, make_response, send_from_directory, session,
+                   stream_with_context)
 from flask_cors import CORS
-import sqlite3
+import io
 import os
 from datetime import datetime, timedelta
-from genetic_algorithm import GeneticAlgorithm
+from functools import wraps
+from availability import (compact_masks, encode_mask, ensure_availability_column, grid_timeslots,
+                          load_availability, mask_from_pairs, slot_lookup)
+from bulk_import import (API_FIELDS, COLUMNS as IMPORTABLE_ENTITIES, TIME_RE, VALID_DAYS, create_batch,
+                         delete_many, import_csv, insert_many)
+from constraints import constraint_catalog, validate_weights
+from data_handler import DB_PATH, get_db_connection, fetch_all_data
+from data_version import TRACKED_TABLES, data_etag
+from generation import run_generation, run_summary
+from http_cache import compress_response, set_static_cache_headers
+from job_queue import ACTIVE_STATUSES, JobQueue
+from log import get_logger
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, JOB_QUEUE_DEPTH,
+                     REGISTRY, record_run)
+from occupancy import OccupancyIndex, edit_placements, occupancy_indexes
+from profiling import timing_stats
+from saved_timetables import (DEFAULT_PAGE_SIZE, SCHEDULE_FILTERS, encode_schedule, ensure_timetable_schema,
+                              filter_schedule, get_timetable, list_timetables, load_schedule,
+                              store_edited_schedule, timetable_revision)
+from schedule_format import FORMATS as SCHEDULE_FORMATS, format_schedule, parse_schedule
 import hashlib
 import secrets
 import json
+import time
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 app.secret_key = secrets.token_hex(32)  # Generate a secure secret key
 CORS(app, supports_credentials=True)
+logger = get_logger('app')
+job_queue = JobQueue()
+JOB_QUEUE_DEPTH.set_function(job_queue.pending_count)
 
-# ===== DATABASE HELPERS =====
-def get_db_connection():
-    """Get SQLite database connection"""
-    conn = sqlite3.connect('timetable.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# ===== REQUEST METRICS =====
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
 
-def fetch_all_data():
-    """Fetch all data from database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Fetch subjects
-    subjects = []
-    for row in cursor.execute('SELECT * FROM subjects'):
-        subjects.append(dict(row))
-    
-    # Fetch faculty with availability
-    faculty = []
-    for row in cursor.execute('SELECT * FROM faculty'):
-        fac_id = row['id']
-        
-        # Get available days
-        days = [d['day'] for d in cursor.execute(
-            'SELECT DISTINCT day FROM faculty_availability WHERE faculty_id = ?', (fac_id,)
-        )]
-        
-        # Get time slots WITH day information
-        slots_by_day = {}
-        for slot_row in cursor.execute(
-            'SELECT day, time_slot FROM faculty_timeslots WHERE faculty_id = ?', (fac_id,)
-        ):
-            day = slot_row['day']
-            if day not in slots_by_day:
-                slots_by_day[day] = []
-            slots_by_day[day].append(slot_row['time_slot'])
-        
-        # Get subjects
-        subjects_ids = [s['subject_id'] for s in cursor.execute(
-            'SELECT subject_id FROM faculty_subjects WHERE faculty_id = ?', (fac_id,)
-        )]
-        
-        # Get divisions
-        division_ids = [d['division_id'] for d in cursor.execute(
-            'SELECT division_id FROM faculty_divisions WHERE faculty_id = ?', (fac_id,)
-        )]
-        
-        faculty.append({
-            'id': fac_id,
-            'name': row['name'],
-            'employee_id': row['employee_id'],
-            'department': row['department'],
-            'email': row['email'],
-            'max_hours': row['max_hours'],
-            'year': row['year'],
-            'available_days': days,
-            'available_time_slots': slots_by_day,
-            'subjects': subjects_ids,
-            'divisions': division_ids
-        })
-    
-    # Fetch rooms
-    rooms = []
-    for row in cursor.execute('SELECT * FROM rooms'):
-        rooms.append(dict(row))
-    
-    # Fetch timeslots
-    timeslots = []
-    for row in cursor.execute('SELECT * FROM timeslots'):
-        timeslots.append(dict(row))
-    
-    # Fetch divisions
-    divisions = []
-    for row in cursor.execute('SELECT * FROM divisions'):
-        div_id = row['id']
-        
-        # Get subjects for this division
-        div_subjects = [s['subject_id'] for s in cursor.execute(
-            'SELECT subject_id FROM division_subjects WHERE division_id = ?', (div_id,)
-        )]
-        
-        divisions.append({
-            'id': div_id,
-            'name': row['name'],
-            'year': row['year'],
-            'student_count': row['student_count'],
-            'subjects': div_subjects
-        })
-    
-    conn.close()
-    
-    return {
-        'subjects': subjects,
-        'faculty': faculty,
-        'rooms': rooms,
-        'timeslots': timeslots,
-        'divisions': divisions
-    }
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and observe its latency under the matched route pattern"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=str(response.status_code))
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+    return response
+
+@app.after_request
+def apply_http_caching(response):
+    """Cache headers for static assets and compression of large text/JSON bodies"""
+    if request.endpoint in ('index', 'serve_static', 'static'):
+        set_static_cache_headers(response, response.mimetype, bool(request.args.get('v')))
+    return compress_response(response, request.accept_encodings)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of the in-process metrics registry"""
+    return Response(REGISTRY.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
 
 # ===== AUTHENTICATION HELPERS =====
 def hash_password(password):
@@ -141,7 +93,6 @@ def get_current_user():
 
 def require_auth(f):
     """Decorator to require authentication"""
-    from functools import wraps
     @wraps(f)
     def decorated_function(*args, **kwargs):
         user = get_current_user()
@@ -150,6 +101,28 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def etag_from_data(*tables):
+    """Decorator: tag responses with the data version of tables and answer a matching
+    If-None-Match with 304 Not Modified without running the view"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Taken before reading, so a concurrent write can only make the tag stale, never too new
+            conn = get_db_connection()
+            etag = data_etag(conn, DB_PATH, tables)
+            conn.close()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+            return response
+        return decorated_function
+    return decorator
+
 # ===== AUTHENTICATION ROUTES =====
 @app.route('/api/auth/signup', methods=['POST'])
 def signup():
@@ -200,7 +173,7 @@ def signup():
         # Set session
         session['session_token'] = session_token
         
-        print(f"✅ User registered: {username}")
+        logger.info("✅ User registered: %s", username)
         return jsonify({
             'success': True,
             'user': {
@@ -212,9 +185,7 @@ def signup():
         })
         
     except Exception as e:
-        print(f"❌ Signup error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Signup error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -257,7 +228,7 @@ def login():
         # Set session
         session['session_token'] = session_token
         
-        print(f"✅ User logged in: {user['username']}")
+        logger.info("✅ User logged in: %s", user['username'])
         return jsonify({
             'success': True,
             'user': {
@@ -269,9 +240,7 @@ def login():
         })
         
     except Exception as e:
-        print(f"❌ Login error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Login error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/auth/logout', methods=['POST'])
@@ -289,21 +258,55 @@ def logout():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def public_user(user):
+    return {
+        'id': user['id'],
+        'username': user['username'],
+        'email': user['email'],
+        'full_name': user['full_name']
+    }
+
 @app.route('/api/auth/me', methods=['GET'])
 def get_me():
     user = get_current_user()
     if user:
-        return jsonify({
-            'success': True,
-            'user': {
-                'id': user['id'],
-                'username': user['username'],
-                'email': user['email'],
-                'full_name': user['full_name']
-            }
-        })
+        return jsonify({'success': True, 'user': public_user(user)})
     return jsonify({'success': False, 'error': 'Not authenticated'}), 401
 
+# (data version, JSON text of fetch_all_data()) behind /api/bootstrap
+_bootstrap_data = (None, None)
+
+@app.route('/api/bootstrap', methods=['GET'])
+def bootstrap():
+    """Current user (or null) and every entity collection in one response for the first page render
+    
+    The collections are read in one snapshot and their JSON is reused until the data
+    version changes; the ETag also covers the user, so a 304 is never served across logins.
+    """
+    global _bootstrap_data
+    try:
+        conn = get_db_connection()
+        data_version = data_etag(conn, DB_PATH, TRACKED_TABLES)
+        conn.close()
+        user = get_current_user()
+        etag = hashlib.sha1(f"{data_version}:{user['id'] if user else ''}".encode()).hexdigest()[:20]
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            cached_version, data_json = _bootstrap_data
+            if cached_version != data_version:
+                data_json = json.dumps(fetch_all_data())
+                _bootstrap_data = (data_version, data_json)
+            body = (f'{{"success": true, "user": {json.dumps(public_user(user) if user else None)}, '
+                    f'"data_version": "{data_version}", "data": {data_json}}}')
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        response.cache_control.no_cache = True
+        return response
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ===== ROUTES =====
 @app.route('/')
 def index():
@@ -402,12 +405,10 @@ def add_subject():
         conn.commit()
         conn.close()
         
-        print(f"✅ Added subject(s): {subject_name} - {len(created_subjects)} component(s)")
+        logger.info("✅ Added subject(s): %s - %d component(s)", subject_name, len(created_subjects))
         return jsonify({'success': True, 'subjects': created_subjects})
     except Exception as e:
-        print(f"❌ Error adding subject: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error adding subject: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/faculty', methods=['POST'])
@@ -416,32 +417,27 @@ def add_faculty():
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
+        ensure_availability_column(conn)
+        
+        # Availability is stored as a bitmask over timeslots: each selected
+        # time slot applies to each selected day
+        available_days = data.get('availableDays', [])
+        available_slots = data.get('availableTimeSlots', [])
+        lookup = slot_lookup(cursor.execute('SELECT id, day, start_time, end_time FROM timeslots'))
+        mask, unknown = mask_from_pairs(((day, slot) for day in available_days for slot in available_slots), lookup)
+        if unknown:
+            conn.close()
+            return jsonify({'success': False,
+                            'error': f"No timeslot matches {', '.join(unknown)} on {', '.join(available_days)}"}), 400
         
         cursor.execute('''
-            INSERT INTO faculty (name, employee_id, department, email, max_hours, year)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO faculty (name, employee_id, department, email, max_hours, year, availability_bits)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (data['name'], data['employeeId'], data['department'], 
-              data.get('email'), data['maxHours'], data['year']))
+              data.get('email'), data['maxHours'], data['year'], encode_mask(mask)))
         
         faculty_id = cursor.lastrowid
         
-        # Insert availability days
-        for day in data.get('availableDays', []):
-            cursor.execute('INSERT INTO faculty_availability (faculty_id, day) VALUES (?, ?)',
-                         (faculty_id, day))
-        
-        # ✅ NEW: Insert time slots WITH day information
-        available_days = data.get('availableDays', [])
-        available_slots = data.get('availableTimeSlots', [])
-        
-        # For each selected day, add all selected time slots
-        for day in available_days:
-            for slot in available_slots:
-                cursor.execute(
-                    'INSERT INTO faculty_timeslots (faculty_id, day, time_slot) VALUES (?, ?, ?)',
-                    (faculty_id, day, slot)
-                )
-        
         # Insert subject assignments
         for subj_id in data.get('subjects', []):
             cursor.execute('INSERT INTO faculty_subjects (faculty_id, subject_id) VALUES (?, ?)',
@@ -455,10 +451,10 @@ def add_faculty():
         conn.commit()
         conn.close()
         
-        print(f"✅ Added faculty: {data['name']}")
+        logger.info("✅ Added faculty: %s", data['name'])
         return jsonify({'success': True, 'id': faculty_id})
     except Exception as e:
-        print(f"❌ Error adding faculty: {e}")
+        logger.error("❌ Error adding faculty: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/rooms', methods=['POST'])
@@ -478,10 +474,10 @@ def add_room():
         room_id = cursor.lastrowid
         conn.close()
         
-        print(f"✅ Added room: {data['number']}")
+        logger.info("✅ Added room: %s", data['number'])
         return jsonify({'success': True, 'id': room_id})
     except Exception as e:
-        print(f"❌ Error adding room: {e}")
+        logger.error("❌ Error adding room: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/divisions', methods=['POST'])
@@ -506,10 +502,10 @@ def add_division():
         conn.commit()
         conn.close()
         
-        print(f"✅ Added division: {data['name']}")
+        logger.info("✅ Added division: %s", data['name'])
         return jsonify({'success': True, 'id': division_id})
     except Exception as e:
-        print(f"❌ Error adding division: {e}")
+        logger.error("❌ Error adding division: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/timeslots', methods=['POST'])
@@ -528,14 +524,126 @@ def add_timeslot():
         slot_id = cursor.lastrowid
         conn.close()
         
-        print(f"✅ Added timeslot: {data['day']} {data['startTime']}-{data['endTime']}")
+        logger.info("✅ Added timeslot: %s %s-%s", data['day'], data['startTime'], data['endTime'])
         return jsonify({'success': True, 'id': slot_id})
     except Exception as e:
-        print(f"❌ Error adding timeslot: {e}")
+        logger.error("❌ Error adding timeslot: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timeslots/grid', methods=['POST'])
+def add_timeslot_grid():
+    """Create every period of a weekly grid (days x periods between start and end) in one transaction"""
+    try:
+        data = request.json or {}
+        days = [str(day).capitalize() for day in data.get('days', [])]
+        if not days or any(day not in VALID_DAYS for day in days):
+            return jsonify({'success': False, 'error': f"days must be a non-empty list of {', '.join(VALID_DAYS)}"}), 400
+        breaks = [(b.get('start'), b.get('end')) for b in data.get('breaks', [])]
+        times = [data.get('startTime'), data.get('endTime')] + [t for pause in breaks for t in pause]
+        if not all(isinstance(t, str) and TIME_RE.match(t) for t in times):
+            return jsonify({'success': False, 'error': 'startTime, endTime and breaks must look like HH:MM'}), 400
+        try:
+            records = grid_timeslots(days, data['startTime'], data['endTime'], int(data.get('periodMinutes', 60)),
+                                     breaks, data.get('description', ''))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        started = time.perf_counter()
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Periods that already exist are kept (faculty availability masks have bits for them)
+            existing = slot_lookup(conn.execute('SELECT id, day, start_time, end_time FROM timeslots'))
+            new_records = [r for r in records if (r['day'], f"{r['start_time']}-{r['end_time']}") not in existing]
+            ids = insert_many(conn, 'timeslots', new_records)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        
+        logger.info("✅ Added %d timeslots from grid (%d already existed, %s ms)", len(ids),
+                    len(records) - len(ids), elapsed_ms)
+        return jsonify({'success': True, 'ids': ids, 'created': len(ids), 'skipped': len(records) - len(ids),
+                        'periods_per_day': len(records) // len(days), 'elapsed_ms': elapsed_ms})
+    except Exception as e:
+        logger.error("❌ Error adding timeslot grid: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/import/<entity_type>', methods=['POST'])
+@require_auth
+def bulk_import_csv(entity_type):
+    """Import a CSV upload (multipart 'file' or a text/csv body) in validated batches"""
+    try:
+        if entity_type not in IMPORTABLE_ENTITIES:
+            return jsonify({'success': False, 'error': f'Unknown entity type: {entity_type}'}), 404
+        
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        batch_size = request.args.get('batchSize', 500, type=int)
+        summary = import_csv(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''),
+                             entity_type, batch_size=max(1, batch_size))
+        return jsonify({'success': True, **summary})
+    except Exception as e:
+        logger.error("❌ Error importing %s: %s", entity_type, e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/<entity_type>/batch', methods=['POST'])
+def add_batch(entity_type):
+    """Create many faculty/rooms/divisions/timeslots (same fields as the single POST) at once"""
+    try:
+        if entity_type not in API_FIELDS:
+            return jsonify({'success': False, 'error': f'Batch create not supported for {entity_type}'}), 404
+        items = (request.json or {}).get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'success': False, 'error': 'items must be a non-empty list'}), 400
+        
+        started = time.perf_counter()
+        conn = get_db_connection()
+        try:
+            ids, errors = create_batch(conn, entity_type, items)
+        finally:
+            conn.close()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        if errors:
+            return jsonify({'success': False, 'error': 'Validation failed', 'errors': errors,
+                            'elapsed_ms': elapsed_ms}), 400
+        
+        logger.info("✅ Added %d %s in one batch (%s ms)", len(ids), entity_type, elapsed_ms)
+        return jsonify({'success': True, 'ids': ids, 'count': len(ids), 'elapsed_ms': elapsed_ms})
+    except Exception as e:
+        logger.error("❌ Error adding %s batch: %s", entity_type, e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/<entity_type>/batch', methods=['DELETE'])
+def delete_batch(entity_type):
+    """Delete many rows of one entity type, with their junction rows, at once"""
+    try:
+        if entity_type not in IMPORTABLE_ENTITIES:
+            return jsonify({'success': False, 'error': f'Batch delete not supported for {entity_type}'}), 404
+        ids = (request.json or {}).get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'success': False, 'error': 'ids must be a list of integers'}), 400
+        
+        started = time.perf_counter()
+        conn = get_db_connection()
+        try:
+            deleted = delete_many(conn, entity_type, ids)
+        finally:
+            conn.close()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        
+        logger.info("🗑️  Deleted %d %s in one batch (%s ms)", deleted, entity_type, elapsed_ms)
+        return jsonify({'success': True, 'deleted': deleted, 'elapsed_ms': elapsed_ms})
+    except Exception as e:
+        logger.error("❌ Error deleting %s batch: %s", entity_type, e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ===== GET ENDPOINTS FOR CRUD =====
 @app.route('/api/subjects', methods=['GET'])
+@etag_from_data('subjects')
 def get_subjects():
     try:
         conn = get_db_connection()
@@ -546,6 +654,8 @@ def get_subjects():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/faculty', methods=['GET'])
+@etag_from_data('faculty', 'faculty_subjects', 'faculty_divisions', 'faculty_availability', 'faculty_timeslots',
+                'timeslots')
 def get_faculty():
     try:
         data = fetch_all_data()
@@ -554,6 +664,7 @@ def get_faculty():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/rooms', methods=['GET'])
+@etag_from_data('rooms')
 def get_rooms():
     try:
         conn = get_db_connection()
@@ -564,6 +675,7 @@ def get_rooms():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/divisions', methods=['GET'])
+@etag_from_data('divisions', 'division_subjects')
 def get_divisions():
     try:
         data = fetch_all_data()
@@ -572,6 +684,7 @@ def get_divisions():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/timeslots', methods=['GET'])
+@etag_from_data('timeslots')
 def get_timeslots():
     try:
         conn = get_db_connection()
@@ -630,9 +743,17 @@ def delete_division(id):
 def delete_timeslot(id):
     try:
         conn = get_db_connection()
-        conn.execute('DELETE FROM timeslots WHERE id = ?', (id,))
-        conn.commit()
-        conn.close()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Masks lose the timeslot's bit in the same transaction, so they never point past it
+            compact_masks(conn, [id])
+            conn.execute('DELETE FROM timeslots WHERE id = ?', (id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -683,7 +804,36 @@ def validate_generation_data():
     conn.close()
     return errors
 
+def validate_warm_start(params, user):
+    """Error message if the requested warm-start timetable is not one of the user's"""
+    timetable_id = params.get('warmStartTimetableId')
+    if not timetable_id:
+        return None
+    
+    conn = get_db_connection()
+    row = conn.execute('SELECT id FROM user_timetables WHERE id = ? AND user_id = ?',
+                       (timetable_id, user['id'])).fetchone()
+    conn.close()
+    return None if row else f'Saved timetable {timetable_id} not found'
+
+def schedule_format_error():
+    """Error message if ?format= names an unknown schedule encoding"""
+    fmt = request.args.get('format', 'rows')
+    return None if fmt in SCHEDULE_FORMATS else f"Unknown format '{fmt}'; use one of {', '.join(SCHEDULE_FORMATS)}"
+
+@app.route('/api/constraints', methods=['GET'])
+@require_auth
+def get_constraints():
+    """List the scoring constraints and their default weights"""
+    return jsonify({'success': True, 'constraints': constraint_catalog()})
+
 # Add new endpoint for validation:
+@app.route('/api/metrics/timings', methods=['GET'])
+@require_auth
+def get_timing_metrics():
+    """Per-phase generation timings aggregated over the runs finished by this server"""
+    return jsonify({'success': True, 'timings': timing_stats.snapshot()})
+
 @app.route('/api/timetable/validate', methods=['GET'])
 @require_auth
 def validate_data():
@@ -713,44 +863,10 @@ def check_conflicts():
     """Check for conflicts in a given schedule"""
     try:
         data = request.json
-        schedule = data.get('schedule', [])
+        schedule = parse_schedule(data.get('schedule'))
         
-        conflicts = []
-        
-        # Track usage
-        faculty_slots = {}
-        room_slots = {}
-        division_slots = {}
-        
-        for entry in schedule:
-            key = f"{entry['day']}_{entry['timeSlot']}"
-            
-            # Check faculty conflicts
-            faculty = entry.get('faculty')
-            if faculty:
-                if faculty not in faculty_slots:
-                    faculty_slots[faculty] = []
-                if key in faculty_slots[faculty]:
-                    conflicts.append(f"Faculty {faculty} double-booked at {entry['day']} {entry['timeSlot']}")
-                faculty_slots[faculty].append(key)
-            
-            # Check room conflicts
-            room = entry.get('room')
-            if room:
-                if room not in room_slots:
-                    room_slots[room] = []
-                if key in room_slots[room]:
-                    conflicts.append(f"Room {room} double-booked at {entry['day']} {entry['timeSlot']}")
-                room_slots[room].append(key)
-            
-            # Check division conflicts
-            division = entry.get('division')
-            if division:
-                if division not in division_slots:
-                    division_slots[division] = []
-                if key in division_slots[division]:
-                    conflicts.append(f"Division {division} has overlapping classes at {entry['day']} {entry['timeSlot']}")
-                division_slots[division].append(key)
+        # One pass over the schedule into (resource, slot) buckets
+        conflicts = OccupancyIndex(schedule).conflict_messages()
         
         return jsonify({
             'success': True,
@@ -770,25 +886,14 @@ def get_faculty_availability(id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        ensure_availability_column(conn)
         faculty = cursor.execute('SELECT * FROM faculty WHERE id = ?', (id,)).fetchone()
         if not faculty:
             conn.close()
             return jsonify({'success': False, 'error': 'Faculty not found'}), 404
         
-        # Get available days
-        days = [d['day'] for d in cursor.execute(
-            'SELECT DISTINCT day FROM faculty_availability WHERE faculty_id = ?', (id,)
-        )]
-        
-        # Get time slots by day
-        slots_by_day = {}
-        for slot_row in cursor.execute(
-            'SELECT day, time_slot FROM faculty_timeslots WHERE faculty_id = ?', (id,)
-        ):
-            day = slot_row['day']
-            if day not in slots_by_day:
-                slots_by_day[day] = []
-            slots_by_day[day].append(slot_row['time_slot'])
+        timeslots = [dict(row) for row in cursor.execute('SELECT * FROM timeslots').fetchall()]
+        days, slots_by_day, slot_ids = load_availability(conn, faculty, {t['id']: t for t in timeslots})
         
         conn.close()
         
@@ -796,7 +901,8 @@ def get_faculty_availability(id):
             'success': True,
             'faculty': dict(faculty),
             'available_days': days,
-            'available_slots': slots_by_day
+            'available_slots': slots_by_day,
+            'available_slot_ids': slot_ids
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -810,9 +916,7 @@ def generate_timetable():
     if request.method == 'OPTIONS':
         return '', 200
     
-    print(f"\n{'='*60}")
-    print(f"🧬 TIMETABLE GENERATION REQUEST RECEIVED")
-    print(f"{'='*60}")
+    logger.info("🧬 Timetable generation request received")
     
     try:
         # Validate data first
@@ -824,116 +928,141 @@ def generate_timetable():
                 'validation_errors': validation_errors
             }), 400
         
-        data = request.json
-        print(f"📊 Request data: {data}")
-        
-        from genetic_algorithm import GeneticAlgorithm
-        ga = GeneticAlgorithm()
-        ga.population_size = data.get('populationSize', 50)
-        ga.generations = data.get('generations', 100)
-        ga.mutation_rate = data.get('mutationRate', 0.1)
-        
-        print(f"🔧 Algorithm configured: pop={ga.population_size}, gen={ga.generations}, mut={ga.mutation_rate}")
-        
-        # Get data from database
-        print(f"📂 Fetching data from database...")
-        all_data = fetch_all_data()
-        subjects = all_data['subjects']
-        faculty_list = all_data['faculty']
-        rooms = all_data['rooms']
-        timeslots = all_data['timeslots']
-        divisions = all_data['divisions']
-        
-        print(f"📊 Data loaded:")
-        print(f"   Subjects: {len(subjects)}")
-        print(f"   Faculty: {len(faculty_list)}")
-        print(f"   Rooms: {len(rooms)}")
-        print(f"   Timeslots: {len(timeslots)}")
-        print(f"   Divisions: {len(divisions)}")
-        
-        # Run genetic algorithm
-        print(f"\n🔄 Starting genetic algorithm evolution...")
-        best_timetable, history = ga.evolve(subjects, faculty_list, rooms, timeslots, divisions)
-        
-        if not best_timetable or not best_timetable.genes:
-            print("❌ Timetable generation failed.")
-            if best_timetable and hasattr(best_timetable, "conflicts"):
-                print("Conflicts/diagnostics:")
-                for c in best_timetable.conflicts:
-                    print("  -", c)
+        params = request.json or {}
+        weights_error = validate_weights(params.get('weights')) or schedule_format_error()
+        if weights_error:
+            return jsonify({'success': False, 'error': weights_error}), 400
+        warm_start_error = validate_warm_start(params, get_current_user())
+        if warm_start_error:
+            return jsonify({'success': False, 'error': warm_start_error}), 404
+        
+        payload, status = run_generation(params)
+        timing_stats.record(payload.get('timings'))
+        record_run(run_summary(params, payload))
+        if 'schedule' in payload:
+            payload['schedule'] = format_schedule(payload['schedule'], request.args.get('format'))
+        return jsonify(payload), status
+        
+    except Exception as e:
+        logger.exception("❌ Timetable generation failed: %s: %s", type(e).__name__, e)
+        
+        return jsonify({
+            'success': False, 
+            'error': f'{type(e).__name__}: {str(e)}'
+        }), 500
+
+@app.route('/api/timetable/jobs', methods=['POST'])
+@require_auth
+def create_generation_job():
+    """Queue a timetable generation job and return its id immediately"""
+    try:
+        validation_errors = validate_generation_data()
+        if validation_errors:
             return jsonify({
                 'success': False,
-                'error': 'Failed to generate valid timetable. Try increasing population size or generations.',
-                'conflicts': getattr(best_timetable, 'conflicts', [])
+                'error': 'Data validation failed',
+                'validation_errors': validation_errors
             }), 400
         
-        print(f"✅ Evolution complete!")
-        print(f"   Best fitness: {best_timetable.fitness:.2f}")
-        print(f"   Total genes: {len(best_timetable.genes)}")
-        print(f"   Conflicts: {len(best_timetable.conflicts)}")
-        
-        # Reject if too many conflicts
-        if len(best_timetable.conflicts) > 10:
+        user = get_current_user()
+        params = request.json or {}
+        weights_error = validate_weights(params.get('weights'))
+        if weights_error:
+            return jsonify({'success': False, 'error': weights_error}), 400
+        warm_start_error = validate_warm_start(params, user)
+        if warm_start_error:
+            return jsonify({'success': False, 'error': warm_start_error}), 404
+        
+        job_id = job_queue.submit(user['id'], params)
+        if job_id is None:
             return jsonify({
                 'success': False,
-                'error': f'Generated timetable has {len(best_timetable.conflicts)} conflicts. Please review your data or increase generations.',
-                'conflicts': best_timetable.conflicts,
-                'fitness_score': round(best_timetable.fitness, 2)
-            }), 400
+                'error': 'Too many generation jobs queued. Please try again shortly.'
+            }), 429
         
-        # Convert to schedule format
-        schedule = []
-        for gene in best_timetable.genes:
-            subject = next((s for s in subjects if s['id'] == gene.subject_id), None)
-            fac = next((f for f in faculty_list if f['id'] == gene.faculty_id), None)
-            room = next((r for r in rooms if r['id'] == gene.room_id), None)
-            slot = next((t for t in timeslots if t['id'] == gene.timeslot_id), None)
-            division = next((d for d in divisions if d['id'] == gene.division_id), None)
-            
-            if subject and fac and room and slot and division:
-                schedule.append({
-                    'division': division['name'],
-                    'subject': f"{subject['code']} - {subject['name']}",
-                    'subjectCode': subject['code'],
-                    'subjectName': subject['name'],
-                    'faculty': fac['name'],
-                    'room': f"{room['number']} ({room['building']})",
-                    'day': slot['day'],
-                    'timeSlot': f"{slot['start_time']} - {slot['end_time']}",
-                    'type': subject.get('type', 'theory')
-                })
-        
-        print(f"📅 Generated {len(schedule)} class sessions")
-        print(f"{'='*60}\n")
+        logger.info("📥 Queued generation job %s for user %s", job_id, user['username'],
+                    extra={'job_id': job_id})
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'queued'}), 202
+    except Exception as e:
+        logger.error("❌ Error queuing generation job: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_generation_job(job_id):
+    """Get status and, once finished, the result of a generation job"""
+    try:
+        user = get_current_user()
+        format_error = schedule_format_error()
+        if format_error:
+            return jsonify({'success': False, 'error': format_error}), 400
+        job = job_queue.get(job_id)
+        if not job or job['user_id'] != user['id']:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        if job['result'] and 'schedule' in job['result']:
+            job['result']['schedule'] = format_schedule(job['result']['schedule'], request.args.get('format'))
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/jobs/<job_id>', methods=['DELETE'])
+@require_auth
+def cancel_generation_job(job_id):
+    """Cancel a queued or running job; a running job keeps its best-so-far result"""
+    try:
+        user = get_current_user()
+        job = job_queue.get(job_id)
+        if not job or job['user_id'] != user['id']:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
         
-        return jsonify({
-            'success': True,
-            'fitness_score': round(best_timetable.fitness, 2),
-            'schedule': schedule,
-            'conflicts': best_timetable.conflicts,
-            'conflict_count': len(best_timetable.conflicts),
-            'algorithm': 'Genetic Algorithm',
-            'generation_stats': {
-                'population_size': ga.population_size,
-                'generations': ga.generations,
-                'mutation_rate': ga.mutation_rate
-            }
-        })
+        status = job_queue.cancel(job_id)
+        if status is None:
+            return jsonify({'success': False, 'error': f"Job already {job['status']}"}), 409
         
+        logger.info("⏹️  Cancellation requested for generation job %s", job_id, extra={'job_id': job_id})
+        return jsonify({'success': True, 'job_id': job_id, 'status': status})
     except Exception as e:
-        print(f"\n{'='*60}")
-        print(f"❌ CRITICAL ERROR")
-        print(f"{'='*60}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print(f"{'='*60}\n")
-        
-        return jsonify({
-            'success': False, 
-            'error': f'{type(e).__name__}: {str(e)}'
-        }), 500
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/jobs/<job_id>/events', methods=['GET'])
+@require_auth
+def stream_generation_job(job_id):
+    """Stream generation progress for a job as Server-Sent Events"""
+    user = get_current_user()
+    job = job_queue.get(job_id)
+    if not job or job['user_id'] != user['id']:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    # EventSource resends the last id it saw when it reconnects
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Last-Event-ID and after must be integer event ids'}), 400
+    
+    def events():
+        nonlocal last_event_id
+        idle_polls = 0
+        while True:
+            # Read the status before the events so none are missed when the job finishes
+            status = job_queue.status(job_id)
+            for item in job_queue.events_since(job_id, last_event_id):
+                last_event_id = item['id']
+                idle_polls = 0
+                yield f"id: {item['id']}\nevent: progress\ndata: {json.dumps(item['event'])}\n\n"
+            
+            if status not in ACTIVE_STATUSES:
+                yield f"event: done\ndata: {json.dumps({'status': status})}\n\n"
+                return
+            
+            idle_polls += 1
+            if idle_polls % 30 == 0:
+                yield ": keep-alive\n\n"
+            time.sleep(0.5)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/api/timetable/save', methods=['POST'])
 @require_auth
@@ -941,15 +1070,17 @@ def save_timetable():
     try:
         user = get_current_user()
         data = request.json
+        schedule = parse_schedule(data.get('schedule'))
         
         conn = get_db_connection()
+        ensure_timetable_schema(conn)
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO user_timetables (user_id, name, fitness_score, schedule_data)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO user_timetables (user_id, name, fitness_score, schedule_blob, entry_count)
+            VALUES (?, ?, ?, ?, ?)
         ''', (user['id'], data.get('name', 'Timetable'), 
-              data.get('fitness_score'), json.dumps(data.get('schedule', []))))
+              data.get('fitness_score'), encode_schedule(schedule), len(schedule)))
         
         conn.commit()
         timetable_id = cursor.lastrowid
@@ -962,21 +1093,161 @@ def save_timetable():
 @app.route('/api/timetable/my-timetables', methods=['GET'])
 @require_auth
 def get_my_timetables():
+    """One page of the user's saved timetables (metadata only), newest first
+    
+    ?limit= sets the page size; pass the returned next_cursor as ?cursor= for the next page.
+    """
     try:
         user = get_current_user()
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        cursor = request.args.get('cursor', type=int)
+        
         conn = get_db_connection()
+        ensure_timetable_schema(conn)
+        timetables, next_cursor = list_timetables(conn, user['id'], limit, cursor)
+        conn.close()
         
-        timetables = []
-        for row in conn.execute('''
-            SELECT * FROM user_timetables WHERE user_id = ? ORDER BY created_at DESC
-        ''', (user['id'],)):
-            tt = dict(row)
-            tt['schedule'] = json.loads(tt['schedule_data']) if tt['schedule_data'] else []
-            del tt['schedule_data']
-            timetables.append(tt)
+        return jsonify({'success': True, 'timetables': timetables, 'next_cursor': next_cursor})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/my-timetables/<int:timetable_id>', methods=['GET'])
+@require_auth
+def get_my_timetable(timetable_id):
+    """A saved timetable with its schedule, optionally only the classes of one division, faculty or room"""
+    try:
+        format_error = schedule_format_error()
+        if format_error:
+            return jsonify({'success': False, 'error': format_error}), 400
+        user = get_current_user()
+        filters = {field: request.args.get(field, type=int) for field in SCHEDULE_FILTERS
+                   if request.args.get(field) is not None}
         
+        conn = get_db_connection()
+        ensure_timetable_schema(conn)
+        timetable = get_timetable(conn, user['id'], timetable_id)
         conn.close()
-        return jsonify({'success': True, 'timetables': timetables})
+        if not timetable:
+            return jsonify({'success': False, 'error': 'Timetable not found'}), 404
+        
+        timetable['schedule'] = format_schedule(filter_schedule(timetable['schedule'], filters),
+                                                request.args.get('format'))
+        return jsonify({'success': True, 'timetable': timetable})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def saved_timetable_index(conn, user, timetable_id):
+    """(occupancy index, revision) of one of the user's saved timetables, or (None, None)
+
+    Reads the database without holding occupancy_indexes.lock; take the lock only to
+    read or change the returned index.
+    """
+    revision = timetable_revision(conn, user['id'], timetable_id)
+    if revision is None:
+        return None, None
+    return occupancy_indexes.get(timetable_id, revision, lambda: load_schedule(conn, timetable_id)), revision
+
+def placement_fields(conn, edit):
+    """Schedule row fields for moving a lesson to edit['timeslotId'] and optionally edit['roomId']"""
+    fields = {}
+    slot = conn.execute('SELECT * FROM timeslots WHERE id = ?', (edit.get('timeslotId'),)).fetchone()
+    if not slot:
+        raise ValueError(f"Timeslot {edit.get('timeslotId')} not found")
+    fields.update(day=slot['day'], timeSlot=f"{slot['start_time']} - {slot['end_time']}", timeslotId=slot['id'])
+    if edit.get('roomId') is not None:
+        room = conn.execute('SELECT * FROM rooms WHERE id = ?', (edit['roomId'],)).fetchone()
+        if not room:
+            raise ValueError(f"Room {edit['roomId']} not found")
+        fields.update(room=f"{room['number']} ({room['building']})", roomId=room['id'])
+    return fields
+
+@app.route('/api/timetable/my-timetables/<int:timetable_id>/conflicts', methods=['GET'])
+@require_auth
+def get_timetable_conflicts(timetable_id):
+    """All conflicts of a saved timetable, from its server-side occupancy index"""
+    try:
+        conn = get_db_connection()
+        ensure_timetable_schema(conn)
+        try:
+            index, revision = saved_timetable_index(conn, get_current_user(), timetable_id)
+        finally:
+            conn.close()
+        if index is None:
+            return jsonify({'success': False, 'error': 'Timetable not found'}), 404
+        with occupancy_indexes.lock:
+            conflicts = index.conflicts()
+        return jsonify({'success': True, 'revision': revision, 'conflicts': conflicts,
+                        'conflict_count': len(conflicts)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/my-timetables/<int:timetable_id>/check-move', methods=['POST'])
+@require_auth
+def check_timetable_move(timetable_id):
+    """Would moving a lesson to a timeslot (and room) clash? Nothing is changed"""
+    try:
+        data = request.json or {}
+        conn = get_db_connection()
+        ensure_timetable_schema(conn)
+        try:
+            index, revision = saved_timetable_index(conn, get_current_user(), timetable_id)
+            if index is None:
+                return jsonify({'success': False, 'error': 'Timetable not found'}), 404
+            placement = placement_fields(conn, data)
+            with occupancy_indexes.lock:
+                clashes = index.check_move(data.get('lesson'), placement)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        finally:
+            conn.close()
+        return jsonify({'success': True, 'revision': revision, 'valid': not clashes, 'clashes': clashes})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/timetable/my-timetables/<int:timetable_id>/edits', methods=['POST'])
+@require_auth
+def edit_saved_timetable(timetable_id):
+    """Apply move/swap edits to a saved timetable and return only the conflicts they introduced or resolved"""
+    try:
+        data = request.json or {}
+        edits = data.get('edits') or []
+        conn = get_db_connection()
+        ensure_timetable_schema(conn)
+        try:
+            index, revision = saved_timetable_index(conn, get_current_user(), timetable_id)
+            if index is None:
+                return jsonify({'success': False, 'error': 'Timetable not found'}), 404
+            if data.get('revision') is not None and data['revision'] != revision:
+                return jsonify({'success': False, 'error': 'Timetable was changed by another edit',
+                                'revision': revision}), 409
+            # Timeslot and room lookups happen before the lock is taken
+            moves = {id(edit): placement_fields(conn, edit) for edit in edits if edit.get('type') == 'move'}
+            
+            with occupancy_indexes.lock:
+                if not occupancy_indexes.holds(timetable_id, revision, index):
+                    return jsonify({'success': False, 'error': 'Timetable was changed by another edit'}), 409
+                placements = edit_placements(index, edits, lambda edit: moves[id(edit)])
+                changes = index.apply(placements)
+                # apply() replaces edited lesson dicts, so a copy of the list is a stable snapshot
+                schedule = list(index.lessons)
+            
+            try:
+                stored = store_edited_schedule(conn, timetable_id, schedule, revision)
+            except Exception:
+                occupancy_indexes.discard(timetable_id)
+                raise
+            if not stored:
+                # Written elsewhere since the index was loaded; rebuild it on the next request
+                occupancy_indexes.discard(timetable_id)
+                return jsonify({'success': False, 'error': 'Timetable was changed by another edit'}), 409
+            revision += 1
+            occupancy_indexes.set_revision(timetable_id, revision)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        finally:
+            conn.close()
+        
+        return jsonify({'success': True, 'revision': revision, **changes})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -993,4 +1264,7 @@ if __name__ == '__main__':
     print("   - Random mutation")
     print("   - Elitism (top 10%)")
     print("="*60 + "\n")
+    # Only the reloader's child serves requests; other servers run `python job_queue.py recover`
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.recover()
     app.run(debug=True, port=5000, use_reloader=True)
@@ -0,0 +1,155 @@
+"""Faculty availability stored as a bitmask over timeslot positions, and timeslot grid generation
+
+Bit i of faculty.availability_bits is set when the faculty member can teach in the i-th
+timeslot in id order. New timeslots get ids above every existing one (AUTOINCREMENT), so
+they take the next free bit; deleting timeslots drops their bits and shifts the higher
+ones down (compact_masks), so masks stay as wide as the timeslot table. The mask is kept
+as a hex string because a large grid can exceed SQLite's 64-bit integers. Faculty created
+before masks existed (mask NULL) still read from the legacy faculty_availability /
+faculty_timeslots string rows.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+def ensure_availability_column(conn):
+    """Add the faculty.availability_bits column to databases created before it existed"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(faculty)')}
+    if 'availability_bits' not in columns:
+        conn.execute('ALTER TABLE faculty ADD COLUMN availability_bits TEXT')
+
+def encode_mask(mask: int) -> str:
+    return format(mask, 'x')
+
+def decode_mask(value) -> int:
+    return int(value, 16) if value else 0
+
+def mask_bits(mask: int) -> List[int]:
+    """Positions of the set bits, in ascending order"""
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
+
+def slot_positions(timeslot_ids: Iterable[int]) -> Dict[int, int]:
+    """Timeslot id -> its bit in availability masks, given the ids of all timeslots"""
+    return {slot_id: position for position, slot_id in enumerate(sorted(timeslot_ids))}
+
+def mask_slot_ids(mask: int, timeslots_by_id: Dict) -> List[int]:
+    """Ids of the timeslots whose bit is set, in ascending order"""
+    ordered = sorted(timeslots_by_id)
+    return [ordered[bit] for bit in mask_bits(mask) if bit < len(ordered)]
+
+def slot_lookup(timeslots: Iterable) -> Dict[Tuple[str, str], int]:
+    """(day, 'HH:MM-HH:MM') -> mask bit of the timeslot, for all timeslot rows or dicts"""
+    timeslots = list(timeslots)
+    positions = slot_positions(t['id'] for t in timeslots)
+    return {(t['day'], f"{t['start_time']}-{t['end_time']}"): positions[t['id']] for t in timeslots}
+
+def drop_bits(mask: int, bits: Iterable[int]) -> int:
+    """mask without the given bits, the higher bits shifted down to close each gap"""
+    for bit in sorted(set(bits), reverse=True):
+        mask = ((mask >> (bit + 1)) << bit) | (mask & ((1 << bit) - 1))
+    return mask
+
+def compact_masks(conn, deleted_ids: Iterable[int]):
+    """Drop the bits of timeslots about to be deleted from every faculty mask
+
+    Call in the deleting transaction, before the timeslot rows are deleted.
+    """
+    ensure_availability_column(conn)
+    positions = slot_positions(row[0] for row in conn.execute('SELECT id FROM timeslots'))
+    bits = [positions[slot_id] for slot_id in deleted_ids if slot_id in positions]
+    if not bits:
+        return
+    rows = conn.execute('SELECT id, availability_bits FROM faculty WHERE availability_bits IS NOT NULL').fetchall()
+    conn.executemany('UPDATE faculty SET availability_bits = ? WHERE id = ?',
+                     [(encode_mask(drop_bits(decode_mask(mask), bits)), faculty_id) for faculty_id, mask in rows])
+
+def mask_from_pairs(pairs: Iterable[Tuple[str, str]], lookup: Dict) -> Tuple[int, List[str]]:
+    """Mask of the (day, time slot) pairs that exist as timeslots, plus the slot strings
+    that matched no timeslot on any of their days"""
+    mask = 0
+    matched = set()
+    requested = set()
+    for day, slot in pairs:
+        requested.add(slot)
+        bit = lookup.get((day, slot))
+        if bit is not None:
+            mask |= 1 << bit
+            matched.add(slot)
+    return mask, sorted(requested - matched)
+
+def availability_from_mask(mask: int, timeslots_by_id: Dict) -> Tuple[List[str], Dict[str, List[str]]]:
+    """(available_days, {day: [time slots]}) in the shape the solvers read"""
+    slots_by_day = {}
+    for slot_id in mask_slot_ids(mask, timeslots_by_id):
+        slot = timeslots_by_id[slot_id]
+        slots_by_day.setdefault(slot['day'], []).append(f"{slot['start_time']}-{slot['end_time']}")
+    return list(slots_by_day), slots_by_day
+
+def load_availability(conn, faculty_row, timeslots_by_id: Dict) -> Tuple[List[str], Dict[str, List[str]], List[int]]:
+    """(available_days, {day: [time slots]}, available timeslot ids) of one faculty row,
+    from its mask or from the legacy string rows; timeslots_by_id must hold every timeslot"""
+    if faculty_row['availability_bits'] is not None:
+        mask = decode_mask(faculty_row['availability_bits'])
+        days, slots_by_day = availability_from_mask(mask, timeslots_by_id)
+        return days, slots_by_day, mask_slot_ids(mask, timeslots_by_id)
+
+    days = [d['day'] for d in conn.execute(
+        'SELECT DISTINCT day FROM faculty_availability WHERE faculty_id = ?', (faculty_row['id'],)
+    )]
+    slots_by_day = {}
+    for slot_row in conn.execute(
+        'SELECT day, time_slot FROM faculty_timeslots WHERE faculty_id = ?', (faculty_row['id'],)
+    ):
+        slots_by_day.setdefault(slot_row['day'], []).append(slot_row['time_slot'])
+    available = faculty_slot_ids({'available_days': days, 'available_time_slots': slots_by_day},
+                                 timeslots_by_id.values())
+    return days, slots_by_day, sorted(available)
+
+def faculty_slot_ids(fac: Dict, timeslots: Iterable) -> FrozenSet[int]:
+    """Ids of the timeslots a faculty dict is available in: its available_slot_ids when
+    loaded from the database, else resolved once from its day / time-slot strings"""
+    if 'available_slot_ids' in fac:
+        return frozenset(fac['available_slot_ids'])
+    days = set(fac.get('available_days', []))
+    times = {day: set(slots) for day, slots in fac.get('available_time_slots', {}).items()}
+    return frozenset(t['id'] for t in timeslots
+                     if t['day'] in days and f"{t['start_time']}-{t['end_time']}" in times.get(t['day'], ()))
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def grid_timeslots(days: List[str], start_time: str, end_time: str, period_minutes: int,
+                   breaks: Iterable[Tuple[str, str]] = (), description: str = '') -> List[Dict]:
+    """Timeslot records for every period of every day between start and end
+
+    Periods that would overlap a break restart right after it; a trailing period that does
+    not fit before end_time is dropped.
+    """
+    if period_minutes <= 0:
+        raise ValueError('periodMinutes must be positive')
+    start, end = _minutes(start_time), _minutes(end_time)
+    if start >= end:
+        raise ValueError(f"startTime {start_time} is not before endTime {end_time}")
+    pauses = sorted((_minutes(b_start), _minutes(b_end)) for b_start, b_end in breaks)
+
+    periods = []
+    current = start
+    while current + period_minutes <= end:
+        finish = current + period_minutes
+        pause = next(((b_start, b_end) for b_start, b_end in pauses
+                      if b_start < finish and current < b_end), None)
+        if pause:
+            current = max(current, pause[1])
+            continue
+        periods.append((_clock(current), _clock(finish)))
+        current = finish
+
+    return [{'day': day, 'start_time': slot_start, 'end_time': slot_end, 'description': description}
+            for day in days for slot_start, slot_end in periods]
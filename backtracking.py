@@ -1,40 +1,46 @@
 import sqlite3
 from typing import List, Dict, Optional, Tuple
+from availability import ensure_availability_column, load_availability
+from constraints import ProblemIndex, compile_constraints
+from genetic_algorithm import TimetableGene
+from log import get_logger
+from profiling import Timings
+
+logger = get_logger('backtracking')
+
+class SearchStopped(Exception):
+    """Raised inside the search to unwind immediately when a run is cancelled or out of time"""
 
 class BacktrackingSolver:
-    def __init__(self, db_path='timetable.db'):
+    def __init__(self, db_path='timetable.db', weights=None):
         self.db_path = db_path
+        # Constraint weight overrides; hard constraints with weight 0 are not enforced
+        self.weights = weights
         self.solution = []
         self.conflicts = []
         self.assignments_tried = 0
         self.backtrack_count = 0
+        self.stopped_reason = None
+        # Per-phase wall time of solve (data_load, search)
+        self.timings = Timings()
     
     def get_data(self):
         """Fetch all necessary data from database"""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         
-        subjects = [dict(row) for row in conn.execute('SELECT * FROM subjects WHERE is_component = 1 OR is_component IS NULL').fetchall()]
+        # Standalone subjects and components; parent subjects only group components
+        subjects = [dict(row) for row in conn.execute("SELECT * FROM subjects WHERE type != 'parent' OR type IS NULL").fetchall()]
+        
+        timeslots = [dict(row) for row in conn.execute('SELECT * FROM timeslots').fetchall()]
+        timeslots_by_id = {t['id']: t for t in timeslots}
         
         # Fetch faculty with availability
+        ensure_availability_column(conn)
         faculty = []
         for row in conn.execute('SELECT * FROM faculty').fetchall():
             fac_id = row['id']
-            
-            # Get available days
-            days = [d['day'] for d in conn.execute(
-                'SELECT DISTINCT day FROM faculty_availability WHERE faculty_id = ?', (fac_id,)
-            )]
-            
-            # Get time slots by day
-            slots_by_day = {}
-            for slot_row in conn.execute(
-                'SELECT day, time_slot FROM faculty_timeslots WHERE faculty_id = ?', (fac_id,)
-            ):
-                day = slot_row['day']
-                if day not in slots_by_day:
-                    slots_by_day[day] = []
-                slots_by_day[day].append(slot_row['time_slot'])
+            days, slots_by_day, slot_ids = load_availability(conn, row, timeslots_by_id)
             
             # Get subjects
             subjects_ids = [s['subject_id'] for s in conn.execute(
@@ -51,13 +57,13 @@ class BacktrackingSolver:
                 'name': row['name'],
                 'available_days': days,
                 'available_time_slots': slots_by_day,
+                'available_slot_ids': slot_ids,
                 'subjects': subjects_ids,
                 'divisions': division_ids,
                 'max_hours': row['max_hours']
             })
         
         rooms = [dict(row) for row in conn.execute('SELECT * FROM rooms').fetchall()]
-        timeslots = [dict(row) for row in conn.execute('SELECT * FROM timeslots').fetchall()]
         
         # Fetch divisions
         divisions = []
@@ -77,72 +83,19 @@ class BacktrackingSolver:
         conn.close()
         return subjects, faculty, rooms, timeslots, divisions
     
-    def is_valid_assignment(self, division_id, subject_id, faculty_id, room_id, timeslot_id, 
-                          current_schedule, faculty_list, rooms, timeslots, divisions):
-        """Check if assignment is valid (no conflicts)"""
-        
-        # Get details
-        timeslot = next((t for t in timeslots if t['id'] == timeslot_id), None)
-        if not timeslot:
-            return False, "Invalid timeslot"
-        
-        faculty = next((f for f in faculty_list if f['id'] == faculty_id), None)
-        if not faculty:
-            return False, "Invalid faculty"
-        
-        room = next((r for r in rooms if r['id'] == room_id), None)
-        if not room:
-            return False, "Invalid room"
-        
-        division = next((d for d in divisions if d['id'] == division_id), None)
-        if not division:
-            return False, "Invalid division"
-        
-        # Check faculty availability
-        slot_day = timeslot['day']
-        slot_time = f"{timeslot['start_time']}-{timeslot['end_time']}"
-        
-        if slot_day not in faculty.get('available_days', []):
-            return False, f"Faculty not available on {slot_day}"
-        
-        day_slots = faculty.get('available_time_slots', {}).get(slot_day, [])
-        if slot_time not in day_slots:
-            return False, f"Faculty not available at {slot_time}"
-        
-        # Check faculty can teach this subject to this division
-        if subject_id not in faculty.get('subjects', []):
-            return False, "Faculty not assigned to this subject"
-        
-        if division_id not in faculty.get('divisions', []):
-            return False, "Faculty not assigned to this division"
-        
-        # Check for conflicts in current schedule
-        for scheduled in current_schedule:
-            s_div, s_sub, s_fac, s_room, s_time = scheduled
-            
-            # Same timeslot
-            if s_time == timeslot_id:
-                # Faculty conflict
-                if s_fac == faculty_id:
-                    return False, "Faculty already teaching at this time"
-                
-                # Room conflict
-                if s_room == room_id:
-                    return False, "Room already occupied at this time"
-                
-                # Division conflict
-                if s_div == division_id:
-                    return False, "Division already has a class at this time"
-        
-        # Check room capacity
-        if room['capacity'] < division['student_count']:
-            return False, f"Room too small ({room['capacity']} < {division['student_count']})"
-        
-        return True, None
+    def is_valid_assignment(self, gene, state, constraints):
+        """Check if assignment is valid (no conflicts with the genes already in state)"""
+        error = constraints.violation(state, gene)
+        return error is None, error
     
-    def solve(self, max_iterations=10000, progress_callback=None):
-        """Solve timetable using backtracking with iteration limit"""
-        subjects, faculty_list, rooms, timeslots, divisions = self.get_data()
+    def solve(self, max_iterations=10000, progress_callback=None, cancel_token=None):
+        """Solve timetable using backtracking with iteration limit
+        
+        If cancel_token asks to stop, the largest partial schedule found so far is
+        returned and stopped_reason is set to 'cancelled' or 'timeout'.
+        """
+        with self.timings.phase('data_load'):
+            subjects, faculty_list, rooms, timeslots, divisions = self.get_data()
         
         if not subjects or not faculty_list or not rooms or not timeslots or not divisions:
             raise Exception("Insufficient data. Please add subjects, faculty, rooms, timeslots, and divisions.")
@@ -156,11 +109,16 @@ class BacktrackingSolver:
                 for _ in range(hours_needed):
                     required_assignments.append((division['id'], subject['id']))
         
-        print(f"🔍 Backtracking: Need to schedule {len(required_assignments)} classes")
+        logger.info("🔍 Backtracking: Need to schedule %d classes", len(required_assignments))
         
+        constraints = compile_constraints(ProblemIndex(subjects, faculty_list, rooms, timeslots, divisions),
+                                          self.weights)
+        state = constraints.new_state()
         schedule = []
+        best_partial = []
         self.assignments_tried = 0
         self.backtrack_count = 0
+        self.stopped_reason = None
         
         def backtrack(assignment_index):
             # Check iteration limit
@@ -168,6 +126,12 @@ class BacktrackingSolver:
             if self.assignments_tried > max_iterations:
                 return False
             
+            # Check cancellation / time budget
+            if cancel_token:
+                self.stopped_reason = cancel_token.stop_reason()
+                if self.stopped_reason:
+                    raise SearchStopped()
+            
             # Base case: all assignments scheduled
             if assignment_index >= len(required_assignments):
                 return True
@@ -189,11 +153,9 @@ class BacktrackingSolver:
             for faculty_member in eligible_faculty:
                 for room in rooms:
                     for timeslot in timeslots:
-                        is_valid, error = self.is_valid_assignment(
-                            division_id, subject_id, faculty_member['id'], 
-                            room['id'], timeslot['id'],
-                            schedule, faculty_list, rooms, timeslots, divisions
-                        )
+                        gene = TimetableGene(division_id, subject_id, faculty_member['id'],
+                                             room['id'], timeslot['id'])
+                        is_valid, error = self.is_valid_assignment(gene, state, constraints)
                         
                         if is_valid:
                             assignment = (
@@ -201,6 +163,9 @@ class BacktrackingSolver:
                                 room['id'], timeslot['id']
                             )
                             schedule.append(assignment)
+                            state.add(gene)
+                            if len(schedule) > len(best_partial):
+                                best_partial[:] = schedule
                             
                             # Progress callback
                             if progress_callback and assignment_index % 5 == 0:
@@ -213,18 +178,25 @@ class BacktrackingSolver:
                             
                             # Backtrack
                             schedule.pop()
+                            state.remove(gene)
                             self.backtrack_count += 1
             
             return False
         
         # Start backtracking
-        print("🔄 Starting backtracking...")
-        success = backtrack(0)
+        logger.info("🔄 Starting backtracking...")
+        try:
+            with self.timings.phase('search'):
+                success = backtrack(0)
+        except SearchStopped:
+            logger.info("⏹️  Backtracking stopped (%s) with %d/%d classes placed", self.stopped_reason,
+                        len(best_partial), len(required_assignments))
+            return best_partial, subjects, faculty_list, rooms, timeslots, divisions
         
-        print(f"📊 Tried {self.assignments_tried} assignments, backtracked {self.backtrack_count} times")
+        logger.info("📊 Tried %d assignments, backtracked %d times", self.assignments_tried, self.backtrack_count)
         
         if success:
-            print(f"✅ Found solution with {len(schedule)} scheduled classes")
+            logger.info("✅ Found solution with %d scheduled classes", len(schedule))
             return schedule, subjects, faculty_list, rooms, timeslots, divisions
         else:
             if self.assignments_tried >= max_iterations:
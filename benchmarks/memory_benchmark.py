@@ -0,0 +1,93 @@
+"""Peak memory of a large GA run with slotted genes vs. the old __dict__-based objects
+
+    python benchmarks/memory_benchmark.py --population 500 --divisions 20 --generations 2
+
+Each variant runs in its own interpreter so peak RSS is not shared between them.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:  # Windows: fall back to the Python allocator's peak
+    resource = None
+    import tracemalloc
+    tracemalloc.start()
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def run_variant(variant: str, args) -> dict:
+    import genetic_algorithm
+    from benchmarks.synthetic import make_dataset
+
+    if variant == 'dict':
+        # Subclasses without __slots__ get a per-instance __dict__ again, like before
+        class DictGene(genetic_algorithm.TimetableGene):
+            pass
+
+        class DictTimetable(genetic_algorithm.Timetable):
+            pass
+
+        genetic_algorithm.TimetableGene = DictGene
+        genetic_algorithm.Timetable = DictTimetable
+
+    data = make_dataset(divisions=args.divisions, seed=args.seed)
+    ga = genetic_algorithm.GeneticAlgorithm(seed=args.seed)
+    ga.population_size = args.population
+    ga.generations = args.generations
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        best, _ = ga.evolve(data['subjects'], data['faculty'], data['rooms'], data['timeslots'],
+                            data['divisions'])
+    return {
+        'variant': variant,
+        'genes_per_timetable': len(best.genes),
+        'population': args.population,
+        'generations': args.generations,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'baseline_rss_mb': round(baseline, 1),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--population', type=int, default=500)
+    parser.add_argument('--divisions', type=int, default=20, help='each adds 40 genes per timetable')
+    parser.add_argument('--generations', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--variant', choices=['dict', 'slots'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args)))
+        return
+
+    results = []
+    for variant in ('dict', 'slots'):
+        output = subprocess.run([sys.executable, __file__, '--variant', variant,
+                                 '--population', str(args.population), '--divisions', str(args.divisions),
+                                 '--generations', str(args.generations), '--seed', str(args.seed)],
+                                check=True, capture_output=True, text=True, cwd=ROOT).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{variant:>5}: peak RSS {results[-1]['peak_rss_mb']} MB "
+              f"({results[-1]['genes_per_timetable']} genes x {args.population}, {results[-1]['seconds']}s)")
+
+    saved = results[0]['peak_rss_mb'] - results[1]['peak_rss_mb']
+    print(f"__slots__ saves {saved:.1f} MB ({saved / results[0]['peak_rss_mb']:.0%} of peak RSS)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Time data loading, fitness evaluation and both solvers on synthetic institutions
+
+    python benchmarks/solver_benchmark.py --tiers small medium --output results.json
+    python benchmarks/solver_benchmark.py --compare results.json
+
+Each size tier runs in its own interpreter (so peak RSS is per tier) against a fresh
+SQLite database built from benchmarks.synthetic. Results are written as JSON together
+with the git commit, so runs from two versions can be compared with --compare.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.memory_benchmark import peak_rss_mb
+
+# make_dataset arguments and solver settings per size tier
+TIERS = {
+    'small': {'dataset': {'divisions': 4, 'subjects_per_division': 6, 'hours_per_week': 3, 'faculty': 16,
+                          'rooms': 6, 'days': 5, 'periods_per_day': 6, 'availability': 0.8},
+              'population': 30, 'generations': 20, 'fitness_samples': 200},
+    'medium': {'dataset': {'divisions': 12, 'subjects_per_division': 8, 'hours_per_week': 4, 'faculty': 48,
+                           'rooms': 15, 'days': 5, 'periods_per_day': 8, 'availability': 0.8},
+               'population': 50, 'generations': 10, 'fitness_samples': 100},
+    'large': {'dataset': {'divisions': 30, 'subjects_per_division': 10, 'hours_per_week': 4, 'faculty': 120,
+                          'rooms': 35, 'days': 6, 'periods_per_day': 8, 'availability': 0.8},
+              'population': 50, 'generations': 5, 'fitness_samples': 50},
+}
+
+# Timing fields compared by --compare
+TIMED = ('fetch_all_data', 'calculate_fitness', 'evolve', 'backtracking')
+
+def _timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def run_tier(name: str, args) -> dict:
+    from backtracking import BacktrackingSolver
+    from benchmarks.synthetic import make_dataset, write_database
+    from cancellation import CancellationToken
+    from data_handler import fetch_all_data
+    from genetic_algorithm import GeneticAlgorithm, TimetableGene
+
+    tier = TIERS[name]
+    results = {'tier': name, 'dataset': tier['dataset']}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'benchmark.db')
+        write_database(make_dataset(seed=args.seed, **tier['dataset']), db_path)
+
+        # fetch_all_data: best of a few loads
+        loads = [_timed(fetch_all_data, db_path) for _ in range(args.repeat)]
+        data = loads[0][0]
+        problem = (data['subjects'], data['faculty'], data['rooms'], data['timeslots'], data['divisions'])
+        results['fetch_all_data'] = {'seconds': round(min(seconds for _, seconds in loads), 4),
+                                     'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+        # calculate_fitness on random timetables
+        ga = GeneticAlgorithm(seed=args.seed)
+        constraints = ga.compile_constraints(*problem)
+        timetables = [ga.create_random_timetable(*problem) for _ in range(tier['fitness_samples'])]
+        genes = sum(len(t.genes) for t in timetables)
+        _, seconds = _timed(lambda: [t.calculate_fitness(*problem, constraints) for t in timetables])
+        results['calculate_fitness'] = {'seconds': round(seconds, 4),
+                                        'timetables_per_second': round(len(timetables) / seconds, 1),
+                                        'genes_per_second': round(genes / seconds),
+                                        'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+        # GeneticAlgorithm.evolve
+        ga = GeneticAlgorithm(seed=args.seed)
+        ga.population_size = tier['population']
+        ga.generations = tier['generations']
+        (best, _), seconds = _timed(ga.evolve, *problem)
+        results['evolve'] = {'seconds': round(seconds, 3), 'population': ga.population_size,
+                             'generations': ga.generations,
+                             'generations_per_second': round(ga.generations / seconds, 2),
+                             'genes': len(best.genes), 'fitness': round(best.fitness, 2),
+                             'conflicts': len(best.conflicts), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+        # BacktrackingSolver.solve, bounded by iterations and time
+        solver = BacktrackingSolver(db_path)
+        started = time.perf_counter()
+        try:
+            (schedule, *_), seconds = _timed(solver.solve, max_iterations=args.max_iterations,
+                                             cancel_token=CancellationToken(args.backtracking_seconds))
+            status = solver.stopped_reason or 'solved'
+            score, conflicts = constraints.evaluate([TimetableGene(*assignment) for assignment in schedule])
+            outcome = {'placed': len(schedule), 'fitness': round(score, 2), 'conflicts': len(conflicts)}
+        except Exception as e:
+            # e.g. the iteration limit was exceeded
+            seconds = time.perf_counter() - started
+            status, outcome = 'failed', {'error': str(e)}
+        results['backtracking'] = {'seconds': round(seconds, 3), 'status': status,
+                                   'assignments_tried': solver.assignments_tried,
+                                   'required': sum(t['hours_per_week'] for d in data['divisions']
+                                                   for t in data['subjects'] if t['id'] in d['subjects']),
+                                   **outcome, 'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+    results['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(previous: dict, current: dict, tolerance: float) -> int:
+    """Print per-phase time ratios against an earlier run; returns the number of regressions"""
+    before = {tier['tier']: tier for tier in previous['tiers']}
+    regressions = 0
+    print(f"\nCompared with {previous.get('commit', '?')} ({previous.get('created_at', '?')}):")
+    for tier in current['tiers']:
+        old = before.get(tier['tier'])
+        if not old:
+            continue
+        for phase in TIMED:
+            old_seconds, new_seconds = old[phase]['seconds'], tier[phase]['seconds']
+            ratio = new_seconds / old_seconds if old_seconds else 1.0
+            # Millisecond phases are too noisy to flag on the ratio alone
+            slower = ratio > 1 + tolerance and new_seconds - old_seconds > 0.01
+            regressions += slower
+            print(f"  {tier['tier']:>6} {phase:<18} {old_seconds:>9.4f}s -> {new_seconds:>9.4f}s "
+                  f"x{ratio:.2f}{'  ⚠️  slower' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tiers', nargs='+', choices=list(TIERS), default=['small', 'medium'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='fetch_all_data loads per tier (best is kept)')
+    parser.add_argument('--max-iterations', type=int, default=20000)
+    parser.add_argument('--backtracking-seconds', type=float, default=30)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='earlier results JSON to compare timings against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='slowdown ratio above which --compare reports a regression')
+    parser.add_argument('--tier', choices=list(TIERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.tier:
+        print(json.dumps(run_tier(args.tier, args)))
+        return 0
+
+    report = {'commit': git_commit(), 'created_at': datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(),
+              'seed': args.seed, 'tiers': []}
+    for name in args.tiers:
+        output = subprocess.run([sys.executable, __file__, '--tier', name, '--seed', str(args.seed),
+                                 '--repeat', str(args.repeat), '--max-iterations', str(args.max_iterations),
+                                 '--backtracking-seconds', str(args.backtracking_seconds)],
+                                check=True, capture_output=True, text=True, cwd=ROOT).stdout
+        tier = json.loads(output.strip().splitlines()[-1])
+        report['tiers'].append(tier)
+        print(f"{name:>6}: load {tier['fetch_all_data']['seconds']}s | "
+              f"fitness {tier['calculate_fitness']['genes_per_second']} genes/s | "
+              f"GA {tier['evolve']['seconds']}s ({tier['evolve']['conflicts']} conflicts) | "
+              f"backtracking {tier['backtracking']['seconds']}s ({tier['backtracking']['status']}) | "
+              f"peak RSS {tier['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), report, args.tolerance) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Database size and read latency of saved timetables: JSON text vs. compressed columnar blobs
+
+    python benchmarks/storage_benchmark.py --timetables 50 --divisions 30
+
+Both variants store the same synthetic schedules in a fresh database; sizes are
+measured after VACUUM, reads time saved_timetables.get_timetable per row.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def make_schedules(args) -> list:
+    from benchmarks.synthetic import make_dataset
+    from generation import build_schedule
+    from genetic_algorithm import GeneticAlgorithm
+
+    data = make_dataset(divisions=args.divisions, faculty=args.divisions * 4, rooms=args.divisions,
+                        days=6, periods_per_day=8, seed=args.seed)
+    problem = (data['subjects'], data['faculty'], data['rooms'], data['timeslots'], data['divisions'])
+    ga = GeneticAlgorithm(seed=args.seed)
+    return [build_schedule(ga.create_random_timetable(*problem), data) for _ in range(args.timetables)]
+
+def run_variant(variant: str, schedules: list) -> dict:
+    from data_handler import get_db_connection
+    from init_db import init_database
+    from saved_timetables import encode_schedule, ensure_timetable_schema, get_timetable
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'storage.db')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            init_database(db_path)
+        conn = get_db_connection(db_path)
+        ensure_timetable_schema(conn)
+        conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (1, 'bench', 'b@x', '')")
+
+        started = time.perf_counter()
+        for i, schedule in enumerate(schedules):
+            if variant == 'json':
+                values = (json.dumps(schedule), None)
+            else:
+                values = (None, encode_schedule(schedule))
+            conn.execute('''
+                INSERT INTO user_timetables (user_id, name, schedule_data, schedule_blob, entry_count)
+                VALUES (1, ?, ?, ?, ?)
+            ''', (f"Timetable {i}", *values, len(schedule)))
+        conn.commit()
+        write_seconds = time.perf_counter() - started
+        conn.execute('VACUUM')
+
+        ids = [row[0] for row in conn.execute('SELECT id FROM user_timetables')]
+        started = time.perf_counter()
+        for timetable_id in ids:
+            get_timetable(conn, 1, timetable_id)
+        read_seconds = time.perf_counter() - started
+        conn.close()
+        size = os.path.getsize(db_path)
+
+    return {'variant': variant, 'db_kb': round(size / 1024), 'write_ms': round(write_seconds * 1000 / len(ids), 2),
+            'read_ms': round(read_seconds * 1000 / len(ids), 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--timetables', type=int, default=50)
+    parser.add_argument('--divisions', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    schedules = make_schedules(args)
+    print(f"{len(schedules)} timetables x {len(schedules[0])} classes")
+    results = [run_variant(variant, schedules) for variant in ('json', 'compressed')]
+    for result in results:
+        print(f"{result['variant']:>10}: {result['db_kb']:>7} KB | write {result['write_ms']} ms | "
+              f"read {result['read_ms']} ms per timetable")
+    print(f"📦 {results[0]['db_kb'] / results[1]['db_kb']:.1f}x smaller")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
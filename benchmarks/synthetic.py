@@ -0,0 +1,97 @@
+import contextlib
+import os
+import random
+import sqlite3
+from typing import Dict
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def make_dataset(divisions: int = 20, subjects_per_division: int = 10, hours_per_week: int = 4,
+                 faculty: int = 60, rooms: int = 25, days: int = 5, periods_per_day: int = 8,
+                 availability: float = 1.0, lab_rooms: float = 0.0, seed: int = 0) -> Dict:
+    """Random problem in the shape returned by data_handler.fetch_all_data
+
+    Every faculty member teaches a handful of subjects and is available in a random
+    `availability` share of the week's slots (all of them by default), so
+    divisions * subjects_per_division * hours_per_week genes are needed per timetable.
+    `lab_rooms` is the share of rooms typed 'lab'. The same arguments always give the
+    same dataset.
+    """
+    rng = random.Random(seed)
+    timeslots = []
+    for day in DAYS[:days]:
+        for period in range(periods_per_day):
+            timeslots.append({
+                'id': len(timeslots) + 1, 'day': day,
+                'start_time': f"{8 + period:02d}:00", 'end_time': f"{9 + period:02d}:00",
+                'description': ''
+            })
+
+    subject_count = max(subjects_per_division, divisions * subjects_per_division // 4)
+    subjects = [{'id': i, 'code': f"SUB{i}", 'name': f"Subject {i}", 'hours_per_week': hours_per_week,
+                 'type': 'theory'} for i in range(1, subject_count + 1)]
+    division_list = [{'id': i, 'name': f"DIV-{i}", 'year': 'FY', 'student_count': rng.choice([40, 50, 60]),
+                      'subjects': [s['id'] for s in rng.sample(subjects, subjects_per_division)]}
+                     for i in range(1, divisions + 1)]
+    lab_count = round(rooms * lab_rooms)
+    room_list = [{'id': i, 'number': f"R{i}", 'building': 'Main', 'capacity': rng.choice([50, 60, 80]),
+                  'type': 'lab' if i <= lab_count else 'classroom'} for i in range(1, rooms + 1)]
+
+    faculty_list = []
+    for i in range(1, faculty + 1):
+        if availability >= 1:
+            available = timeslots
+        else:
+            available = sorted(rng.sample(timeslots, max(1, round(len(timeslots) * availability))),
+                               key=lambda t: t['id'])
+        slot_times = {}
+        for slot in available:
+            slot_times.setdefault(slot['day'], []).append(f"{slot['start_time']}-{slot['end_time']}")
+        faculty_list.append({'id': i, 'name': f"Faculty {i}", 'employee_id': f"E{i}", 'department': 'CS',
+                             'email': '', 'max_hours': 20, 'year': 'FY', 'available_days': list(slot_times),
+                             'available_time_slots': slot_times,
+                             'available_slot_ids': [slot['id'] for slot in available],
+                             'subjects': [], 'divisions': [d['id'] for d in division_list]})
+    # Every subject gets at least one teacher, the rest are spread at random
+    for subject in subjects:
+        rng.choice(faculty_list)['subjects'].append(subject['id'])
+    for fac in faculty_list:
+        extra = rng.choice(subjects)['id']
+        if extra not in fac['subjects']:
+            fac['subjects'].append(extra)
+
+    return {'subjects': subjects, 'faculty': faculty_list, 'rooms': room_list,
+            'timeslots': timeslots, 'divisions': division_list}
+
+def write_database(data: Dict, db_path: str):
+    """Create a fresh timetable database at db_path holding a make_dataset problem"""
+    from availability import encode_mask, slot_positions
+    from init_db import init_database
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('INSERT INTO subjects (id, code, name, hours_per_week, type) VALUES (?, ?, ?, ?, ?)',
+                     [(s['id'], s['code'], s['name'], s['hours_per_week'], s['type']) for s in data['subjects']])
+    conn.executemany('INSERT INTO rooms (id, number, building, capacity, type) VALUES (?, ?, ?, ?, ?)',
+                     [(r['id'], r['number'], r['building'], r['capacity'], r['type']) for r in data['rooms']])
+    conn.executemany('INSERT INTO timeslots (id, day, start_time, end_time, description) VALUES (?, ?, ?, ?, ?)',
+                     [(t['id'], t['day'], t['start_time'], t['end_time'], t['description'])
+                      for t in data['timeslots']])
+    conn.executemany('INSERT INTO divisions (id, name, year, student_count) VALUES (?, ?, ?, ?)',
+                     [(d['id'], d['name'], d['year'], d['student_count']) for d in data['divisions']])
+    conn.executemany('INSERT INTO division_subjects (division_id, subject_id) VALUES (?, ?)',
+                     [(d['id'], sid) for d in data['divisions'] for sid in d['subjects']])
+    positions = slot_positions(t['id'] for t in data['timeslots'])
+    conn.executemany('''
+        INSERT INTO faculty (id, name, employee_id, department, email, max_hours, year, availability_bits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(f['id'], f['name'], f['employee_id'], f['department'], f['email'], f['max_hours'], f['year'],
+           encode_mask(sum(1 << positions[slot_id] for slot_id in f['available_slot_ids'])))
+          for f in data['faculty']])
+    conn.executemany('INSERT INTO faculty_subjects (faculty_id, subject_id) VALUES (?, ?)',
+                     [(f['id'], sid) for f in data['faculty'] for sid in f['subjects']])
+    conn.executemany('INSERT INTO faculty_divisions (faculty_id, division_id) VALUES (?, ?)',
+                     [(f['id'], did) for f in data['faculty'] for did in f['divisions']])
+    conn.commit()
+    conn.close()
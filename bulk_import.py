@@ -0,0 +1,346 @@
+"""Streaming CSV import of subjects, faculty, rooms, timeslots and divisions into timetable.db
+
+    python bulk_import.py faculty faculty.csv [--batch-size 500] [--db timetable.db]
+
+Rows are read and validated in batches; each batch of valid rows is written with
+executemany in a single transaction (junction tables included). Invalid rows are
+reported with their line number and skipped.
+"""
+import argparse
+import csv
+import itertools
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from availability import compact_masks, encode_mask, ensure_availability_column, mask_from_pairs, slot_lookup
+from data_handler import DB_PATH, get_db_connection
+from log import get_logger
+
+logger = get_logger('bulk_import')
+
+VALID_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SUBJECT_TYPES = ['theory', 'lab', 'tutorial']
+TIME_RE = re.compile(r'^\d{1,2}:\d{2}$')
+
+# Main table columns per entity; records are dicts keyed by these plus junction lists
+COLUMNS = {
+    'subjects': ('code', 'name', 'hours_per_week', 'type', 'is_component'),
+    'faculty': ('name', 'employee_id', 'department', 'email', 'max_hours', 'year', 'availability_bits'),
+    'rooms': ('number', 'building', 'capacity', 'type', 'facilities'),
+    'timeslots': ('day', 'start_time', 'end_time', 'description'),
+    'divisions': ('name', 'year', 'student_count'),
+}
+
+# camelCase request fields of the single-item POST endpoints -> CSV/database names
+API_FIELDS = {
+    'faculty': {'employeeId': 'employee_id', 'maxHours': 'max_hours',
+                'availableDays': 'available_days', 'availableTimeSlots': 'available_time_slots'},
+    'divisions': {'studentCount': 'student_count'},
+    'timeslots': {'startTime': 'start_time', 'endTime': 'end_time'},
+    'rooms': {},
+}
+
+# Rows referencing an entity that must go with it (foreign keys are not enforced)
+JUNCTIONS = {
+    'subjects': [('faculty_subjects', 'subject_id'), ('division_subjects', 'subject_id'),
+                 ('subjects', 'parent_subject_id')],
+    'faculty': [('faculty_availability', 'faculty_id'), ('faculty_timeslots', 'faculty_id'),
+                ('faculty_subjects', 'faculty_id'), ('faculty_divisions', 'faculty_id')],
+    'divisions': [('division_subjects', 'division_id'), ('faculty_divisions', 'division_id')],
+    'rooms': [],
+    'timeslots': [],
+}
+
+class RowError(ValueError):
+    """A CSV row (or API item) that cannot be imported"""
+
+class ReferenceLookup:
+    """Resolves subject ids/codes, division ids/names and timeslots, and tracks used employee ids"""
+
+    def __init__(self, conn):
+        self.subjects = {}
+        for row in conn.execute('SELECT id, code FROM subjects'):
+            self.subjects[str(row['id'])] = row['id']
+            self.subjects.setdefault(row['code'], row['id'])
+        self.divisions = {}
+        for row in conn.execute('SELECT id, name FROM divisions'):
+            self.divisions[str(row['id'])] = row['id']
+            self.divisions.setdefault(row['name'], row['id'])
+        self.employee_ids = {row['employee_id'] for row in conn.execute('SELECT employee_id FROM faculty')}
+        self.timeslots = slot_lookup(conn.execute('SELECT id, day, start_time, end_time FROM timeslots'))
+
+    def resolve(self, kind: str, tokens: List) -> List[int]:
+        table = self.subjects if kind == 'subjects' else self.divisions
+        ids = []
+        for token in tokens:
+            key = str(token).strip()
+            if key not in table:
+                raise RowError(f"unknown {kind[:-1]} '{key}'")
+            ids.append(table[key])
+        return ids
+
+def _split(value) -> List[str]:
+    """Parse a ';' (or ',') separated CSV cell, or pass through a list"""
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    separator = ';' if ';' in value else ','
+    return [part.strip() for part in value.split(separator) if part.strip()]
+
+def _required(row: Dict, name: str) -> str:
+    value = row.get(name)
+    if value is None or str(value).strip() == '':
+        raise RowError(f"missing '{name}'")
+    return str(value).strip()
+
+def _positive_int(row: Dict, name: str, default: Optional[int] = None) -> int:
+    value = row.get(name)
+    if (value is None or str(value).strip() == '') and default is not None:
+        return default
+    try:
+        number = int(str(_required(row, name)))
+    except ValueError:
+        raise RowError(f"'{name}' must be an integer, got '{value}'")
+    if number <= 0:
+        raise RowError(f"'{name}' must be positive, got {number}")
+    return number
+
+def _days(values) -> List[str]:
+    days = []
+    for day in _split(values):
+        day = day.capitalize()
+        if day not in VALID_DAYS:
+            raise RowError(f"invalid day '{day}'")
+        days.append(day)
+    return days
+
+def _time(row: Dict, name: str) -> str:
+    value = _required(row, name)
+    if not TIME_RE.match(value):
+        raise RowError(f"'{name}' must look like HH:MM, got '{value}'")
+    return value
+
+def parse_record(entity_type: str, row: Dict, lookup: ReferenceLookup) -> Dict:
+    """Validate one CSV row (snake_case columns) and return a record for insert_many"""
+    if entity_type == 'subjects':
+        subject_type = (row.get('type') or 'theory').strip().lower()
+        if subject_type not in SUBJECT_TYPES:
+            raise RowError(f"invalid type '{subject_type}'")
+        return {'code': _required(row, 'code'), 'name': _required(row, 'name'),
+                'hours_per_week': _positive_int(row, 'hours_per_week'), 'type': subject_type,
+                'is_component': 0}
+
+    if entity_type == 'faculty':
+        employee_id = _required(row, 'employee_id')
+        if employee_id in lookup.employee_ids:
+            raise RowError(f"employee_id '{employee_id}' already exists")
+        days = _days(row.get('available_days'))
+        slots = _split(row.get('available_time_slots'))
+        for slot in slots:
+            start, _, end = slot.partition('-')
+            if not (TIME_RE.match(start.strip()) and TIME_RE.match(end.strip())):
+                raise RowError(f"invalid time slot '{slot}', expected HH:MM-HH:MM")
+        # Like POST /api/faculty, every listed slot applies to every available day
+        mask, unknown = mask_from_pairs(((day, slot) for day in days for slot in slots), lookup.timeslots)
+        if unknown:
+            raise RowError(f"no timeslot matches {', '.join(unknown)} on {', '.join(days)}")
+        record = {'name': _required(row, 'name'), 'employee_id': employee_id,
+                  'department': (row.get('department') or '').strip(),
+                  'email': (row.get('email') or '').strip() or None,
+                  'max_hours': _positive_int(row, 'max_hours', default=20),
+                  'year': (row.get('year') or '').strip(),
+                  'availability_bits': encode_mask(mask),
+                  'subjects': lookup.resolve('subjects', _split(row.get('subjects'))),
+                  'divisions': lookup.resolve('divisions', _split(row.get('divisions')))}
+        lookup.employee_ids.add(employee_id)
+        return record
+
+    if entity_type == 'rooms':
+        return {'number': _required(row, 'number'), 'building': (row.get('building') or '').strip(),
+                'capacity': _positive_int(row, 'capacity'),
+                'type': (row.get('type') or 'classroom').strip(),
+                'facilities': (row.get('facilities') or '').strip()}
+
+    if entity_type == 'timeslots':
+        days = _days(_required(row, 'day'))
+        start, end = _time(row, 'start_time'), _time(row, 'end_time')
+        if tuple(map(int, start.split(':'))) >= tuple(map(int, end.split(':'))):
+            raise RowError(f"start_time {start} is not before end_time {end}")
+        return {'day': days[0], 'start_time': start, 'end_time': end,
+                'description': (row.get('description') or '').strip()}
+
+    if entity_type == 'divisions':
+        return {'name': _required(row, 'name'), 'year': _required(row, 'year'),
+                'student_count': _positive_int(row, 'student_count'),
+                'subjects': lookup.resolve('subjects', _split(row.get('subjects')))}
+
+    raise RowError(f"unknown entity type '{entity_type}'")
+
+def _next_ids(conn, table: str, count: int) -> List[int]:
+    """Reserve ids after both MAX(id) and the AUTOINCREMENT high-water mark"""
+    seq = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    start = max(seq[0] if seq else 0, conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0])
+    return list(range(start + 1, start + 1 + count))
+
+def insert_many(conn, entity_type: str, records: List[Dict]) -> List[int]:
+    """Insert validated records and their junction rows with executemany; returns new ids
+
+    Runs inside the caller's transaction, which must hold the write lock (BEGIN IMMEDIATE)
+    so the reserved ids cannot be taken by another writer.
+    """
+    if not records:
+        return []
+    columns = COLUMNS[entity_type]
+    if entity_type == 'faculty':
+        ensure_availability_column(conn)
+    ids = _next_ids(conn, entity_type, len(records))
+    conn.executemany(
+        f"INSERT INTO {entity_type} (id, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))})",
+        [(new_id, *(record[column] for column in columns)) for new_id, record in zip(ids, records)]
+    )
+
+    if entity_type == 'faculty':
+        conn.executemany('INSERT INTO faculty_subjects (faculty_id, subject_id) VALUES (?, ?)',
+                         [(fid, sid) for fid, r in zip(ids, records) for sid in r['subjects']])
+        conn.executemany('INSERT INTO faculty_divisions (faculty_id, division_id) VALUES (?, ?)',
+                         [(fid, did) for fid, r in zip(ids, records) for did in r['divisions']])
+    elif entity_type == 'divisions':
+        conn.executemany('INSERT INTO division_subjects (division_id, subject_id) VALUES (?, ?)',
+                         [(did, sid) for did, r in zip(ids, records) for sid in r['subjects']])
+    return ids
+
+def create_batch(conn, entity_type: str, items: List[Dict]) -> Tuple[List[int], List[Dict]]:
+    """Validate API items and insert them all in one transaction
+
+    Returns (new ids, errors); nothing is written when any item is invalid.
+    """
+    renames = API_FIELDS[entity_type]
+    lookup = ReferenceLookup(conn)
+    records = []
+    errors = []
+    for position, item in enumerate(items):
+        row = {renames.get(key, key): value for key, value in item.items()}
+        try:
+            records.append(parse_record(entity_type, row, lookup))
+        except RowError as e:
+            errors.append({'index': position, 'error': str(e)})
+    if errors:
+        return [], errors
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        ids = insert_many(conn, entity_type, records)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ids, []
+
+def delete_many(conn, entity_type: str, ids: List[int]) -> int:
+    """Delete rows and their junction rows in one transaction; returns rows deleted"""
+    params = [(int(item_id),) for item_id in ids]
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cascaded = []
+        if entity_type == 'subjects':
+            # Components are deleted with their parent subject, so their junction rows go too
+            for (parent_id,) in params:
+                cascaded += [(row[0],) for row in conn.execute(
+                    'SELECT id FROM subjects WHERE parent_subject_id = ?', (parent_id,))]
+        if entity_type == 'timeslots':
+            compact_masks(conn, [slot_id for (slot_id,) in params])
+        for table, column in JUNCTIONS[entity_type]:
+            conn.executemany(f'DELETE FROM {table} WHERE {column} = ?', params + cascaded)
+        deleted = conn.executemany(f'DELETE FROM {entity_type} WHERE id = ?', params).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
+
+def import_rows(rows: Iterable[Dict], entity_type: str, db_path: str = DB_PATH,
+                batch_size: int = 500, max_errors: int = 100) -> Dict:
+    """Validate and insert dict rows batch by batch; returns an import summary"""
+    if entity_type not in COLUMNS:
+        raise ValueError(f"Unknown entity type: {entity_type}")
+
+    started = time.perf_counter()
+    conn = get_db_connection(db_path)
+    lookup = ReferenceLookup(conn)
+    imported = 0
+    batches = 0
+    errors = []
+    error_count = 0
+    line = 1  # header
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            records = []
+            for row in batch:
+                line += 1
+                try:
+                    records.append(parse_record(entity_type, row, lookup))
+                except RowError as e:
+                    error_count += 1
+                    if len(errors) < max_errors:
+                        errors.append({'line': line, 'error': str(e)})
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                ids = insert_many(conn, entity_type, records)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            imported += len(ids)
+            batches += 1
+
+            # Later rows may reference subjects/divisions created by this batch
+            if entity_type == 'subjects':
+                for new_id, record in zip(ids, records):
+                    lookup.subjects[str(new_id)] = new_id
+                    lookup.subjects.setdefault(record['code'], new_id)
+            elif entity_type == 'divisions':
+                for new_id, record in zip(ids, records):
+                    lookup.divisions[str(new_id)] = new_id
+                    lookup.divisions.setdefault(record['name'], new_id)
+    finally:
+        conn.close()
+
+    return {
+        'entity_type': entity_type,
+        'imported': imported,
+        'rejected': error_count,
+        'errors': errors,
+        'batches': batches,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def import_csv(stream, entity_type: str, db_path: str = DB_PATH, batch_size: int = 500) -> Dict:
+    """Stream a CSV file object (header row with snake_case column names) into the database"""
+    summary = import_rows(csv.DictReader(stream), entity_type, db_path, batch_size)
+    logger.info("📥 Imported %d %s (%d rejected) in %ss", summary['imported'], entity_type,
+                summary['rejected'], summary['seconds'])
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import a CSV file into the timetable database')
+    parser.add_argument('entity_type', choices=sorted(COLUMNS))
+    parser.add_argument('csv_file')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    with open(args.csv_file, newline='', encoding='utf-8-sig') as stream:
+        summary = import_csv(stream, args.entity_type, args.db, args.batch_size)
+    for error in summary['errors']:
+        print(f"   line {error['line']}: {error['error']}")
+    return 0 if not summary['rejected'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
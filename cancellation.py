@@ -0,0 +1,26 @@
+import time
+from typing import Optional
+
+class CancellationToken:
+    """Cooperative stop signal for long-running solvers, with an optional time budget"""
+
+    def __init__(self, max_seconds: Optional[float] = None):
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def is_expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def stop_reason(self) -> Optional[str]:
+        """Return 'cancelled' or 'timeout' once the solver should stop, else None"""
+        if self.is_cancelled():
+            return 'cancelled'
+        if self.is_expired():
+            return 'timeout'
+        return None
@@ -0,0 +1,61 @@
+"""Shared pytest fixtures: a freshly initialized database and a logged-in API client"""
+import sqlite3
+import pytest
+from init_db import init_database
+
+def insert_sample_problem(db_path):
+    """Add a small problem every solver can complete: division 1 needs one hour each of
+    subjects 1 and 2, taught by faculty 1 and 2 who are free in all three Monday slots"""
+    conn = sqlite3.connect(db_path)
+    # NULL is_component marks standalone subjects, which every loader schedules
+    conn.executemany("INSERT INTO subjects (id, code, name, hours_per_week, type, is_component) VALUES (?, ?, ?, 1, 'theory', NULL)",
+                     [(1, 'SUB1', 'Subject 1'), (2, 'SUB2', 'Subject 2')])
+    conn.executemany("INSERT INTO rooms (id, number, building, capacity, type) VALUES (?, ?, 'Main', 60, 'classroom')",
+                     [(1, 'R1'), (2, 'R2')])
+    conn.executemany("INSERT INTO timeslots (id, day, start_time, end_time, description) VALUES (?, 'Monday', ?, ?, '')",
+                     [(n, f'{8 + n:02d}:00', f'{9 + n:02d}:00') for n in (1, 2, 3)])
+    conn.execute("INSERT INTO divisions (id, name, year, student_count) VALUES (1, 'DIV-1', 'FY', 40)")
+    conn.executemany('INSERT INTO division_subjects (division_id, subject_id) VALUES (1, ?)', [(1,), (2,)])
+    conn.executemany("INSERT INTO faculty (id, name, employee_id, department, email, max_hours, year) VALUES (?, ?, ?, 'CS', '', 20, 'FY')",
+                     [(n, f'Faculty {n}', f'E{n}') for n in (1, 2)])
+    conn.executemany('INSERT INTO faculty_subjects (faculty_id, subject_id) VALUES (?, ?)', [(1, 1), (2, 2)])
+    conn.executemany('INSERT INTO faculty_divisions (faculty_id, division_id) VALUES (?, 1)', [(1,), (2,)])
+    conn.executemany("INSERT INTO faculty_availability (faculty_id, day) VALUES (?, 'Monday')", [(1,), (2,)])
+    conn.executemany("INSERT INTO faculty_timeslots (faculty_id, day, time_slot) VALUES (?, 'Monday', ?)",
+                     [(fac, f'{8 + n:02d}:00-{9 + n:02d}:00') for fac in (1, 2) for n in (1, 2, 3)])
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of an empty database created by init_db"""
+    path = str(tmp_path / 'timetable.db')
+    init_database(path)
+    return path
+
+@pytest.fixture
+def sample_problem():
+    """insert_sample_problem, for tests that need data to schedule"""
+    return insert_sample_problem
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Flask test client signed up as 'tester', serving a fresh timetable.db in tmp_path"""
+    # The app opens the relative DB_PATH, so run it from the temporary directory
+    monkeypatch.chdir(tmp_path)
+    init_database('timetable.db')
+
+    import app as app_module
+    import data_version
+    from occupancy import OccupancyRegistry
+    # Per-process caches keyed by path or id would otherwise leak between databases
+    monkeypatch.setattr(data_version, '_tracked_paths', set())
+    monkeypatch.setattr(app_module, 'occupancy_indexes', OccupancyRegistry())
+    monkeypatch.setattr(app_module, '_bootstrap_data', (None, None))
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/signup', json={
+        'username': 'tester', 'email': 'tester@example.com', 'password': 'secret1'
+    })
+    assert response.status_code == 200
+    return test_client
@@ -1,43 +1,29 @@
-from models import Schedule, ScheduleEntry, Subject, Faculty, Room, TimeSlot
-from typing import List, Optional
-import copy
+from models import Schedule, ScheduleEntry, Faculty, Room, Subject, TimeSlot
+from constraints import CompiledConstraints, compile_constraints
+from fitness_function import entry_gene, model_problem
+from genetic_algorithm import TimetableGene
+from cancellation import CancellationToken
+from typing import Dict, List, Optional, Tuple
 
 class ConstraintHandler:
-    def __init__(self, time_slots: List[TimeSlot], rooms: List[Room], 
-                 faculty: List[Faculty], subjects: List[Subject]):
+    def __init__(self, time_slots: List[TimeSlot], rooms: List[Room],
+                 faculty: List[Faculty], subjects: List[Subject], weights: Optional[Dict] = None):
         self.time_slots = time_slots
         self.rooms = rooms
         self.faculty = faculty
         self.subjects = subjects
-        
+        # Validity is decided by the registry's enabled hard constraints, as in the solvers
+        self.constraints = compile_constraints(model_problem(time_slots, rooms, faculty, subjects), weights)
+
     def is_valid_assignment(self, schedule: Schedule, new_entry: ScheduleEntry) -> bool:
         """Check if adding new entry violates constraints"""
-        # Check faculty conflict
-        for entry in schedule.entries:
-            if entry.time_slot.id == new_entry.time_slot.id:
-                if entry.faculty.id == new_entry.faculty.id:
-                    return False
-                if entry.room.id == new_entry.room.id:
-                    return False
-                    
-        # Check faculty availability
-        if new_entry.time_slot.id not in new_entry.faculty.available_slots:
-            return False
-            
-        # Check room capacity
-        if new_entry.room.capacity < new_entry.subject.student_count:
-            return False
-            
-        # Check room type match
-        if new_entry.room.room_type != new_entry.subject.room_type:
-            return False
-            
-        return True
-    
+        # The schedule's bookings stand in for the registry's assignment state
+        return self.constraints.is_valid(schedule, entry_gene(new_entry))
+
     def repair_schedule(self, schedule: Schedule) -> Schedule:
         """Use backtracking to repair conflicts in schedule"""
         repaired = Schedule()
-        
+
         for entry in schedule.entries:
             if self.is_valid_assignment(repaired, entry):
                 repaired.add_entry(entry)
@@ -46,33 +32,171 @@ class ConstraintHandler:
                 fixed_entry = self._find_alternative(repaired, entry)
                 if fixed_entry:
                     repaired.add_entry(fixed_entry)
-                    
+
         return repaired
-    
+
     def _find_alternative(self, schedule: Schedule, entry: ScheduleEntry) -> Optional[ScheduleEntry]:
         """Backtracking: find alternative time slot or room"""
         # Try different time slots
+        available = self.constraints.index.faculty_slots.get(entry.faculty.id, ())
         for ts in self.time_slots:
-            if ts.id in entry.faculty.available_slots:
-                new_entry = ScheduleEntry(entry.subject, entry.faculty, entry.room, ts)
+            if ts.id in available:
+                new_entry = ScheduleEntry(entry.subject, entry.faculty, entry.room, ts,
+                                          entry.division_id, entry.division_name)
                 if self.is_valid_assignment(schedule, new_entry):
                     return new_entry
-                    
+
         # Try different rooms with original time slot
         for room in self.rooms:
             if room.room_type == entry.subject.room_type:
-                new_entry = ScheduleEntry(entry.subject, entry.faculty, room, entry.time_slot)
+                new_entry = ScheduleEntry(entry.subject, entry.faculty, room, entry.time_slot,
+                                          entry.division_id, entry.division_name)
                 if self.is_valid_assignment(schedule, new_entry):
                     return new_entry
-                    
+
         return None
-    
-    def branch_and_bound_prune(self, partial_schedule: Schedule, remaining_subjects: List[Subject], 
-                                best_score: float, fitness_evaluator) -> bool:
+
+    @staticmethod
+    def branch_and_bound_prune(lower_bound: float, best_penalty: float) -> bool:
         """Determine if current branch should be pruned"""
-        # Calculate upper bound (optimistic estimate)
-        current_score = fitness_evaluator.evaluate(partial_schedule)
-        potential_score = current_score + len(remaining_subjects) * 100  # Optimistic
-        
-        # Prune if can't beat current best
-        return potential_score < best_score
+        # lower_bound never overestimates the penalty of any completion of the branch,
+        # so a branch that cannot beat the best complete schedule is safe to drop
+        return lower_bound >= best_penalty
+
+class BranchAndBoundOptimizer:
+    """Anytime branch and bound over complete timetables, minimizing the registry penalty
+
+    Places one class per weekly hour of every required (division, subject) pair, choosing
+    its faculty, timeslot and room. Hard constraints are the compiled registry's; the
+    objective is its soft penalty. Per-class costs (room fit) are bounded by the cheapest
+    choice left for each class, totals by their bound hooks.
+    """
+
+    def __init__(self, constraints: CompiledConstraints):
+        self.constraints = constraints
+        self.nodes = 0
+        self.best_penalty = None
+        self.proved_optimal = False
+        self.stopped_reason = None
+
+    def classes(self) -> List[Tuple[int, int]]:
+        """One (division id, subject id) per weekly hour of each required pair"""
+        return [(division['id'], subject['id']) for division, subject in self.constraints.index.required
+                for _ in range(subject['hours_per_week'])]
+
+    def _candidates(self, division_id: int, subject_id: int) -> List[Tuple[float, TimetableGene]]:
+        """Statically valid (weighted cost, gene) choices for a class, cheapest first"""
+        index = self.constraints.index
+        empty = self.constraints.new_state()
+        candidates = []
+        for faculty_id in index.faculty:
+            for timeslot_id in index.timeslots:
+                for room_id in index.rooms:
+                    gene = TimetableGene(division_id, subject_id, faculty_id, room_id, timeslot_id)
+                    if self.constraints.is_valid(empty, gene):
+                        candidates.append((self.constraints.gene_cost(gene), gene))
+        candidates.sort(key=lambda c: (c[0], index.periods.get(c[1].timeslot_id, 0), c[1].timeslot_id,
+                                       c[1].room_id, c[1].faculty_id))
+        return candidates
+
+    def optimize(self, max_seconds: Optional[float] = None,
+                 cancel_token: Optional[CancellationToken] = None) -> Optional[List[TimetableGene]]:
+        """Return the genes of the best complete timetable found, or None if none was found
+
+        Runs until the search space is exhausted (proved_optimal is then True) or the
+        time limit / cancel token stops it, in which case the best timetable so far is returned.
+        """
+        cancel_token = cancel_token or CancellationToken(max_seconds)
+        self.nodes = 0
+        self.best_penalty = None
+        self.proved_optimal = False
+        self.stopped_reason = None
+
+        compiled = self.constraints
+        index = compiled.index
+        classes = self.classes()
+        options = {key: self._candidates(*key) for key in dict.fromkeys(classes)}
+        # Most constrained classes first; identical classes stay adjacent for symmetry breaking
+        order = sorted(classes, key=lambda key: (len(options[key]), key))
+        if any(not options[key] for key in order):
+            self.proved_optimal = True
+            return None
+        if not order:
+            self.proved_optimal = True
+            self.best_penalty = 0
+            return []
+
+        n = len(order)
+        # Cheapest cost still achievable by classes depth.. n-1
+        cost_suffix = [0] * (n + 1)
+        for depth in range(n - 1, -1, -1):
+            cost_suffix[depth] = cost_suffix[depth + 1] + options[order[depth]][0][0]
+
+        state = compiled.new_state()
+        placed_penalty = 0   # costs and soft check penalties of the classes placed so far
+
+        def lower_bound(depth):
+            return (placed_penalty + cost_suffix[depth]
+                    + sum(weight * bound(index, state) for weight, bound in compiled.bounds))
+
+        def penalty():
+            return placed_penalty + sum(weight * total(index, state)[0] for weight, total in compiled.totals)
+
+        def place(gene, cost):
+            soft = sum(weight for weight, check in compiled.soft_checks if check(index, state, gene))
+            state.add(gene)
+            return cost + soft
+
+        best_genes = None
+        best = float('inf')
+        chosen = [None] * n   # (candidate index, penalty added) placed at each depth
+        next_index = [0] * n
+        depth = 0
+
+        while depth >= 0:
+            if chosen[depth] is not None:
+                index_at, added = chosen[depth]
+                state.remove(options[order[depth]][index_at][1])
+                placed_penalty -= added
+                chosen[depth] = None
+
+            self.stopped_reason = cancel_token.stop_reason()
+            if self.stopped_reason:
+                break
+
+            candidates = options[order[depth]]
+            while next_index[depth] < len(candidates):
+                candidate = next_index[depth]
+                next_index[depth] += 1
+                cost, gene = candidates[candidate]
+                if not compiled.is_valid(state, gene):
+                    continue
+                added = place(gene, cost)
+                placed_penalty += added
+                self.nodes += 1
+                if ConstraintHandler.branch_and_bound_prune(lower_bound(depth + 1), best):
+                    state.remove(gene)
+                    placed_penalty -= added
+                    continue
+                chosen[depth] = (candidate, added)
+                break
+
+            if chosen[depth] is None:
+                depth -= 1
+            elif depth == n - 1:
+                value = penalty()
+                if value < best:
+                    best = value
+                    best_genes = [options[order[d]][chosen[d][0]][1] for d in range(n)]
+            else:
+                depth += 1
+                # Identical classes take candidates in increasing order only
+                next_index[depth] = chosen[depth - 1][0] + 1 if order[depth] == order[depth - 1] else 0
+
+        self.proved_optimal = self.stopped_reason is None
+        if best_genes is None:
+            return None
+
+        self.best_penalty = best
+        return [TimetableGene(g.division_id, g.subject_id, g.faculty_id, g.room_id, g.timeslot_id)
+                for g in best_genes]
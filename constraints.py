@@ -0,0 +1,375 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from availability import faculty_slot_ids
+
+# Score of a timetable that violates nothing; penalties are subtracted from it
+BASE_SCORE = 1000
+
+def room_fit_penalty(capacity: int, student_count: int) -> int:
+    """Penalty units for a room that is too small for the class (per 10 missing seats)"""
+    return max(0, student_count - capacity) // 10
+
+def empty_seats_penalty(capacity: int, student_count: int) -> int:
+    """Penalty units for seats the class leaves empty (per 10 seats)"""
+    return max(0, capacity - student_count) // 10
+
+def slot_periods(timeslots) -> Dict[int, int]:
+    """Map timeslot id -> position within its day by start time (TimeSlot objects or dicts)"""
+    def fields(slot):
+        if isinstance(slot, dict):
+            return slot['id'], slot['day'], slot['start_time']
+        return slot.id, slot.day, slot.start_time
+    
+    by_day = {}
+    for slot in timeslots:
+        slot_id, day, start = fields(slot)
+        start_key = tuple(int(part) for part in str(start).split(':') if part.isdigit())
+        by_day.setdefault(day, []).append((start_key, slot_id))
+    return {slot_id: period
+            for slots in by_day.values()
+            for period, (_, slot_id) in enumerate(sorted(slots))}
+
+def day_gaps(mask: int) -> int:
+    """Idle periods between the first and last class of a day bitmap (bit n = period n)"""
+    if not mask:
+        return 0
+    first = (mask & -mask).bit_length() - 1
+    return mask.bit_length() - first - mask.bit_count()
+
+class ProblemIndex:
+    """Id lookups and per-faculty sets built once per run from the fetch_all_data lists"""
+
+    def __init__(self, subjects, faculty, rooms, timeslots, divisions):
+        self.subjects = {s['id']: s for s in subjects}
+        self.faculty = {f['id']: f for f in faculty}
+        self.rooms = {r['id']: r for r in rooms}
+        self.timeslots = {t['id']: t for t in timeslots}
+        self.divisions = {d['id']: d for d in divisions}
+        self.periods = slot_periods(timeslots)
+        self.slot_times = {t['id']: f"{t['start_time']}-{t['end_time']}" for t in timeslots}
+
+        self.faculty_days = {f['id']: set(f.get('available_days', [])) for f in faculty}
+        # Availability resolved to timeslot ids once, so checks never format time strings
+        self.faculty_slots = {f['id']: faculty_slot_ids(f, timeslots) for f in faculty}
+        # None when the faculty record has no assignment list (models.py faculty): any subject/division
+        self.faculty_subjects = {f['id']: _id_set(f.get('subjects')) for f in faculty}
+        self.faculty_divisions = {f['id']: _id_set(f.get('divisions')) for f in faculty}
+
+        # (division, subject) pairs that must be taught, in division then subject order
+        self.required = [(division, subject) for division in divisions
+                         for subject in subjects if subject['id'] in division['subjects']]
+        self.division_hours = {}
+        for division, subject in self.required:
+            self.division_hours[division['id']] = self.division_hours.get(division['id'], 0) + subject['hours_per_week']
+
+    def class_size(self, gene) -> int:
+        """Students in a gene's class: its division's count, else the subject's own student_count"""
+        division = self.divisions.get(gene.division_id)
+        if division and division.get('student_count'):
+            return division['student_count']
+        subject = self.subjects.get(gene.subject_id)
+        return (subject.get('student_count') or 0) if subject else 0
+
+def _id_set(ids):
+    return None if ids is None else set(ids)
+
+class AssignmentState:
+    """Occupancy and counters of a (partial) timetable, updated gene by gene"""
+
+    def __init__(self, index: ProblemIndex, tracks=()):
+        self.index = index
+        self.track_days = 'day_masks' in tracks
+        self.track_day_counts = 'day_counts' in tracks
+        self.track_faculty_hours = 'faculty_hours' in tracks
+        self.faculty_slots = {}   # (faculty_id, timeslot_id) -> classes
+        self.room_slots = {}      # (room_id, timeslot_id) -> classes
+        self.division_slots = {}  # (division_id, timeslot_id) -> classes
+        self.hours = {}           # (division_id, subject_id) -> classes
+        self.day_masks = {}       # (division_id, day) -> bitmap of occupied periods
+        self.day_counts = {}      # day -> classes
+        self.faculty_hours = {}   # faculty_id -> classes
+
+    @staticmethod
+    def _bump(counter, key, delta):
+        count = counter.get(key, 0) + delta
+        if count:
+            counter[key] = count
+        else:
+            del counter[key]
+        return count
+
+    def _apply(self, gene, delta):
+        slot = self.index.timeslots.get(gene.timeslot_id)
+        if not slot:
+            return
+        self._bump(self.faculty_slots, (gene.faculty_id, gene.timeslot_id), delta)
+        self._bump(self.room_slots, (gene.room_id, gene.timeslot_id), delta)
+        # Classes without a division (models.py entries may have none) book no division slot
+        if gene.division_id is not None:
+            in_slot = self._bump(self.division_slots, (gene.division_id, gene.timeslot_id), delta)
+            self._bump(self.hours, (gene.division_id, gene.subject_id), delta)
+            if self.track_days:
+                key = (gene.division_id, slot['day'])
+                bit = 1 << self.index.periods.get(gene.timeslot_id, 0)
+                mask = self.day_masks.get(key, 0)
+                self.day_masks[key] = mask | bit if in_slot else mask & ~bit
+        if self.track_day_counts:
+            self._bump(self.day_counts, slot['day'], delta)
+        if self.track_faculty_hours:
+            self._bump(self.faculty_hours, gene.faculty_id, delta)
+
+    def add(self, gene):
+        self._apply(gene, 1)
+
+    def remove(self, gene):
+        self._apply(gene, -1)
+
+@dataclass
+class Constraint:
+    """A named, weighted rule; hard constraints also decide whether an assignment is allowed"""
+    name: str
+    weight: float
+    hard: bool = False
+    # (index, state, gene) -> violation message or None, checked before the gene is added
+    check: Optional[Callable] = None
+    # (index, state) -> (penalty units, messages), evaluated once all genes are added
+    total: Optional[Callable] = None
+    # (index, gene) -> penalty units of the gene on its own, whatever else is scheduled
+    cost: Optional[Callable] = None
+    # (index, state) -> lower bound on the total's units once the remaining required
+    # classes are added (branch and bound); totals without one are taken to end >= 0
+    bound: Optional[Callable] = None
+    # Optional AssignmentState counters the hooks read ('day_masks', 'day_counts', 'faculty_hours')
+    tracks: Tuple[str, ...] = ()
+
+CONSTRAINTS: Dict[str, Constraint] = {}
+
+def register_constraint(constraint: Constraint) -> Constraint:
+    """Add a constraint to the registry (replacing one with the same name)"""
+    CONSTRAINTS[constraint.name] = constraint
+    return constraint
+
+def validate_weights(weights) -> Optional[str]:
+    """Error message for a malformed per-request weights object, else None"""
+    if weights is None:
+        return None
+    if not isinstance(weights, dict):
+        return 'weights must be an object of constraint name -> weight'
+    for name, weight in weights.items():
+        if name not in CONSTRAINTS:
+            return f"Unknown constraint '{name}'. Available: {', '.join(CONSTRAINTS)}"
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            return f"Weight for '{name}' must be a non-negative number"
+    return None
+
+class CompiledConstraints:
+    """The enabled constraints of a run, evaluated together in a single pass over the genes"""
+
+    def __init__(self, index: ProblemIndex, constraints: List[Tuple[Constraint, float]]):
+        self.index = index
+        self.weights = {c.name: weight for c, weight in constraints}
+        self.invalid_slot_weight = self.weights.get('invalid_timeslot')
+        self.checks = [(weight, c.check) for c, weight in constraints
+                       if c.check and c.name != 'invalid_timeslot']
+        self.hard_checks = [c.check for c, _ in constraints if c.hard and c.check]
+        self.soft_checks = [(weight, c.check) for c, weight in constraints if c.check and not c.hard]
+        self.costs = [(weight, c.cost) for c, weight in constraints if c.cost]
+        self.totals = [(weight, c.total) for c, weight in constraints if c.total]
+        self.bounds = [(weight, c.bound) for c, weight in constraints if c.total and c.bound]
+        self.tracks = {track for c, _ in constraints for track in c.tracks}
+
+    def new_state(self) -> AssignmentState:
+        return AssignmentState(self.index, self.tracks)
+
+    def violation(self, state: AssignmentState, gene) -> Optional[str]:
+        """First enabled hard constraint the gene would break if added to state"""
+        if gene.timeslot_id not in self.index.timeslots:
+            return f"Invalid timeslot ID {gene.timeslot_id}" if self.invalid_slot_weight else None
+        for check in self.hard_checks:
+            message = check(self.index, state, gene)
+            if message:
+                return message
+        return None
+
+    def is_valid(self, state: AssignmentState, gene) -> bool:
+        return self.violation(state, gene) is None
+
+    def gene_cost(self, gene) -> float:
+        """Weighted penalty of the gene's per-class costs (e.g. room fit)"""
+        return sum(weight * cost(self.index, gene) for weight, cost in self.costs)
+
+    def evaluate(self, genes) -> Tuple[float, List[str]]:
+        """Return (score, conflict messages) for a complete list of genes"""
+        index = self.index
+        state = self.new_state()
+        score = BASE_SCORE
+        conflicts = []
+
+        for gene in genes:
+            # Genes with an unknown timeslot are only charged for that
+            if gene.timeslot_id not in index.timeslots:
+                if self.invalid_slot_weight:
+                    score -= self.invalid_slot_weight
+                    conflicts.append(f"Invalid timeslot ID {gene.timeslot_id}")
+                continue
+            for weight, check in self.checks:
+                message = check(index, state, gene)
+                if message:
+                    score -= weight
+                    conflicts.append(message)
+            score -= self.gene_cost(gene)
+            state.add(gene)
+
+        for weight, total in self.totals:
+            units, messages = total(index, state)
+            score -= weight * units
+            conflicts.extend(messages)
+
+        return max(0, score), conflicts
+
+def compile_constraints(index: ProblemIndex, weights: Optional[Dict] = None) -> CompiledConstraints:
+    """Compile the registry with per-request weight overrides; weight 0 disables a constraint"""
+    error = validate_weights(weights)
+    if error:
+        raise ValueError(error)
+    weights = weights or {}
+    enabled = [(c, weights.get(c.name, c.weight)) for c in CONSTRAINTS.values()]
+    return CompiledConstraints(index, [(c, weight) for c, weight in enabled if weight])
+
+def constraint_catalog() -> List[Dict]:
+    """Registered constraints with their default weights, for the API"""
+    return [{'name': c.name, 'weight': c.weight, 'hard': c.hard} for c in CONSTRAINTS.values()]
+
+# Built-in constraints
+
+def _faculty_day(index, state, gene):
+    day = index.timeslots[gene.timeslot_id]['day']
+    fac = index.faculty.get(gene.faculty_id)
+    if fac and day not in index.faculty_days[fac['id']]:
+        return f"Faculty {fac['name']} not available on {day}"
+
+def _faculty_time(index, state, gene):
+    fac = index.faculty.get(gene.faculty_id)
+    if fac and gene.timeslot_id not in index.faculty_slots[fac['id']]:
+        day = index.timeslots[gene.timeslot_id]['day']
+        return f"Faculty {fac['name']} not available at {index.slot_times[gene.timeslot_id]} on {day}"
+
+def _faculty_subject(index, state, gene):
+    fac = index.faculty.get(gene.faculty_id)
+    allowed = index.faculty_subjects[fac['id']] if fac else None
+    if allowed is not None and gene.subject_id not in allowed:
+        return f"Faculty {fac['name']} not assigned to subject {gene.subject_id}"
+
+def _faculty_division(index, state, gene):
+    fac = index.faculty.get(gene.faculty_id)
+    allowed = index.faculty_divisions[fac['id']] if fac else None
+    if allowed is not None and gene.division_id not in allowed:
+        return f"Faculty {fac['name']} not assigned to division {gene.division_id}"
+
+def _faculty_clash(index, state, gene):
+    if (gene.faculty_id, gene.timeslot_id) in state.faculty_slots:
+        return f"CRITICAL: Faculty {gene.faculty_id} double-booked at slot {gene.timeslot_id}"
+
+def _room_clash(index, state, gene):
+    if (gene.room_id, gene.timeslot_id) in state.room_slots:
+        return f"CRITICAL: Room {gene.room_id} double-booked at slot {gene.timeslot_id}"
+
+def _division_clash(index, state, gene):
+    if (gene.division_id, gene.timeslot_id) in state.division_slots:
+        return f"CRITICAL: Division {gene.division_id} has conflicting classes at slot {gene.timeslot_id}"
+
+def _room_capacity(index, state, gene):
+    room = index.rooms.get(gene.room_id)
+    students = index.class_size(gene)
+    if room and students and room['capacity'] < students:
+        division = index.divisions.get(gene.division_id)
+        group = f"division {division['name']}" if division else f"subject {index.subjects[gene.subject_id]['name']}"
+        return f"Room {room['number']} (capacity {room['capacity']}) too small for {group} ({students} students)"
+
+def _room_type(index, state, gene):
+    # Only subjects that ask for a room type (models.py subjects) constrain it
+    room = index.rooms.get(gene.room_id)
+    subject = index.subjects.get(gene.subject_id)
+    wanted = subject.get('room_type') if subject else None
+    if room and wanted and room.get('type') != wanted:
+        return f"Room {room['number']} is a {room.get('type')} room, subject {subject['name']} needs a {wanted} room"
+
+def _room_fit(index, gene):
+    room = index.rooms.get(gene.room_id)
+    return room_fit_penalty(room['capacity'], index.class_size(gene)) if room else 0
+
+def _empty_seats(index, gene):
+    room = index.rooms.get(gene.room_id)
+    return empty_seats_penalty(room['capacity'], index.class_size(gene)) if room else 0
+
+def _subject_hours(index, state):
+    units = 0
+    messages = []
+    for division, subject in index.required:
+        actual_hours = state.hours.get((division['id'], subject['id']), 0)
+        required_hours = subject['hours_per_week']
+        if actual_hours != required_hours:
+            units += abs(actual_hours - required_hours)
+            messages.append(f"Subject {subject['name']} in {division['name']}: {actual_hours}/{required_hours} hours")
+    return units, messages
+
+def _faculty_workload(index, state):
+    # Hours beyond each faculty member's weekly maximum; only grows as classes are added,
+    # so the current total is also its own bound
+    units = 0
+    for faculty_id, hours in state.faculty_hours.items():
+        fac = index.faculty.get(faculty_id)
+        max_hours = fac.get('max_hours') if fac else None
+        if max_hours:
+            units += max(0, hours - max_hours)
+    return units, []
+
+def _faculty_workload_bound(index, state):
+    return _faculty_workload(index, state)[0]
+
+def _student_gaps(index, state):
+    return sum(day_gaps(mask) for mask in state.day_masks.values()), []
+
+def _student_gaps_bound(index, state):
+    # Each class still to be placed closes at most one gap of its division
+    gaps = {}
+    for (division_id, _), mask in state.day_masks.items():
+        gaps[division_id] = gaps.get(division_id, 0) + day_gaps(mask)
+    placed = {}
+    for (division_id, _), count in state.hours.items():
+        placed[division_id] = placed.get(division_id, 0) + count
+    return sum(max(0, count - (index.division_hours.get(division_id, 0) - placed.get(division_id, 0)))
+               for division_id, count in gaps.items())
+
+def _day_balance(index, state):
+    # A bonus (negative penalty) of up to 50 for spreading classes evenly across days
+    counts = state.day_counts
+    if not counts:
+        return 0, []
+    avg_classes_per_day = sum(counts.values()) / len(counts)
+    variance = sum((count - avg_classes_per_day) ** 2 for count in counts.values()) / len(counts)
+    return -max(0, 50 - variance), []
+
+def _day_balance_bound(index, state):
+    return -50
+
+register_constraint(Constraint('invalid_timeslot', 50, hard=True))
+register_constraint(Constraint('faculty_day', 100, hard=True, check=_faculty_day))
+register_constraint(Constraint('faculty_time', 100, hard=True, check=_faculty_time))
+register_constraint(Constraint('faculty_subject', 150, hard=True, check=_faculty_subject))
+register_constraint(Constraint('faculty_division', 150, hard=True, check=_faculty_division))
+register_constraint(Constraint('faculty_clash', 500, hard=True, check=_faculty_clash))
+register_constraint(Constraint('room_clash', 500, hard=True, check=_room_clash))
+register_constraint(Constraint('division_clash', 500, hard=True, check=_division_clash))
+register_constraint(Constraint('room_capacity', 30, hard=True, check=_room_capacity))
+register_constraint(Constraint('subject_hours', 20, total=_subject_hours))
+register_constraint(Constraint('student_gaps', 10, total=_student_gaps, bound=_student_gaps_bound,
+                               tracks=('day_masks',)))
+register_constraint(Constraint('day_balance', 1, total=_day_balance, bound=_day_balance_bound,
+                               tracks=('day_counts',)))
+register_constraint(Constraint('room_type', 30, hard=True, check=_room_type))
+register_constraint(Constraint('faculty_workload', 10, total=_faculty_workload, bound=_faculty_workload_bound,
+                               tracks=('faculty_hours',)))
+register_constraint(Constraint('room_fit', 5, cost=_room_fit))
+# Wasted capacity; off unless a request weights it
+register_constraint(Constraint('empty_seats', 0, cost=_empty_seats))
@@ -1,8 +1,103 @@
 import csv
 import json
+import sqlite3
 from typing import List, Dict, Optional
 from dataclasses import asdict
 from models import TimeSlot, Room, Faculty, Subject
+from availability import ensure_availability_column, load_availability
+from metrics import count_query
+
+DB_PATH = 'timetable.db'
+
+def get_db_connection(db_path: str = DB_PATH):
+    """Get SQLite database connection"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(count_query)
+    return conn
+
+def fetch_all_data(db_path: str = DB_PATH):
+    """Fetch all data from database"""
+    conn = get_db_connection(db_path)
+    ensure_availability_column(conn)
+    # Read every table inside one transaction so they all come from the same snapshot
+    conn.execute('BEGIN')
+    cursor = conn.cursor()
+    
+    # Fetch subjects
+    subjects = []
+    for row in cursor.execute('SELECT * FROM subjects'):
+        subjects.append(dict(row))
+    
+    # Fetch timeslots (faculty availability mask bits are their positions in id order)
+    timeslots = []
+    for row in cursor.execute('SELECT * FROM timeslots'):
+        timeslots.append(dict(row))
+    timeslots_by_id = {t['id']: t for t in timeslots}
+    
+    # Fetch faculty with availability
+    faculty = []
+    for row in cursor.execute('SELECT * FROM faculty').fetchall():
+        fac_id = row['id']
+        days, slots_by_day, slot_ids = load_availability(conn, row, timeslots_by_id)
+        
+        # Get subjects
+        subjects_ids = [s['subject_id'] for s in cursor.execute(
+            'SELECT subject_id FROM faculty_subjects WHERE faculty_id = ?', (fac_id,)
+        )]
+        
+        # Get divisions
+        division_ids = [d['division_id'] for d in cursor.execute(
+            'SELECT division_id FROM faculty_divisions WHERE faculty_id = ?', (fac_id,)
+        )]
+        
+        faculty.append({
+            'id': fac_id,
+            'name': row['name'],
+            'employee_id': row['employee_id'],
+            'department': row['department'],
+            'email': row['email'],
+            'max_hours': row['max_hours'],
+            'year': row['year'],
+            'available_days': days,
+            'available_time_slots': slots_by_day,
+            'available_slot_ids': slot_ids,
+            'subjects': subjects_ids,
+            'divisions': division_ids
+        })
+    
+    # Fetch rooms
+    rooms = []
+    for row in cursor.execute('SELECT * FROM rooms'):
+        rooms.append(dict(row))
+    
+    # Fetch divisions
+    divisions = []
+    for row in cursor.execute('SELECT * FROM divisions').fetchall():
+        div_id = row['id']
+        
+        # Get subjects for this division
+        div_subjects = [s['subject_id'] for s in cursor.execute(
+            'SELECT subject_id FROM division_subjects WHERE division_id = ?', (div_id,)
+        )]
+        
+        divisions.append({
+            'id': div_id,
+            'name': row['name'],
+            'year': row['year'],
+            'student_count': row['student_count'],
+            'subjects': div_subjects
+        })
+    
+    conn.close()
+    
+    return {
+        'subjects': subjects,
+        'faculty': faculty,
+        'rooms': rooms,
+        'timeslots': timeslots,
+        'divisions': divisions
+    }
 
 class DataHandler:
     def __init__(self):
@@ -52,6 +147,13 @@ class DataHandler:
         except Exception as e:
             print(f"❌ Error loading {entity_type}: {e}")
     
+    def import_csv_to_db(self, filepath: str, entity_type: str, db_path: str = DB_PATH,
+                         batch_size: int = 500) -> Dict:
+        """Stream a CSV file into the database in validated batches (see bulk_import)"""
+        from bulk_import import import_csv
+        with open(filepath, newline='', encoding='utf-8-sig') as stream:
+            return import_csv(stream, entity_type, db_path, batch_size)
+    
     def load_from_dict(self, data: List[Dict], entity_type: str):
         """Load data from dictionary with validation"""
         try:
@@ -0,0 +1,54 @@
+"""Per-table change counters for the timetable data, maintained by SQLite triggers
+
+Every INSERT, UPDATE or DELETE on a tracked table bumps its row in data_versions, so
+a read endpoint can tell whether its data changed with one small query instead of
+re-reading and hashing the tables. Writes from any code path (the API, bulk import,
+the sqlite3 shell) are counted.
+"""
+import hashlib
+import secrets
+import sqlite3
+from typing import Iterable
+
+TRACKED_TABLES = ('subjects', 'faculty', 'rooms', 'timeslots', 'divisions', 'faculty_availability',
+                  'faculty_timeslots', 'faculty_subjects', 'faculty_divisions', 'division_subjects')
+
+# Random per-database token, so counters of a recreated database never repeat old ETags
+EPOCH = '_epoch'
+
+# Databases whose triggers exist (checked once per process)
+_tracked_paths = set()
+
+def ensure_version_tracking(conn, db_path: str):
+    """Create the data_versions table and its triggers if this database lacks them"""
+    if db_path in _tracked_paths:
+        return
+    conn.execute('CREATE TABLE IF NOT EXISTS data_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+    conn.execute('INSERT OR IGNORE INTO data_versions VALUES (?, ?)', (EPOCH, secrets.randbits(62)))
+    conn.executemany('INSERT OR IGNORE INTO data_versions VALUES (?, 0)', [(table,) for table in TRACKED_TABLES])
+    for table in TRACKED_TABLES:
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation.lower()}_version
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+    conn.commit()
+    _tracked_paths.add(db_path)
+
+def data_etag(conn, db_path: str, tables: Iterable[str]) -> str:
+    """Opaque token that changes whenever any of tables changes"""
+    tables = sorted(tables)
+    placeholders = ', '.join('?' * (len(tables) + 1))
+    query = f'SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders}) ORDER BY table_name'
+    try:
+        ensure_version_tracking(conn, db_path)
+        rows = conn.execute(query, [EPOCH, *tables]).fetchall()
+    except sqlite3.OperationalError:
+        # The database was replaced since its triggers were created
+        _tracked_paths.discard(db_path)
+        ensure_version_tracking(conn, db_path)
+        rows = conn.execute(query, [EPOCH, *tables]).fetchall()
+    return hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()[:20]
@@ -1,75 +1,80 @@
-from models import Schedule, ScheduleEntry
-from typing import List
+from models import Schedule, ScheduleEntry, TimeSlot
+from constraints import CompiledConstraints, ProblemIndex, compile_constraints, validate_weights
+from genetic_algorithm import TimetableGene
+from typing import Dict, List, Optional
+
+def model_problem(time_slots, rooms=(), faculty=(), subjects=()) -> ProblemIndex:
+    """ProblemIndex over models.py objects, so the constraint registry checks and scores them
+
+    Models have no division records or teaching assignments: class sizes come from the
+    subject's student_count and faculty may teach any subject and division.
+    """
+    time_slots = list(time_slots)
+    days = {ts.id: ts.day for ts in time_slots}
+    return ProblemIndex(
+        [{'id': s.id, 'name': s.name, 'code': s.code, 'hours_per_week': s.hours_per_week,
+          'room_type': s.room_type, 'student_count': s.student_count} for s in subjects],
+        [{'id': f.id, 'name': f.name, 'max_hours': f.max_hours_per_week,
+          'available_slot_ids': list(f.available_slots),
+          'available_days': sorted({days[slot_id] for slot_id in f.available_slots if slot_id in days})}
+         for f in faculty],
+        [{'id': r.id, 'number': r.name, 'capacity': r.capacity, 'type': r.room_type} for r in rooms],
+        [{'id': ts.id, 'day': ts.day, 'start_time': ts.start_time, 'end_time': ts.end_time} for ts in time_slots],
+        [])
+
+# Weight names of the original FitnessEvaluator and the registry constraints they cover
+LEGACY_WEIGHTS = {
+    'hard_constraint': ('faculty_clash', 'room_clash'),
+    'room_utilization': ('room_fit',),
+}
+
+def registry_weights(weights: Optional[Dict]) -> Optional[Dict]:
+    """weights with legacy names replaced by their registry constraints; registry names
+    given explicitly take precedence"""
+    if not isinstance(weights, dict):
+        return weights
+    mapped = {name: weight for name, weight in weights.items() if name not in LEGACY_WEIGHTS}
+    for legacy, names in LEGACY_WEIGHTS.items():
+        if legacy in weights:
+            for name in names:
+                mapped.setdefault(name, weights[legacy])
+    return mapped
+
+def entry_gene(entry: ScheduleEntry) -> TimetableGene:
+    """The solver gene of a schedule entry"""
+    return TimetableGene(entry.division_id, entry.subject.id, entry.faculty.id, entry.room.id, entry.time_slot.id)
 
 class FitnessEvaluator:
-    def __init__(self, weights=None):
-        self.weights = weights or {
-            'hard_constraint': 1000,
-            'faculty_workload': 10,
-            'room_utilization': 5,
-            'student_gaps': 8
-        }
-    
+    """Scores a models.Schedule with the constraint registry, as the solvers score their genes
+
+    weights are per-constraint overrides of the registry defaults (see constraints.py);
+    the original hard_constraint and room_utilization keys are still accepted (LEGACY_WEIGHTS).
+    Scores start from constraints.BASE_SCORE (1000) and never drop below 0.
+    time_slots gives the period positions for student gaps; the schedule's own timeslots
+    are used when it is not given.
+    """
+
+    def __init__(self, weights: Optional[Dict] = None, time_slots: Optional[List[TimeSlot]] = None):
+        weights = registry_weights(weights)
+        error = validate_weights(weights)
+        if error:
+            raise ValueError(error)
+        self.weights = weights
+        self.time_slots = time_slots or []
+
+    def compile(self, schedule: Schedule) -> CompiledConstraints:
+        """The registry compiled over the timeslots, rooms, faculty and subjects of schedule"""
+        entries = schedule.entries
+        time_slots = {ts.id: ts for ts in self.time_slots}
+        for entry in entries:
+            time_slots.setdefault(entry.time_slot.id, entry.time_slot)
+        index = model_problem(time_slots.values(),
+                              {e.room.id: e.room for e in entries}.values(),
+                              {e.faculty.id: e.faculty for e in entries}.values(),
+                              {e.subject.id: e.subject for e in entries}.values())
+        return compile_constraints(index, self.weights)
+
     def evaluate(self, schedule: Schedule) -> float:
         """Calculate fitness score (higher is better)"""
-        score = 10000  # Start with perfect score
-        
-        # Hard constraints (conflicts)
-        score -= self._check_conflicts(schedule) * self.weights['hard_constraint']
-        
-        # Soft constraints
-        score -= self._check_faculty_workload_balance(schedule) * self.weights['faculty_workload']
-        score -= self._check_room_utilization(schedule) * self.weights['room_utilization']
-        score -= self._check_student_gaps(schedule) * self.weights['student_gaps']
-        
-        return max(0, score)
-    
-    def _check_conflicts(self, schedule: Schedule) -> int:
-        """Check for faculty, room, and time conflicts"""
-        conflicts = 0
-        entries = schedule.entries
-        
-        for i, entry1 in enumerate(entries):
-            for entry2 in entries[i+1:]:
-                if entry1.time_slot.id == entry2.time_slot.id:
-                    # Same time slot - check conflicts
-                    if entry1.faculty.id == entry2.faculty.id:
-                        conflicts += 1  # Faculty double-booked
-                    if entry1.room.id == entry2.room.id:
-                        conflicts += 1  # Room double-booked
-                        
-        return conflicts
-    
-    def _check_faculty_workload_balance(self, schedule: Schedule) -> int:
-        """Check if faculty workload is balanced"""
-        faculty_hours = {}
-        penalty = 0
-        
-        for entry in schedule.entries:
-            fid = entry.faculty.id
-            faculty_hours[fid] = faculty_hours.get(fid, 0) + 1
-            
-        # Penalize if exceeds max hours
-        for entry in schedule.entries:
-            fid = entry.faculty.id
-            if faculty_hours[fid] > entry.faculty.max_hours_per_week:
-                penalty += (faculty_hours[fid] - entry.faculty.max_hours_per_week)
-                
-        return penalty
-    
-    def _check_room_utilization(self, schedule: Schedule) -> int:
-        """Check room capacity vs student count"""
-        penalty = 0
-        
-        for entry in schedule.entries:
-            if entry.room.capacity < entry.subject.student_count:
-                penalty += (entry.subject.student_count - entry.room.capacity) // 10
-                
-        return penalty
-    
-    def _check_student_gaps(self, schedule: Schedule) -> int:
-        """Minimize gaps in student schedules (simplified)"""
-        # Group by day and sort by time
-        penalty = 0
-        # Simplified: penalize if classes are too spread out
-        return penalty
+        score, _ = self.compile(schedule).evaluate([entry_gene(entry) for entry in schedule.entries])
+        return score
@@ -0,0 +1,411 @@
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+from backtracking import BacktrackingSolver
+from cancellation import CancellationToken
+from constraint_handler import BranchAndBoundOptimizer
+from constraints import ProblemIndex, compile_constraints
+from data_handler import DB_PATH, fetch_all_data, get_db_connection
+from genetic_algorithm import GeneticAlgorithm, Timetable, TimetableGene
+from log import get_logger
+from profiling import Timings, profiled
+from result_cache import ResultCache, fingerprint_config, fingerprint_dataset, fingerprint_shape
+from saved_timetables import ensure_timetable_schema, load_schedule
+from schedule_format import index_by_id
+
+logger = get_logger('generation')
+
+# Receives one progress event dict per GA generation / backtracking step
+ProgressCallback = Callable[[Dict], None]
+
+# Branch and bound is exact but exponential in the number of classes, so larger
+# datasets are refused and runs without maxSeconds get a default budget
+BNB_MAX_CLASSES = int(os.environ.get('SCHEDULIFY_BNB_MAX_CLASSES', 40))
+BNB_MAX_SECONDS = float(os.environ.get('SCHEDULIFY_BNB_MAX_SECONDS', 30))
+
+def run_time_budget(params: Dict) -> Optional[float]:
+    """Seconds a run may take: maxSeconds, or the branch and bound default"""
+    if params.get('maxSeconds'):
+        return params['maxSeconds']
+    return BNB_MAX_SECONDS if params.get('algorithm') == 'branch_and_bound' else None
+
+def configure_algorithm(params: Dict) -> GeneticAlgorithm:
+    """Build a GeneticAlgorithm from request parameters"""
+    ga = GeneticAlgorithm(seed=params.get('seed'))
+    ga.population_size = params.get('populationSize', 50)
+    ga.generations = params.get('generations', 100)
+    ga.mutation_rate = params.get('mutationRate', 0.1)
+    ga.weights = params.get('weights')
+    ga.log_every = max(1, int(params.get('logEvery', ga.log_every)))
+    return ga
+
+def build_schedule(best_timetable, data: Dict) -> List[Dict]:
+    """Convert timetable genes to the schedule rows returned by the API"""
+    subjects = index_by_id(data['subjects'])
+    faculty_by_id = index_by_id(data['faculty'])
+    rooms = index_by_id(data['rooms'])
+    timeslots = index_by_id(data['timeslots'])
+    divisions = index_by_id(data['divisions'])
+
+    # Labels are formatted once per entity rather than once per class session
+    subject_labels = {sid: f"{s['code']} - {s['name']}" for sid, s in subjects.items()}
+    room_labels = {rid: f"{r['number']} ({r['building']})" for rid, r in rooms.items()}
+    slot_labels = {tid: f"{t['start_time']} - {t['end_time']}" for tid, t in timeslots.items()}
+
+    schedule = []
+    for gene in best_timetable.genes:
+        subject = subjects.get(gene.subject_id)
+        fac = faculty_by_id.get(gene.faculty_id)
+        room = rooms.get(gene.room_id)
+        slot = timeslots.get(gene.timeslot_id)
+        division = divisions.get(gene.division_id)
+
+        if subject and fac and room and slot and division:
+            schedule.append({
+                'division': division['name'],
+                'subject': subject_labels[subject['id']],
+                'subjectCode': subject['code'],
+                'subjectName': subject['name'],
+                'faculty': fac['name'],
+                'room': room_labels[room['id']],
+                'day': slot['day'],
+                'timeSlot': slot_labels[slot['id']],
+                'type': subject.get('type', 'theory'),
+                'divisionId': division['id'],
+                'subjectId': subject['id'],
+                'facultyId': fac['id'],
+                'roomId': room['id'],
+                'timeslotId': slot['id']
+            })
+    return schedule
+
+def _ga_progress(progress_callback: Optional[ProgressCallback]):
+    if not progress_callback:
+        return None
+
+    def on_generation(generation, total, best_fitness, stats):
+        progress_callback({
+            'type': 'generation',
+            'generation': generation + 1,
+            'total': total,
+            'best_fitness': round(stats['best_fitness'], 2),
+            'avg_fitness': round(stats['avg_fitness'], 2),
+            'conflicts': stats['conflicts'],
+            'progress': int((generation + 1) * 100 / total) if total else 100
+        })
+    return on_generation
+
+def _backtracking_progress(progress_callback: Optional[ProgressCallback]):
+    if not progress_callback:
+        return None
+
+    def on_progress(percent):
+        progress_callback({'type': 'backtracking', 'progress': percent})
+    return on_progress
+
+def run_backtracking(params: Dict, db_path: str = DB_PATH,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     cancel_token: Optional[CancellationToken] = None,
+                     timings: Optional[Timings] = None) -> Tuple[Dict, int, Optional[Timetable]]:
+    """Run the backtracking solver and return (response payload, HTTP status, timetable)"""
+    timings = timings or Timings()
+    solver = BacktrackingSolver(db_path, weights=params.get('weights'))
+    solver.timings = timings
+    max_iterations = params.get('maxIterations', 10000)
+    logger.info("🔧 Backtracking configured: max_iterations=%d", max_iterations)
+
+    try:
+        assignments, subjects, faculty_list, rooms, timeslots, divisions = solver.solve(
+            max_iterations=max_iterations,
+            progress_callback=_backtracking_progress(progress_callback),
+            cancel_token=cancel_token
+        )
+    except Exception as e:
+        logger.warning("❌ Backtracking failed: %s", e)
+        return {'success': False, 'error': str(e), 'conflicts': solver.conflicts}, 400, None
+
+    if not assignments:
+        return {
+            'success': False,
+            'error': f'Backtracking stopped ({solver.stopped_reason}) before any class was scheduled.',
+            'stopped_early': solver.stopped_reason
+        }, 400, None
+
+    data = {
+        'subjects': subjects,
+        'faculty': faculty_list,
+        'rooms': rooms,
+        'timeslots': timeslots,
+        'divisions': divisions
+    }
+    timetable = Timetable([TimetableGene(*assignment) for assignment in assignments])
+    with timings.phase('fitness'):
+        constraints = compile_constraints(ProblemIndex(subjects, faculty_list, rooms, timeslots, divisions),
+                                          params.get('weights'))
+        timetable.calculate_fitness(subjects, faculty_list, rooms, timeslots, divisions, constraints)
+    if progress_callback and not solver.stopped_reason:
+        progress_callback({'type': 'backtracking', 'progress': 100})
+
+    with timings.phase('serialization'):
+        schedule = build_schedule(timetable, data)
+    logger.info("📅 Generated %d class sessions", len(schedule))
+
+    return {
+        'success': True,
+        'fitness_score': round(timetable.fitness, 2),
+        'schedule': schedule,
+        'conflicts': timetable.conflicts,
+        'conflict_count': len(timetable.conflicts),
+        'algorithm': 'Backtracking',
+        'stopped_early': solver.stopped_reason,
+        'generation_stats': {
+            'assignments_tried': solver.assignments_tried,
+            'backtrack_count': solver.backtrack_count
+        }
+    }, 200, timetable
+
+def run_branch_and_bound(params: Dict, all_data: Dict,
+                         progress_callback: Optional[ProgressCallback] = None,
+                         cancel_token: Optional[CancellationToken] = None,
+                         timings: Optional[Timings] = None) -> Tuple[Dict, int, Optional[Timetable]]:
+    """Run the branch and bound optimizer and return (response payload, HTTP status, timetable)"""
+    timings = timings or Timings()
+    # Parent subjects only group their components, as in backtracking
+    subjects = [s for s in all_data['subjects'] if s.get('type') != 'parent']
+    index = ProblemIndex(subjects, all_data['faculty'], all_data['rooms'], all_data['timeslots'],
+                         all_data['divisions'])
+    optimizer = BranchAndBoundOptimizer(compile_constraints(index, params.get('weights')))
+    class_count = len(optimizer.classes())
+    if class_count > BNB_MAX_CLASSES:
+        return {
+            'success': False,
+            'error': f'Branch and bound is limited to {BNB_MAX_CLASSES} classes and this dataset has '
+                     f'{class_count}. Use the genetic algorithm or backtracking instead.'
+        }, 400, None
+
+    logger.info("🌳 Branch and bound over %d classes", class_count)
+    with timings.phase('search'):
+        genes = optimizer.optimize(cancel_token=cancel_token)
+    logger.info("🌳 Branch and bound explored %d nodes (optimal: %s)", optimizer.nodes, optimizer.proved_optimal)
+
+    if genes is None:
+        reason = (f'stopped ({optimizer.stopped_reason}) before a complete timetable was found'
+                  if optimizer.stopped_reason else 'found no timetable that meets every hard constraint')
+        return {'success': False, 'error': f'Branch and bound {reason}.',
+                'stopped_early': optimizer.stopped_reason}, 400, None
+
+    timetable = Timetable(genes)
+    with timings.phase('fitness'):
+        timetable.calculate_fitness(subjects, all_data['faculty'], all_data['rooms'], all_data['timeslots'],
+                                    all_data['divisions'], optimizer.constraints)
+    if progress_callback:
+        progress_callback({'type': 'branch_and_bound', 'progress': 100, 'nodes': optimizer.nodes})
+
+    with timings.phase('serialization'):
+        schedule = build_schedule(timetable, all_data)
+    logger.info("📅 Generated %d class sessions", len(schedule))
+
+    return {
+        'success': True,
+        'fitness_score': round(timetable.fitness, 2),
+        'schedule': schedule,
+        'conflicts': timetable.conflicts,
+        'conflict_count': len(timetable.conflicts),
+        'algorithm': 'Branch and Bound',
+        'stopped_early': optimizer.stopped_reason,
+        'generation_stats': {
+            'nodes_explored': optimizer.nodes,
+            'proved_optimal': optimizer.proved_optimal
+        }
+    }, 200, timetable
+
+def run_genetic(params: Dict, all_data: Dict,
+                progress_callback: Optional[ProgressCallback] = None,
+                cancel_token: Optional[CancellationToken] = None,
+                seed_genes: Optional[List[TimetableGene]] = None,
+                timings: Optional[Timings] = None) -> Tuple[Dict, int, Optional[Timetable]]:
+    """Run the genetic algorithm and return (response payload, HTTP status, timetable)"""
+    ga = configure_algorithm(params)
+    if timings:
+        ga.timings = timings
+    logger.info("🔧 Algorithm configured: pop=%d, gen=%d, mut=%s", ga.population_size, ga.generations,
+                ga.mutation_rate)
+
+    subjects = all_data['subjects']
+    faculty_list = all_data['faculty']
+    rooms = all_data['rooms']
+    timeslots = all_data['timeslots']
+    divisions = all_data['divisions']
+
+    logger.info("📊 Data loaded: %d subjects, %d faculty, %d rooms, %d timeslots, %d divisions",
+                len(subjects), len(faculty_list), len(rooms), len(timeslots), len(divisions))
+
+    # Run genetic algorithm
+    logger.info("🔄 Starting genetic algorithm evolution...")
+    best_timetable, history = ga.evolve(subjects, faculty_list, rooms, timeslots, divisions,
+                                        progress_callback=_ga_progress(progress_callback),
+                                        cancel_token=cancel_token,
+                                        seed_genes=seed_genes)
+
+    if not best_timetable or not best_timetable.genes:
+        logger.warning("❌ Timetable generation failed: %s", getattr(best_timetable, 'conflicts', []))
+        return {
+            'success': False,
+            'error': 'Failed to generate valid timetable. Try increasing population size or generations.',
+            'conflicts': getattr(best_timetable, 'conflicts', [])
+        }, 400, None
+
+    logger.info("✅ Evolution complete! Best fitness: %.2f, genes: %d, conflicts: %d",
+                best_timetable.fitness, len(best_timetable.genes), len(best_timetable.conflicts))
+
+    # Reject if too many conflicts
+    if len(best_timetable.conflicts) > 10:
+        return {
+            'success': False,
+            'error': f'Generated timetable has {len(best_timetable.conflicts)} conflicts. Please review your data or increase generations.',
+            'conflicts': best_timetable.conflicts,
+            'fitness_score': round(best_timetable.fitness, 2),
+            'stopped_early': ga.stopped_reason
+        }, 400, None
+
+    # Convert to schedule format
+    with ga.timings.phase('serialization'):
+        schedule = build_schedule(best_timetable, all_data)
+
+    logger.info("📅 Generated %d class sessions", len(schedule))
+
+    return {
+        'success': True,
+        'fitness_score': round(best_timetable.fitness, 2),
+        'schedule': schedule,
+        'conflicts': best_timetable.conflicts,
+        'conflict_count': len(best_timetable.conflicts),
+        'algorithm': 'Genetic Algorithm',
+        'stopped_early': ga.stopped_reason,
+        'warm_started': bool(seed_genes),
+        'generation_stats': {
+            'population_size': ga.population_size,
+            'generations': ga.generations,
+            'generations_completed': len(history),
+            'mutation_rate': ga.mutation_rate
+        }
+    }, 200, best_timetable
+
+def run_summary(params: Dict, payload: Dict) -> Dict:
+    """Small picklable digest of a finished run for the server's timing stats and metrics"""
+    algorithm = params.get('algorithm') if params.get('algorithm') in ('backtracking', 'branch_and_bound') else 'genetic'
+    timings = payload.get('timings')
+    generations = None
+    if algorithm == 'genetic' and timings and not payload.get('cached'):
+        # The GA times its fitness phase once per generation, also on failed runs
+        generations = timings['phases'].get('fitness', {}).get('calls')
+    return {
+        'algorithm': algorithm,
+        'success': bool(payload.get('success')),
+        'cached': bool(payload.get('cached')),
+        'stopped_early': payload.get('stopped_early'),
+        'cache_used': params.get('useCache', True) and not params.get('profile'),
+        'generations_completed': generations,
+        'timings': timings
+    }
+
+def _genes_to_rows(timetable: Timetable) -> List[List[int]]:
+    return [[g.division_id, g.subject_id, g.faculty_id, g.room_id, g.timeslot_id]
+            for g in timetable.genes]
+
+def saved_schedule_to_genes(schedule: List[Dict], all_data: Dict) -> List[TimetableGene]:
+    """Map rows of a saved timetable back to genes
+    
+    Rows saved with entity ids use them directly; older rows that only carry display
+    names are matched by division name, subject code, faculty name, room label and
+    day/time. Rows that cannot be matched are skipped.
+    """
+    division_ids = {d['name']: d['id'] for d in all_data['divisions']}
+    subject_ids = {s['code']: s['id'] for s in all_data['subjects']}
+    faculty_ids = {f['name']: f['id'] for f in all_data['faculty']}
+    room_ids = {f"{r['number']} ({r['building']})": r['id'] for r in all_data['rooms']}
+    slot_ids = {(t['day'], f"{t['start_time']} - {t['end_time']}"): t['id'] for t in all_data['timeslots']}
+
+    genes = []
+    for row in schedule:
+        ids = (
+            row.get('divisionId') or division_ids.get(row.get('division')),
+            row.get('subjectId') or subject_ids.get(row.get('subjectCode')),
+            row.get('facultyId') or faculty_ids.get(row.get('faculty')),
+            row.get('roomId') or room_ids.get(row.get('room')),
+            row.get('timeslotId') or slot_ids.get((row.get('day'), row.get('timeSlot')))
+        )
+        if all(value is not None for value in ids):
+            genes.append(TimetableGene(*ids))
+    return genes
+
+def load_saved_schedule(timetable_id: int, db_path: str = DB_PATH) -> Optional[List[Dict]]:
+    """Schedule rows of a timetable from user_timetables, or None if it does not exist"""
+    conn = get_db_connection(db_path)
+    ensure_timetable_schema(conn)
+    schedule = load_schedule(conn, timetable_id)
+    conn.close()
+    return schedule
+
+def run_generation(params: Dict, db_path: str = DB_PATH,
+                   progress_callback: Optional[ProgressCallback] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> Tuple[Dict, int]:
+    """Run the requested algorithm and return (response payload, HTTP status)
+    
+    ``maxSeconds`` in params bounds the run; the best result found so far is returned
+    when it expires. Callers that need external cancellation pass their own token.
+    Finished results are memoized by dataset fingerprint and solver config unless
+    ``useCache`` is false; a miss warm-starts the GA from the saved timetable named by
+    ``warmStartTimetableId`` or else, for unseeded runs, the newest cached result with the
+    same config on a dataset with the same entity ids.
+    The payload carries a per-phase ``timings`` breakdown; ``profile`` true also runs
+    the solver under cProfile (bypassing cached results) and adds its hottest functions.
+    """
+    logger.info("📊 Request data: %s", params)
+    timings = Timings()
+    profile = bool(params.get('profile'))
+
+    if cancel_token is None:
+        cancel_token = CancellationToken(run_time_budget(params))
+
+    # Get data from database
+    logger.debug("📂 Fetching data from database...")
+    with timings.phase('data_load'):
+        all_data = fetch_all_data(db_path)
+
+    cache = ResultCache(db_path) if params.get('useCache', True) else None
+    with timings.phase('cache'):
+        data_hash = fingerprint_dataset(all_data)
+        shape_hash = fingerprint_shape(all_data)
+        config_hash = fingerprint_config(params)
+        cached = cache.get(ResultCache.make_key(data_hash, config_hash)) if cache and not profile else None
+    warm_start_id = params.get('warmStartTimetableId')
+    if cached:
+        logger.info("⚡ Returning cached result for dataset %s", data_hash[:12])
+        return dict(cached, cached=True, timings=timings.as_dict()), 200
+
+    extras = {}
+    with profiled(profile, extras):
+        if params.get('algorithm') == 'backtracking':
+            payload, status, timetable = run_backtracking(params, db_path, progress_callback, cancel_token,
+                                                          timings)
+        elif params.get('algorithm') == 'branch_and_bound':
+            payload, status, timetable = run_branch_and_bound(params, all_data, progress_callback, cancel_token,
+                                                              timings)
+        else:
+            seed_genes = None
+            if warm_start_id:
+                saved = load_saved_schedule(warm_start_id, db_path)
+                seed_genes = saved_schedule_to_genes(saved, all_data) if saved else None
+                logger.info("♻️  Warm start from saved timetable %s: %d genes matched", warm_start_id,
+                            len(seed_genes or []))
+            elif cache and params.get('seed') is None:
+                # A seeded run must not depend on what happens to be in the cache
+                warm_rows = cache.warm_start_genes(config_hash, shape_hash)
+                seed_genes = [TimetableGene(*row) for row in warm_rows] if warm_rows else None
+            payload, status, timetable = run_genetic(params, all_data, progress_callback,
+                                                     cancel_token, seed_genes, timings)
+
+    if cache and status == 200 and not payload.get('stopped_early'):
+        with timings.phase('cache'):
+            cache.put(data_hash, config_hash, payload, _genes_to_rows(timetable), shape_hash)
+    return dict(payload, cached=False, timings=timings.as_dict(), **extras), status
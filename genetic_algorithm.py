@@ -1,9 +1,19 @@
 import random
 import copy
+import logging
+import time
 from typing import List, Dict, Tuple
+from availability import faculty_slot_ids
+from constraints import ProblemIndex, compile_constraints
+from log import LOG_EVERY, get_logger
+from profiling import Timings
+
+logger = get_logger('genetic_algorithm')
 
 class TimetableGene:
     """Represents a single class assignment"""
+    __slots__ = ('division_id', 'subject_id', 'faculty_id', 'room_id', 'timeslot_id')
+    
     def __init__(self, division_id, subject_id, faculty_id, room_id, timeslot_id):
         self.division_id = division_id
         self.subject_id = subject_id
@@ -13,129 +23,62 @@ class TimetableGene:
 
 class Timetable:
     """Represents a complete timetable (chromosome)"""
+    __slots__ = ('genes', 'fitness', 'conflicts')
+    
     def __init__(self, genes: List[TimetableGene] = None):
         self.genes = genes or []
         self.fitness = 0
         self.conflicts = []
     
-    def calculate_fitness(self, subjects, faculty, rooms, timeslots, divisions):
-        """Calculate fitness score (higher is better)"""
-        score = 1000
-        self.conflicts = []
+    def calculate_fitness(self, subjects, faculty, rooms, timeslots, divisions, constraints=None):
+        """Calculate fitness score (higher is better)
         
-        # Track usage for conflict detection
-        faculty_usage = {}  # {faculty_id: {timeslot_id: True}}
-        room_usage = {}     # {room_id: {timeslot_id: True}}
-        division_usage = {} # {division_id: {timeslot_id: True}}
-        
-        # Track hours assigned per subject per division
-        subject_hours = {}  # {(division_id, subject_id): count}
-        
-        for gene in self.genes:
-            slot = next((t for t in timeslots if t['id'] == gene.timeslot_id), None)
-            if not slot:
-                score -= 50
-                self.conflicts.append(f"Invalid timeslot ID {gene.timeslot_id}")
-                continue
-            
-            slot_day = slot['day']
-            slot_time = f"{slot['start_time']}-{slot['end_time']}"
-            
-            # Track subject hours
-            key = (gene.division_id, gene.subject_id)
-            subject_hours[key] = subject_hours.get(key, 0) + 1
-            
-            # Check faculty availability (CRITICAL)
-            fac = next((f for f in faculty if f['id'] == gene.faculty_id), None)
-            if fac:
-                # Hard constraint: Faculty must be available on this day
-                if slot_day not in fac.get('available_days', []):
-                    score -= 100  # Increased penalty
-                    self.conflicts.append(f"Faculty {fac['name']} not available on {slot_day}")
-                
-                # Hard constraint: Faculty must be available at this time
-                day_slots = fac.get('available_time_slots', {}).get(slot_day, [])
-                if slot_time not in day_slots:
-                    score -= 100  # Increased penalty
-                    self.conflicts.append(f"Faculty {fac['name']} not available at {slot_time} on {slot_day}")
-                
-                # Hard constraint: Faculty can only teach assigned subjects
-                if gene.subject_id not in fac.get('subjects', []):
-                    score -= 150  # Very high penalty
-                    self.conflicts.append(f"Faculty {fac['name']} not assigned to subject {gene.subject_id}")
-                
-                # Hard constraint: Faculty can only teach assigned divisions
-                if gene.division_id not in fac.get('divisions', []):
-                    score -= 150  # Very high penalty
-                    self.conflicts.append(f"Faculty {fac['name']} not assigned to division {gene.division_id}")
-            
-            # Check faculty double booking (CRITICAL - should never happen)
-            if gene.faculty_id not in faculty_usage:
-                faculty_usage[gene.faculty_id] = {}
-            if gene.timeslot_id in faculty_usage[gene.faculty_id]:
-                score -= 500  # Extremely high penalty
-                self.conflicts.append(f"CRITICAL: Faculty {gene.faculty_id} double-booked at slot {gene.timeslot_id}")
-            faculty_usage[gene.faculty_id][gene.timeslot_id] = True
-            
-            # Check room double booking (CRITICAL)
-            if gene.room_id not in room_usage:
-                room_usage[gene.room_id] = {}
-            if gene.timeslot_id in room_usage[gene.room_id]:
-                score -= 500  # Extremely high penalty
-                self.conflicts.append(f"CRITICAL: Room {gene.room_id} double-booked at slot {gene.timeslot_id}")
-            room_usage[gene.room_id][gene.timeslot_id] = True
-            
-            # Check division double booking (CRITICAL)
-            if gene.division_id not in division_usage:
-                division_usage[gene.division_id] = {}
-            if gene.timeslot_id in division_usage[gene.division_id]:
-                score -= 500  # Extremely high penalty
-                self.conflicts.append(f"CRITICAL: Division {gene.division_id} has conflicting classes at slot {gene.timeslot_id}")
-            division_usage[gene.division_id][gene.timeslot_id] = True
-            
-            # Check room capacity
-            room = next((r for r in rooms if r['id'] == gene.room_id), None)
-            division = next((d for d in divisions if d['id'] == gene.division_id), None)
-            if room and division:
-                if room['capacity'] < division['student_count']:
-                    score -= 30
-                    self.conflicts.append(f"Room {room['number']} (capacity {room['capacity']}) too small for division {division['name']} ({division['student_count']} students)")
-        
-        # Check subject hour requirements
-        for division in divisions:
-            div_subjects = [s for s in subjects if s['id'] in division['subjects']]
-            for subject in div_subjects:
-                key = (division['id'], subject['id'])
-                actual_hours = subject_hours.get(key, 0)
-                required_hours = subject['hours_per_week']
-                
-                if actual_hours != required_hours:
-                    diff = abs(actual_hours - required_hours)
-                    score -= diff * 20
-                    self.conflicts.append(f"Subject {subject['name']} in {division['name']}: {actual_hours}/{required_hours} hours")
-        
-        # Bonus for even distribution of classes across days
-        day_distribution = {}
-        for gene in self.genes:
-            slot = next((t for t in timeslots if t['id'] == gene.timeslot_id), None)
-            if slot:
-                day_distribution[slot['day']] = day_distribution.get(slot['day'], 0) + 1
-        
-        if day_distribution:
-            avg_classes_per_day = sum(day_distribution.values()) / len(day_distribution)
-            variance = sum((count - avg_classes_per_day) ** 2 for count in day_distribution.values()) / len(day_distribution)
-            score += max(0, 50 - variance)
-        
-        self.fitness = max(0, score)
+        constraints is a CompiledConstraints for this data; compile it once per run and
+        pass it in, otherwise the default-weight registry is compiled on every call.
+        """
+        if constraints is None:
+            constraints = compile_constraints(ProblemIndex(subjects, faculty, rooms, timeslots, divisions))
+        self.fitness, self.conflicts = constraints.evaluate(self.genes)
         return self.fitness
 
 class GeneticAlgorithm:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # Private RNG so a seeded run is reproducible regardless of other random users
+        self.rng = random.Random(seed)
         self.population_size = 50
         self.generations = 100
         self.mutation_rate = 0.15
         self.crossover_rate = 0.8
         self.elitism_rate = 0.1
+        # Per-run constraint weight overrides (see constraints.CONSTRAINTS)
+        self.weights = None
+        self.stopped_reason = None
+        # Faculty id -> available timeslots, built on first use
+        self._available_slots = {}
+        # Per-phase wall time of evolve (init_population, fitness, selection, ...)
+        self.timings = Timings()
+        # Generations between INFO progress lines; the rest are logged at DEBUG
+        self.log_every = LOG_EVERY
+    
+    def compile_constraints(self, subjects, faculty, rooms, timeslots, divisions):
+        """Compile the constraint registry with this run's weights"""
+        return compile_constraints(ProblemIndex(subjects, faculty, rooms, timeslots, divisions), self.weights)
+    
+    def eligible_faculty(self, subject_id, division_id, faculty) -> List[Dict]:
+        """Faculty who can teach this subject to this division"""
+        return [
+            f for f in faculty 
+            if subject_id in f.get('subjects', []) 
+            and division_id in f.get('divisions', [])
+        ]
+    
+    def available_slots(self, fac, timeslots) -> List[Dict]:
+        """Timeslots where the faculty member is available, resolved once per faculty"""
+        available = self._available_slots.get(fac['id'])
+        if available is None:
+            slot_ids = faculty_slot_ids(fac, timeslots)
+            available = self._available_slots[fac['id']] = [t for t in timeslots if t['id'] in slot_ids]
+        return available
     
     def create_random_timetable(self, subjects, faculty, rooms, timeslots, divisions) -> Timetable:
         """Create a random but valid timetable"""
@@ -148,11 +91,7 @@ class GeneticAlgorithm:
             # For each subject assigned to this division
             for subject in division_subjects:
                 # Get faculty who can teach this subject to this division
-                eligible_faculty = [
-                    f for f in faculty 
-                    if subject['id'] in f.get('subjects', []) 
-                    and division['id'] in f.get('divisions', [])
-                ]
+                eligible_faculty = self.eligible_faculty(subject['id'], division['id'], faculty)
                 if not eligible_faculty:
                     # Track missing assignment for diagnostics
                     missing_assignments.append(
@@ -163,24 +102,14 @@ class GeneticAlgorithm:
                 hours_needed = subject['hours_per_week']
                 for _ in range(hours_needed):
                     # Pick a random eligible faculty
-                    selected_faculty = random.choice(eligible_faculty)
+                    selected_faculty = self.rng.choice(eligible_faculty)
                     
                     # Pick a timeslot where faculty is available
-                    available_slots = []
-                    for timeslot in timeslots:
-                        slot_day = timeslot['day']
-                        slot_time = f"{timeslot['start_time']}-{timeslot['end_time']}"
-                        
-                        if (slot_day in selected_faculty.get('available_days', []) and
-                            slot_time in selected_faculty.get('available_time_slots', {}).get(slot_day, [])):
-                            available_slots.append(timeslot)
+                    # Fallback: use any timeslot
+                    available_slots = self.available_slots(selected_faculty, timeslots) or timeslots
                     
-                    if not available_slots:
-                        # Fallback: use any timeslot
-                        available_slots = timeslots
-                    
-                    selected_timeslot = random.choice(available_slots)
-                    selected_room = random.choice(rooms)
+                    selected_timeslot = self.rng.choice(available_slots)
+                    selected_room = self.rng.choice(rooms)
                     
                     gene = TimetableGene(
                         division['id'],
@@ -194,28 +123,126 @@ class GeneticAlgorithm:
         timetable.conflicts.extend(missing_assignments)
         return timetable
     
-    def initialize_population(self, subjects, faculty, rooms, timeslots, divisions) -> List[Timetable]:
-        """Create initial population"""
+    def repair_genes(self, genes: List[TimetableGene], subjects, faculty, rooms, timeslots,
+                     divisions, constraints=None) -> List[TimetableGene]:
+        """Adapt genes from an earlier timetable to the current data
+        
+        Genes that are still valid are kept unchanged. Genes whose division or subject is
+        gone are dropped; a faculty member who may no longer teach the class is swapped
+        for an eligible one; a deleted room is replaced; a slot the faculty is no longer
+        available in is moved to a free available slot. Surplus hours are dropped and
+        missing hours (e.g. a new subject) are filled with random genes. A gene counts as
+        valid when it breaks none of the enabled hard constraints.
+        """
+        if constraints is None:
+            constraints = self.compile_constraints(subjects, faculty, rooms, timeslots, divisions)
+        subject_by_id = {s['id']: s for s in subjects}
+        faculty_by_id = {f['id']: f for f in faculty}
+        division_by_id = {d['id']: d for d in divisions}
+        room_ids = {r['id'] for r in rooms}
+        
+        repaired = []
+        hours = {}  # {(division_id, subject_id): count}
+        state = constraints.new_state()  # the genes kept so far
+        moved = []
+        
+        for gene in genes:
+            division = division_by_id.get(gene.division_id)
+            subject = subject_by_id.get(gene.subject_id)
+            if not division or not subject or subject['id'] not in division['subjects']:
+                continue
+            key = (division['id'], subject['id'])
+            if hours.get(key, 0) >= subject['hours_per_week']:
+                continue
+            eligible = self.eligible_faculty(subject['id'], division['id'], faculty)
+            if not eligible:
+                continue
+            
+            gene = TimetableGene(gene.division_id, gene.subject_id, gene.faculty_id,
+                                 gene.room_id, gene.timeslot_id)
+            fac = faculty_by_id.get(gene.faculty_id)
+            if fac not in eligible:
+                fac = self.rng.choice(eligible)
+                gene.faculty_id = fac['id']
+            if gene.room_id not in room_ids:
+                gene.room_id = self.rng.choice(rooms)['id']
+            
+            hours[key] = hours.get(key, 0) + 1
+            repaired.append(gene)
+            if constraints.is_valid(state, gene):
+                state.add(gene)
+            else:
+                moved.append((gene, fac))
+        
+        # Re-slot affected genes after the unaffected ones have claimed their slots,
+        # keeping the room when possible
+        for gene, fac in moved:
+            available = self.available_slots(fac, timeslots) or timeslots
+            free = [(t['id'], r['id']) for t in available for r in rooms
+                    if constraints.is_valid(state, TimetableGene(gene.division_id, gene.subject_id,
+                                                                 gene.faculty_id, r['id'], t['id']))]
+            same_room = [(slot_id, room_id) for slot_id, room_id in free if room_id == gene.room_id]
+            if free:
+                gene.timeslot_id, gene.room_id = self.rng.choice(same_room or free)
+            else:
+                gene.timeslot_id = self.rng.choice(available)['id']
+            state.add(gene)
+        
+        # Fill hours the old timetable did not cover
+        for division in divisions:
+            for subject in [s for s in subjects if s['id'] in division['subjects']]:
+                eligible = self.eligible_faculty(subject['id'], division['id'], faculty)
+                missing = subject['hours_per_week'] - hours.get((division['id'], subject['id']), 0)
+                for _ in range(missing if eligible else 0):
+                    fac = self.rng.choice(eligible)
+                    slot = self.rng.choice(self.available_slots(fac, timeslots) or timeslots)
+                    repaired.append(TimetableGene(division['id'], subject['id'], fac['id'],
+                                                  self.rng.choice(rooms)['id'], slot['id']))
+        
+        return repaired
+    
+    def initialize_population(self, subjects, faculty, rooms, timeslots, divisions,
+                              seed_genes: List[TimetableGene] = None, constraints=None) -> List[Timetable]:
+        """Create initial population
+        
+        With seed_genes (a previous best timetable) the population starts from that
+        timetable plus mutated copies of it for half the slots; the rest stay random
+        to keep diversity.
+        """
         population = []
-        for _ in range(self.population_size):
+        if constraints is None:
+            constraints = self.compile_constraints(subjects, faculty, rooms, timeslots, divisions)
+        if seed_genes:
+            seed_genes = self.repair_genes(seed_genes, subjects, faculty, rooms, timeslots, divisions,
+                                           constraints)
+        if seed_genes:
+            population.append(Timetable(copy.deepcopy(seed_genes)))
+            while len(population) < self.population_size // 2:
+                variant = Timetable(copy.deepcopy(seed_genes))
+                self.mutate(variant, subjects, faculty, rooms, timeslots, divisions)
+                population.append(variant)
+            for timetable in population:
+                timetable.calculate_fitness(subjects, faculty, rooms, timeslots, divisions, constraints)
+        
+        while len(population) < self.population_size:
             timetable = self.create_random_timetable(subjects, faculty, rooms, timeslots, divisions)
-            timetable.calculate_fitness(subjects, faculty, rooms, timeslots, divisions)
+            timetable.calculate_fitness(subjects, faculty, rooms, timeslots, divisions, constraints)
             population.append(timetable)
         return population
     
     def selection(self, population: List[Timetable]) -> Tuple[Timetable, Timetable]:
         """Tournament selection"""
         tournament_size = 5
-        tournament = random.sample(population, min(tournament_size, len(population)))
+        tournament = self.rng.sample(population, min(tournament_size, len(population)))
         tournament.sort(key=lambda x: x.fitness, reverse=True)
         return tournament[0], tournament[1] if len(tournament) > 1 else tournament[0]
     
     def crossover(self, parent1: Timetable, parent2: Timetable) -> Tuple[Timetable, Timetable]:
         """Single point crossover"""
-        if random.random() > self.crossover_rate or len(parent1.genes) < 2:
+        if self.rng.random() > self.crossover_rate or len(parent1.genes) < 2:
             return copy.deepcopy(parent1), copy.deepcopy(parent2)
         
-        point = random.randint(1, len(parent1.genes) - 1)
+        point = self.rng.randint(1, len(parent1.genes) - 1)
         
         child1_genes = copy.deepcopy(parent1.genes[:point] + parent2.genes[point:])
         child2_genes = copy.deepcopy(parent2.genes[:point] + parent1.genes[point:])
@@ -225,47 +252,50 @@ class GeneticAlgorithm:
     def mutate(self, timetable: Timetable, subjects, faculty, rooms, timeslots, divisions):
         """Intelligent mutation"""
         for i, gene in enumerate(timetable.genes):
-            if random.random() < self.mutation_rate:
-                mutation_type = random.choice(['faculty', 'room', 'timeslot'])
+            if self.rng.random() < self.mutation_rate:
+                mutation_type = self.rng.choice(['faculty', 'room', 'timeslot'])
                 
                 if mutation_type == 'faculty':
                     # Only pick faculty who can teach this subject to this division
-                    eligible = [
-                        f for f in faculty 
-                        if gene.subject_id in f.get('subjects', [])
-                        and gene.division_id in f.get('divisions', [])
-                    ]
+                    eligible = self.eligible_faculty(gene.subject_id, gene.division_id, faculty)
                     if eligible:
-                        gene.faculty_id = random.choice(eligible)['id']
+                        gene.faculty_id = self.rng.choice(eligible)['id']
                 
                 elif mutation_type == 'room':
-                    gene.room_id = random.choice(rooms)['id']
+                    gene.room_id = self.rng.choice(rooms)['id']
                 
                 else:  # timeslot
                     # Try to pick a timeslot where faculty is available
                     fac = next((f for f in faculty if f['id'] == gene.faculty_id), None)
                     if fac:
-                        available_slots = []
-                        for ts in timeslots:
-                            slot_day = ts['day']
-                            slot_time = f"{ts['start_time']}-{ts['end_time']}"
-                            if (slot_day in fac.get('available_days', []) and
-                                slot_time in fac.get('available_time_slots', {}).get(slot_day, [])):
-                                available_slots.append(ts)
+                        available_slots = self.available_slots(fac, timeslots)
                         
                         if available_slots:
-                            gene.timeslot_id = random.choice(available_slots)['id']
+                            gene.timeslot_id = self.rng.choice(available_slots)['id']
                         else:
-                            gene.timeslot_id = random.choice(timeslots)['id']
+                            gene.timeslot_id = self.rng.choice(timeslots)['id']
     
-    def evolve(self, subjects, faculty, rooms, timeslots, divisions, progress_callback=None):
-        """Main GA evolution"""
+    def evolve(self, subjects, faculty, rooms, timeslots, divisions, progress_callback=None,
+               cancel_token=None, seed_genes=None):
+        """Main GA evolution
+        
+        If cancel_token asks to stop (cancelled or out of time), evolution ends after the
+        current generation and the best timetable found so far is returned.
+        seed_genes warm-starts the population from a previous timetable.
+        """
         
         if not subjects or not faculty or not rooms or not timeslots or not divisions:
             raise Exception("Insufficient data to generate timetable")
         
+        self.stopped_reason = None
+        self._available_slots = {}
+        constraints = self.compile_constraints(subjects, faculty, rooms, timeslots, divisions)
+        
         # Initialize population
-        population = self.initialize_population(subjects, faculty, rooms, timeslots, divisions)
+        timings = self.timings
+        with timings.phase('init_population'):
+            population = self.initialize_population(subjects, faculty, rooms, timeslots, divisions,
+                                                    seed_genes=seed_genes, constraints=constraints)
         
         best_timetable = None
         best_fitness = -float('inf')
@@ -273,16 +303,18 @@ class GeneticAlgorithm:
         
         for generation in range(self.generations):
             # Evaluate fitness
-            for timetable in population:
-                timetable.calculate_fitness(subjects, faculty, rooms, timeslots, divisions)
-            
-            # Sort by fitness
-            population.sort(key=lambda x: x.fitness, reverse=True)
+            with timings.phase('fitness'):
+                for timetable in population:
+                    timetable.calculate_fitness(subjects, faculty, rooms, timeslots, divisions, constraints)
+                
+                # Sort by fitness
+                population.sort(key=lambda x: x.fitness, reverse=True)
             
             # Track best
             if population[0].fitness > best_fitness:
                 best_fitness = population[0].fitness
-                best_timetable = copy.deepcopy(population[0])
+                with timings.phase('deepcopy'):
+                    best_timetable = copy.deepcopy(population[0])
             
             generation_history.append({
                 'generation': generation,
@@ -291,27 +323,48 @@ class GeneticAlgorithm:
                 'conflicts': len(population[0].conflicts)
             })
             
-            print(f"Gen {generation}: Best={population[0].fitness:.1f}, Avg={generation_history[-1]['avg_fitness']:.1f}, Conflicts={generation_history[-1]['conflicts']}")
+            stats = generation_history[-1]
+            level = logging.INFO if (generation % self.log_every == 0 or generation == self.generations - 1) else logging.DEBUG
+            if logger.isEnabledFor(level):
+                logger.log(level, "Gen %d: Best=%.1f, Avg=%.1f, Conflicts=%d", generation, stats['best_fitness'],
+                           stats['avg_fitness'], stats['conflicts'], extra={'generation': generation})
             
             if progress_callback:
-                progress_callback(generation, self.generations, best_fitness)
+                progress_callback(generation, self.generations, best_fitness, generation_history[-1])
+            
+            if cancel_token:
+                self.stopped_reason = cancel_token.stop_reason()
+                if self.stopped_reason:
+                    logger.info("⏹️  Evolution stopped after generation %d (%s)", generation, self.stopped_reason)
+                    break
             
             # Create next generation
             new_population = []
             
             # Elitism
             elite_count = max(1, int(self.population_size * self.elitism_rate))
-            new_population.extend([copy.deepcopy(t) for t in population[:elite_count]])
+            with timings.phase('deepcopy'):
+                new_population.extend([copy.deepcopy(t) for t in population[:elite_count]])
             
-            # Generate offspring
+            # Generate offspring, timing each step without a context manager per child
+            selection_time = crossover_time = mutation_time = 0.0
             while len(new_population) < self.population_size:
+                started = time.perf_counter()
                 parent1, parent2 = self.selection(population)
+                selected = time.perf_counter()
                 child1, child2 = self.crossover(parent1, parent2)
+                crossed = time.perf_counter()
                 
                 self.mutate(child1, subjects, faculty, rooms, timeslots, divisions)
                 self.mutate(child2, subjects, faculty, rooms, timeslots, divisions)
                 
+                selection_time += selected - started
+                crossover_time += crossed - selected
+                mutation_time += time.perf_counter() - crossed
                 new_population.extend([child1, child2])
+            timings.add('selection', selection_time)
+            timings.add('crossover', crossover_time)
+            timings.add('mutation', mutation_time)
             
             population = new_population[:self.population_size]
         
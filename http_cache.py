@@ -0,0 +1,69 @@
+"""Response compression and cache headers applied to every Flask response
+
+    SCHEDULIFY_COMPRESS_MIN_BYTES   smallest body worth compressing (default 1024)
+    SCHEDULIFY_STATIC_MAX_AGE       max-age in seconds for unversioned static assets (default 3600)
+
+Brotli is used when the optional `brotli` package is installed and the client accepts
+it, gzip otherwise. Static assets requested with a ?v= version query are cached for a
+year as immutable; HTML pages are always revalidated.
+"""
+import gzip
+import os
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get('SCHEDULIFY_COMPRESS_MIN_BYTES', 1024))
+STATIC_MAX_AGE = int(os.environ.get('SCHEDULIFY_STATIC_MAX_AGE', 3600))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'image/svg+xml', 'text/')
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Best content coding in a request's Accept-Encoding that we can produce"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_response(response, accept_encodings):
+    """Compress a large enough text or JSON body in place"""
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or not response.mimetype.startswith(COMPRESSIBLE_TYPES) or response.mimetype == 'text/event-stream'):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encodings)
+    if not encoding:
+        return response
+
+    # send_file responses stream from disk; static assets are small enough to read
+    response.direct_passthrough = False
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(brotli.compress(body) if encoding == 'br' else gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = encoding
+    # The bytes differ from the uncompressed representation, so a strong ETag must not match it
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def set_static_cache_headers(response, mimetype: str, versioned: bool):
+    """Cache-Control for a static asset response (send_file defaults to no-cache)"""
+    if mimetype != 'text/html' or versioned:
+        response.cache_control.no_cache = None
+    if versioned:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    elif mimetype == 'text/html':
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+    return response
@@ -1,21 +1,24 @@
 import sqlite3
 import os
+from data_version import ensure_version_tracking
+from job_queue import ensure_jobs_table
+from result_cache import ensure_cache_table
 
 # Get the directory where this script is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, 'timetable.db')
 
-def init_database():
+def init_database(db_path=DB_PATH):
     """Initialize the database with required tables"""
-    print(f"🗄️  Initializing database at: {DB_PATH}")
+    print(f"🗄️  Initializing database at: {db_path}")
     
     # Remove existing database if it exists
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
+    if os.path.exists(db_path):
+        os.remove(db_path)
         print("🗑️  Removed existing database")
     
     # Create new database connection
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Create subjects table
@@ -43,7 +46,8 @@ def init_database():
             department TEXT,
             email TEXT,
             max_hours INTEGER DEFAULT 20,
-            year TEXT
+            year TEXT,
+            availability_bits TEXT
         )
     ''')
     print("✅ Created faculty table")
@@ -182,11 +186,24 @@ def init_database():
             fitness_score REAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             schedule_data TEXT,
+            entry_count INTEGER,
+            schedule_blob BLOB,
+            revision INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
         )
     ''')
     print("✅ Created user_timetables table")
 
+    # Background generation jobs, their progress events and memoized results
+    ensure_jobs_table(conn)
+    print("✅ Created generation_jobs and job_events tables")
+    ensure_cache_table(conn)
+    print("✅ Created result_cache table")
+
+    # Change counters behind the ETags of the read endpoints
+    ensure_version_tracking(conn, db_path)
+    print("✅ Created data_versions table")
+
     # Do NOT insert any sample data here!
     # ...no sample data...
 
@@ -194,7 +211,7 @@ def init_database():
     conn.commit()
     conn.close()
     
-    print(f"\n✨ Database initialized successfully at: {DB_PATH}")
+    print(f"\n✨ Database initialized successfully at: {db_path}")
     print("🚀 You can now run: python app.py")
 
 if __name__ == '__main__':
@@ -0,0 +1,382 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from cancellation import CancellationToken
+from data_handler import DB_PATH, get_db_connection
+from log import get_logger
+from metrics import SQLITE_QUERIES, queries_since, record_run
+from profiling import timing_stats
+
+logger = get_logger('job_queue')
+
+# Jobs in these states still hold (or wait for) a worker
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+
+# A running job's worker refreshes heartbeat_at this often (seconds)
+HEARTBEAT_INTERVAL = 10.0
+
+# Jobs whose worker has not refreshed heartbeat_at within the bound number of seconds
+STALE_HEARTBEAT = "(heartbeat_at IS NULL OR heartbeat_at < datetime('now', '-' || ? || ' seconds'))"
+
+def ensure_jobs_table(conn):
+    """Create the generation_jobs and job_events tables if they do not exist yet"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS generation_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            params TEXT,
+            result TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            worker_pid INTEGER,
+            heartbeat_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES generation_jobs(id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id)')
+    # Tables created before workers recorded a heartbeat
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(generation_jobs)')}
+    if 'worker_pid' not in columns:
+        conn.execute('ALTER TABLE generation_jobs ADD COLUMN worker_pid INTEGER')
+    if 'heartbeat_at' not in columns:
+        conn.execute('ALTER TABLE generation_jobs ADD COLUMN heartbeat_at TIMESTAMP')
+
+class JobProgressRecorder:
+    """Buffers progress events in the worker and writes them to job_events in batches"""
+
+    def __init__(self, conn, job_id: str, flush_interval: float = 0.5):
+        self.conn = conn
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+
+    def __call__(self, event: Dict):
+        self._pending.append(json.dumps(event))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.conn.executemany('INSERT INTO job_events (job_id, event) VALUES (?, ?)',
+                                  [(self.job_id, event) for event in self._pending])
+            self.conn.commit()
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+class JobCancellationToken(CancellationToken):
+    """Cancellation token that notices DELETE requests by polling the job row
+
+    It also stops the run once the job no longer belongs to this worker, i.e. recovery
+    re-queued it because the worker's heartbeat went stale.
+    """
+
+    def __init__(self, conn, job_id: str, max_seconds: Optional[float] = None,
+                 poll_interval: float = 0.5):
+        super().__init__(max_seconds)
+        self.conn = conn
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._last_poll = 0.0
+
+    def is_cancelled(self) -> bool:
+        if not self._cancelled and time.monotonic() - self._last_poll >= self.poll_interval:
+            self._last_poll = time.monotonic()
+            row = self.conn.execute('SELECT status, worker_pid FROM generation_jobs WHERE id = ?',
+                                    (self.job_id,)).fetchone()
+            self._cancelled = (row is None or row['status'] == 'cancelling'
+                               or row['worker_pid'] != os.getpid())
+        return self._cancelled
+
+class JobHeartbeat:
+    """Refreshes a claimed job's heartbeat_at from a background thread while it runs, so
+    recovery can tell a dead worker from one that is busy in a long solver step"""
+
+    def __init__(self, db_path: str, job_id: str, interval: float = HEARTBEAT_INTERVAL):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        conn = get_db_connection(self.db_path)
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    conn.execute('''
+                        UPDATE generation_jobs SET heartbeat_at = datetime('now')
+                        WHERE id = ? AND worker_pid = ?
+                    ''', (self.job_id, os.getpid()))
+                    conn.commit()
+                except sqlite3.OperationalError as e:
+                    # A locked database only delays this beat; the next one retries
+                    logger.warning("⚠️  Heartbeat for generation job %s failed: %s", self.job_id, e)
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+def _run_job(job_id: str, db_path: str) -> Optional[Dict]:
+    """Worker process entry point: run one generation job and store its result
+
+    Returns the run's summary (see generation.run_summary), plus the SQLite statements
+    this worker executed for the job, so the server process can aggregate its timings
+    and metrics.
+    """
+    from generation import run_generation, run_summary, run_time_budget
+
+    queries_before = SQLITE_QUERIES.snapshot()
+    conn = get_db_connection(db_path)
+    try:
+        row = conn.execute('SELECT params FROM generation_jobs WHERE id = ?', (job_id,)).fetchone()
+        if not row:
+            return
+        # Only one worker wins this claim, however many times the job was dispatched
+        started = conn.execute('''
+            UPDATE generation_jobs
+            SET status = 'running', started_at = datetime('now'), worker_pid = ?, heartbeat_at = datetime('now')
+            WHERE id = ? AND status = 'queued'
+        ''', (os.getpid(), job_id)).rowcount
+        conn.commit()
+        if not started:
+            # Cancelled while waiting for a worker, or claimed by another one
+            return
+
+        params = json.loads(row['params']) if row['params'] else {}
+        recorder = JobProgressRecorder(conn, job_id)
+        cancel_token = JobCancellationToken(conn, job_id, run_time_budget(params))
+        with JobHeartbeat(db_path, job_id):
+            try:
+                payload, _ = run_generation(params, db_path, progress_callback=recorder,
+                                            cancel_token=cancel_token)
+            except Exception as e:
+                logger.exception("❌ Generation job %s raised", job_id)
+                payload = {'success': False, 'error': f'{type(e).__name__}: {str(e)}'}
+            recorder.flush()
+
+        if payload.get('stopped_early') == 'cancelled':
+            status = 'cancelled'
+        else:
+            status = 'completed' if payload.get('success') else 'failed'
+        # A job recovery took back from this worker keeps the new owner's result
+        owned = conn.execute('''
+            UPDATE generation_jobs
+            SET status = ?, result = ?, error = ?, finished_at = datetime('now')
+            WHERE id = ? AND worker_pid = ? AND status IN ('running', 'cancelling')
+        ''', (status, json.dumps(payload), payload.get('error'), job_id, os.getpid())).rowcount
+        conn.commit()
+        if not owned:
+            logger.warning("⚠️  Generation job %s was reclaimed by recovery; result discarded", job_id)
+            return
+        logger.info("🏁 Generation job %s %s", job_id, status, extra={'job_id': job_id, 'status': status})
+        summary = run_summary(params, payload)
+        summary['sqlite_queries'] = queries_since(queries_before)
+        return summary
+    finally:
+        conn.close()
+
+class JobQueue:
+    """Runs generation jobs on a bounded process pool, with job state kept in SQLite"""
+
+    def __init__(self, db_path: str = DB_PATH, max_workers: Optional[int] = None,
+                 max_queued: Optional[int] = None, stale_after: Optional[float] = None):
+        self.db_path = db_path
+        self.max_workers = max_workers or int(os.environ.get('SCHEDULIFY_MAX_WORKERS', 2))
+        self.max_queued = max_queued or int(os.environ.get('SCHEDULIFY_MAX_QUEUED', 50))
+        # Seconds without a heartbeat after which a running job's worker is presumed dead
+        self.stale_after = stale_after or float(os.environ.get('SCHEDULIFY_JOB_STALE_SECONDS', 60))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = get_db_connection(self.db_path)
+        ensure_jobs_table(conn)
+        return conn
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _dispatch(self, job_id: str):
+        future = self._get_executor().submit(_run_job, job_id, self.db_path)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future):
+        """Aggregate a finished job's timings and metrics, or record a worker process
+        that died before writing a result"""
+        if future.exception() is None:
+            summary = future.result()
+            if summary:
+                timing_stats.record(summary['timings'])
+                record_run(summary)
+            return
+        conn = self._connect()
+        conn.execute('''
+            UPDATE generation_jobs
+            SET status = 'failed', error = ?, finished_at = datetime('now')
+            WHERE id = ? AND status IN ('queued', 'running', 'cancelling')
+        ''', (f'Worker error: {future.exception()}', job_id))
+        conn.commit()
+        conn.close()
+
+    def pending_count(self) -> int:
+        """Number of jobs waiting for or occupying a worker"""
+        conn = self._connect()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM generation_jobs WHERE status IN ('queued', 'running', 'cancelling')"
+        ).fetchone()[0]
+        conn.close()
+        return count
+
+    def submit(self, user_id: int, params: Dict) -> Optional[str]:
+        """Persist a new job and hand it to the pool; returns None when the queue is full"""
+        if self.pending_count() >= self.max_queued:
+            return None
+
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        # Progress events are only useful while a job is being watched
+        conn.execute('''
+            DELETE FROM job_events WHERE job_id IN (
+                SELECT id FROM generation_jobs WHERE finished_at < datetime('now', '-1 hour')
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO generation_jobs (id, user_id, status, params)
+            VALUES (?, ?, 'queued', ?)
+        ''', (job_id, user_id, json.dumps(params)))
+        conn.commit()
+        conn.close()
+
+        self._dispatch(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job as a dict, with its result decoded"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM generation_jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Request cancellation; returns the job's resulting status, or None if it has finished"""
+        conn = self._connect()
+        # A queued job never starts; a running one stops at its next checkpoint
+        status = None
+        if conn.execute('''
+            UPDATE generation_jobs SET status = 'cancelled', finished_at = datetime('now')
+            WHERE id = ? AND status = 'queued'
+        ''', (job_id,)).rowcount:
+            status = 'cancelled'
+        elif conn.execute('''
+            UPDATE generation_jobs SET status = 'cancelling' WHERE id = ? AND status IN ('running', 'cancelling')
+        ''', (job_id,)).rowcount:
+            status = 'cancelling'
+        conn.commit()
+        conn.close()
+        return status
+
+    def events_since(self, job_id: str, last_event_id: int = 0) -> List[Dict]:
+        """Return progress events recorded after last_event_id, oldest first"""
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT id, event FROM job_events WHERE job_id = ? AND id > ? ORDER BY id
+        ''', (job_id, last_event_id)).fetchall()
+        conn.close()
+        return [{'id': row['id'], 'event': json.loads(row['event'])} for row in rows]
+
+    def status(self, job_id: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute('SELECT status FROM generation_jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return row['status'] if row else None
+
+    def recover(self) -> int:
+        """Re-dispatch jobs whose server process stopped; returns how many were dispatched
+
+        Run it once at startup (see main), not on import. A running job is only taken back
+        once its heartbeat is older than stale_after, each by a conditional UPDATE that one
+        process wins. Queued jobs are dispatched as they are: _run_job's claim lets a single
+        worker start each of them.
+        """
+        conn = self._connect()
+        conn.execute(f'''
+            UPDATE generation_jobs SET status = 'cancelled', finished_at = datetime('now')
+            WHERE status = 'cancelling' AND {STALE_HEARTBEAT}
+        ''', (self.stale_after,))
+        stale = conn.execute(f"SELECT id FROM generation_jobs WHERE status = 'running' AND {STALE_HEARTBEAT}",
+                             (self.stale_after,)).fetchall()
+        reclaimed = 0
+        for row in stale:
+            reclaimed += conn.execute(f'''
+                UPDATE generation_jobs SET status = 'queued', worker_pid = NULL, heartbeat_at = NULL
+                WHERE id = ? AND status = 'running' AND {STALE_HEARTBEAT}
+            ''', (row['id'], self.stale_after)).rowcount
+        conn.commit()
+        rows = conn.execute("SELECT id FROM generation_jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        conn.close()
+
+        for row in rows:
+            self._dispatch(row['id'])
+        if rows:
+            logger.info("♻️  Re-queued %d unfinished generation job(s), %d taken back from stale workers",
+                        len(rows), reclaimed)
+        return len(rows)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run generation jobs left unfinished by stopped server processes')
+    parser.add_argument('command', choices=['recover'])
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--stale-after', type=float,
+                        help='seconds without a heartbeat before a running job is taken back')
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.db, stale_after=args.stale_after)
+    recovered = queue.recover()
+    # The jobs run on this command's own pool, so wait for them before exiting
+    queue.shutdown(wait=True)
+    print(f"✅ Recovered {recovered} generation job(s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Leveled, rate-limited logging written by a background thread
+
+Records go through a QueueHandler to a QueueListener thread that does the terminal
+I/O, so request handlers and solver loops never block on stdout. Configured from:
+
+    SCHEDULIFY_LOG_LEVEL    DEBUG, INFO (default), WARNING or ERROR
+    SCHEDULIFY_LOG_FORMAT   text (default) or json (one object per line, with extra fields)
+    SCHEDULIFY_LOG_RATE     records per second kept per call site below WARNING (default 50, 0 = no limit)
+    SCHEDULIFY_LOG_EVERY    log every Nth GA generation at INFO, the rest at DEBUG (default 10)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+ROOT_LOGGER = 'schedulify'
+LOG_EVERY = max(1, int(os.environ.get('SCHEDULIFY_LOG_EVERY', 10)))
+
+# LogRecord attributes that are not 'extra' fields
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed'}
+
+class RateLimitFilter(logging.Filter):
+    """Keep at most per_second records per call site each second; warnings and errors always pass
+
+    The first record kept in a new second carries the number dropped in the previous
+    one as record.suppressed.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._windows = {}  # (pathname, lineno) -> [second, kept, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.per_second or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        second = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                if window and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [second, 1, 0]
+                return True
+            if window[1] < self.per_second:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} ({suppressed} similar messages suppressed)" if suppressed else text
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), 'level': record.levelname,
+                 'logger': record.name, 'message': record.getMessage()}
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        return json.dumps(entry, default=str)
+
+_lock = threading.Lock()
+_configured_pid = None
+_listener = None
+
+def configure_logging(force: bool = False):
+    """Attach the queue handler to the 'schedulify' logger (once per process)"""
+    global _configured_pid, _listener
+    with _lock:
+        if _configured_pid == os.getpid() and not force:
+            return
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.handlers.clear()
+        logger.setLevel(os.environ.get('SCHEDULIFY_LOG_LEVEL', 'INFO').upper())
+        logger.propagate = False
+
+        stream = logging.StreamHandler()
+        json_format = os.environ.get('SCHEDULIFY_LOG_FORMAT', 'text').lower() == 'json'
+        stream.setFormatter(JsonFormatter() if json_format else TextFormatter())
+        records = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(records)
+        handler.addFilter(RateLimitFilter(int(os.environ.get('SCHEDULIFY_LOG_RATE', 50))))
+        logger.addHandler(handler)
+
+        _listener = logging.handlers.QueueListener(records, stream)
+        _listener.start()
+        _configured_pid = os.getpid()
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module, e.g. get_logger('generation') -> 'schedulify.generation'"""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+@atexit.register
+def _flush():
+    """Write out queued records before the interpreter exits"""
+    if _listener and _configured_pid == os.getpid():
+        _listener.stop()
+
+# A forked worker (job pool) inherits the queue but not the listener thread
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: configure_logging(force=True))
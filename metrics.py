@@ -0,0 +1,214 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format
+
+Counters, gauges and histograms are plain dicts keyed by label values behind a lock,
+so recording is cheap enough for the request path. GET /metrics renders REGISTRY.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latencies and generation durations (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, '') for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return '\n'.join(lines + self.samples())
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> Dict[Tuple, float]:
+        """Current values keyed by label values"""
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabelled) value from function at scrape time"""
+        self.function = function
+
+    def samples(self) -> List[str]:
+        if self.function:
+            try:
+                return [f"{self.name} {_format_value(self.function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then sum and count
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        lines = []
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {counts[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'schedulify_http_requests_total', 'HTTP requests by route, method and status',
+    ('method', 'route', 'status')))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    'schedulify_http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route')))
+GENERATION_RUNS = REGISTRY.register(Counter(
+    'schedulify_generation_runs_total', 'Finished timetable generation runs', ('algorithm', 'outcome')))
+GENERATION_DURATION = REGISTRY.register(Histogram(
+    'schedulify_generation_duration_seconds', 'Wall time of a generation run', ('algorithm',)))
+GA_GENERATIONS = REGISTRY.register(Counter(
+    'schedulify_ga_generations_total', 'Genetic algorithm generations evolved'))
+GA_GENERATION_RATE = REGISTRY.register(Histogram(
+    'schedulify_ga_generations_per_second', 'Genetic algorithm generations per second of evolution',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'schedulify_result_cache_requests_total', 'Result cache lookups by outcome', ('result',)))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    'schedulify_result_cache_hit_ratio', 'Share of result cache lookups that were hits'))
+JOB_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'schedulify_job_queue_depth', 'Generation jobs queued or running'))
+SQLITE_QUERIES = REGISTRY.register(Counter(
+    'schedulify_sqlite_queries_total', 'SQLite statements executed by the server and its job workers',
+    ('statement',)))
+
+CACHE_HIT_RATIO.set_function(lambda: CACHE_REQUESTS.value(result='hit') /
+                             max(1, CACHE_REQUESTS.value(result='hit') + CACHE_REQUESTS.value(result='miss')))
+
+# Phases of Timings that make up GA evolution
+GA_PHASES = ('init_population', 'fitness', 'selection', 'crossover', 'mutation', 'deepcopy')
+
+def count_query(statement: str):
+    """sqlite3 trace callback: count each executed statement by its leading keyword"""
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ''
+    SQLITE_QUERIES.inc(statement=keyword)
+
+def queries_since(snapshot: Dict[Tuple, float]) -> Dict[str, float]:
+    """Statements counted since SQLITE_QUERIES.snapshot() returned snapshot, by keyword"""
+    return {key[0]: count - snapshot.get(key, 0) for key, count in SQLITE_QUERIES.snapshot().items()
+            if count != snapshot.get(key, 0)}
+
+def record_run(summary: Optional[Dict]):
+    """Record one finished generation run from generation.run_summary()"""
+    if not summary:
+        return
+    algorithm = summary['algorithm']
+    if summary.get('cache_used'):
+        CACHE_REQUESTS.inc(result='hit' if summary.get('cached') else 'miss')
+    if summary.get('cached'):
+        outcome = 'cached'
+    elif summary.get('stopped_early'):
+        # 'cancelled' or 'timeout': the run returned its best-so-far result, if any
+        outcome = summary['stopped_early']
+    else:
+        outcome = 'success' if summary.get('success') else 'failure'
+    GENERATION_RUNS.inc(algorithm=algorithm, outcome=outcome)
+    # Job workers are separate processes; their statement counts arrive with the summary
+    for statement, count in (summary.get('sqlite_queries') or {}).items():
+        SQLITE_QUERIES.inc(count, statement=statement)
+
+    timings = summary.get('timings')
+    if not timings:
+        return
+    GENERATION_DURATION.observe(timings['total_seconds'], algorithm=algorithm)
+    generations = summary.get('generations_completed')
+    evolve_seconds = sum(timings['phases'].get(phase, {}).get('seconds', 0) for phase in GA_PHASES)
+    if generations:
+        GA_GENERATIONS.inc(generations)
+        if evolve_seconds > 0:
+            GA_GENERATION_RATE.observe(generations / evolve_seconds)
@@ -1,8 +1,12 @@
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import json
+from log import get_logger
 
-@dataclass
+logger = get_logger('models')
+
+@dataclass(slots=True)
 class TimeSlot:
     id: int
     day: str
@@ -18,7 +22,7 @@ class TimeSlot:
         if self.day not in valid_days:
             raise ValueError(f"Invalid day: {self.day}. Must be one of {valid_days}")
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     id: int
     name: str
@@ -33,7 +37,7 @@ class Room:
         if self.room_type not in valid_types:
             raise ValueError(f"Invalid room type: {self.room_type}")
 
-@dataclass
+@dataclass(slots=True)
 class Faculty:
     id: int
     name: str
@@ -67,7 +71,7 @@ class Faculty:
         """Calculate total available hours per week"""
         return sum(len(slots) for slots in self.available_time_slots.values())
 
-@dataclass
+@dataclass(slots=True)
 class Subject:
     id: int
     name: str
@@ -84,7 +88,7 @@ class Subject:
         if self.student_count <= 0:
             raise ValueError(f"Student count must be positive, got {self.student_count}")
 
-@dataclass
+@dataclass(slots=True)
 class ScheduleEntry:
     subject: Subject
     faculty: Faculty
@@ -124,39 +128,135 @@ class ScheduleEntry:
         
         return False
 
+class EntriesView(Sequence):
+    """Read-only, non-copying view of a schedule's entry list"""
+    __slots__ = ('_items',)
+    
+    def __init__(self, items: List['ScheduleEntry']):
+        self._items = items
+    
+    def __getitem__(self, index):
+        return self._items[index]
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __repr__(self) -> str:
+        return f"EntriesView({self._items!r})"
+
 class Schedule:
     def __init__(self):
-        self.entries: List[ScheduleEntry] = []
+        self._entries: List[ScheduleEntry] = []
+        self._entries_view = EntriesView(self._entries)
+        # Entries booked per (faculty/room/division id, timeslot id): a conflict check
+        # only looks at the three buckets of the new entry instead of every entry
+        self._bookings: Dict[str, Dict[Tuple[int, int], List[ScheduleEntry]]] = {
+            'faculty': {}, 'room': {}, 'division': {}
+        }
+        # Reverse index: id(entry) -> timeslot id it was booked under
+        self._slot_of: Dict[int, int] = {}
+        self._conflict_count = 0
+    
+    @property
+    def entries(self) -> EntriesView:
+        """Entries in insertion order; read-only so the buckets cannot go stale (use add_entry/remove_entry)"""
+        return self._entries_view
+    
+    @staticmethod
+    def _booking_keys(entry: ScheduleEntry, slot_id: Optional[int] = None):
+        if slot_id is None:
+            slot_id = entry.time_slot.id
+        yield 'faculty', (entry.faculty.id, slot_id)
+        yield 'room', (entry.room.id, slot_id)
+        if entry.division_id:
+            yield 'division', (entry.division_id, slot_id)
+    
+    def _index_entry(self, entry: ScheduleEntry):
+        self._conflict_count += len(self._clashing_entries(entry))
+        for kind, key in self._booking_keys(entry):
+            self._bookings[kind].setdefault(key, []).append(entry)
+        self._slot_of[id(entry)] = entry.time_slot.id
+        self._entries.append(entry)
+    
+    def _clashing_entries(self, new_entry: ScheduleEntry, slot_id: Optional[int] = None) -> List[ScheduleEntry]:
+        """Entries sharing a faculty, room or division bucket with new_entry"""
+        clashing = {}
+        for kind, key in self._booking_keys(new_entry, slot_id):
+            for entry in self._bookings[kind].get(key, ()):
+                clashing[id(entry)] = entry
+        return list(clashing.values())
         
     def add_entry(self, entry: ScheduleEntry):
         """Add entry and check for conflicts"""
         conflicts = self.check_conflicts(entry)
         if conflicts:
-            print(f"⚠️ Warning: Adding entry with {len(conflicts)} conflicts")
-        self.entries.append(entry)
+            logger.warning("⚠️ Adding entry with %d conflicts", len(conflicts))
+        self._index_entry(entry)
         
     def check_conflicts(self, new_entry: ScheduleEntry) -> List[str]:
         """Check if new entry conflicts with existing entries"""
-        conflicts = []
-        for entry in self.entries:
-            if entry.has_conflict_with(new_entry):
-                conflicts.append(
-                    f"Conflict at {new_entry.time_slot}: "
-                    f"{new_entry.subject.name} vs {entry.subject.name}"
-                )
-        return conflicts
+        return [
+            f"Conflict at {new_entry.time_slot}: "
+            f"{new_entry.subject.name} vs {entry.subject.name}"
+            for entry in self._clashing_entries(new_entry)
+        ]
+        
+    def is_free(self, slot_id: int, faculty_id: Optional[int] = None, room_id: Optional[int] = None,
+                division_id: Optional[int] = None) -> bool:
+        """Check in O(1) that none of the given faculty, room or division is booked at slot_id"""
+        if faculty_id is not None and (faculty_id, slot_id) in self._bookings['faculty']:
+            return False
+        if room_id is not None and (room_id, slot_id) in self._bookings['room']:
+            return False
+        if division_id and (division_id, slot_id) in self._bookings['division']:
+            return False
+        return True
+    
+    # The buckets are keyed like constraints.AssignmentState's slot counters, so the
+    # registry's hard constraints can check an entry against a Schedule directly
+    @property
+    def faculty_slots(self) -> Dict[Tuple[int, int], List[ScheduleEntry]]:
+        return self._bookings['faculty']
+    
+    @property
+    def room_slots(self) -> Dict[Tuple[int, int], List[ScheduleEntry]]:
+        return self._bookings['room']
+    
+    @property
+    def division_slots(self) -> Dict[Tuple[int, int], List[ScheduleEntry]]:
+        return self._bookings['division']
+    
+    def slot_of(self, entry: ScheduleEntry) -> Optional[int]:
+        """Timeslot id an entry is booked under, or None if it is not in the schedule"""
+        return self._slot_of.get(id(entry))
+    
+    def remove_entry(self, entry: ScheduleEntry):
+        """Remove an entry and release its faculty, room and division bookings"""
+        slot_id = self._slot_of.pop(id(entry))
+        for kind, key in self._booking_keys(entry, slot_id):
+            bucket = self._bookings[kind][key]
+            bucket.remove(entry)
+            if not bucket:
+                del self._bookings[kind][key]
+        self._conflict_count -= len(self._clashing_entries(entry, slot_id))
+        if self._entries and self._entries[-1] is entry:
+            self._entries.pop()
+        else:
+            self._entries.remove(entry)
         
     def to_dict(self):
-        return [entry.to_dict() for entry in self.entries]
+        return [entry.to_dict() for entry in self._entries]
     
     def get_conflicts_count(self) -> int:
-        """Count total number of conflicts"""
-        conflict_count = 0
-        for i, entry1 in enumerate(self.entries):
-            for entry2 in self.entries[i+1:]:
-                if entry1.has_conflict_with(entry2):
-                    conflict_count += 1
-        return conflict_count
+        """Count total number of conflicts (pairs of entries that clash)"""
+        return self._conflict_count
+    
+    def double_bookings(self, kind: str) -> int:
+        """Number of entry pairs sharing a timeslot and the same 'faculty', 'room' or 'division'"""
+        return sum(len(bucket) * (len(bucket) - 1) // 2 for bucket in self._bookings[kind].values())
     
     def get_utilization_stats(self) -> Dict:
         """Get statistics about schedule utilization"""
@@ -164,7 +264,7 @@ class Schedule:
         room_usage = {}
         day_distribution = {}
         
-        for entry in self.entries:
+        for entry in self._entries:
             # Faculty hours
             fid = entry.faculty.id
             faculty_hours[fid] = faculty_hours.get(fid, 0) + 1
@@ -178,7 +278,7 @@ class Schedule:
             day_distribution[day] = day_distribution.get(day, 0) + 1
         
         return {
-            'total_classes': len(self.entries),
+            'total_classes': len(self._entries),
             'faculty_hours': faculty_hours,
             'room_usage': room_usage,
             'day_distribution': day_distribution,
@@ -0,0 +1,175 @@
+"""Occupancy index of a schedule: which lessons hold each faculty member, room and division per slot
+
+Lessons are schedule rows, identified by their position in the (unfiltered) schedule.
+Each (resource kind, resource, slot) bucket is a set of positions, so checking whether
+a lesson fits a slot and applying a move or swap cost O(1) per lesson, and an edit
+reports only the conflicts it introduced or resolved.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+# Resource kind -> (id field, label field, message template)
+RESOURCES = {
+    'faculty': ('facultyId', 'faculty', "Faculty {resource} double-booked at {day} {time}"),
+    'room': ('roomId', 'room', "Room {resource} double-booked at {day} {time}"),
+    'division': ('divisionId', 'division', "Division {resource} has overlapping classes at {day} {time}"),
+}
+
+# Row fields that place a lesson in time (swapped between lessons; rooms stay)
+SLOT_FIELDS = ('day', 'timeSlot', 'timeslotId')
+
+Key = Tuple[str, object, Tuple[str, str]]
+
+class OccupancyIndex:
+    def __init__(self, schedule: Iterable[Dict]):
+        self.lessons = [dict(entry) for entry in schedule]
+        self.buckets: Dict[Key, Set[int]] = {}
+        for position, entry in enumerate(self.lessons):
+            for key in self._keys(entry):
+                self.buckets.setdefault(key, set()).add(position)
+
+    @staticmethod
+    def _keys(entry: Dict) -> List[Key]:
+        # Rows saved without ids fall back to their labels
+        slot = (entry.get('day'), entry.get('timeSlot'))
+        keys = []
+        for kind, (id_field, label_field, _) in RESOURCES.items():
+            resource = entry.get(id_field) if entry.get(id_field) is not None else entry.get(label_field)
+            if resource is not None and resource != '':
+                keys.append((kind, resource, slot))
+        return keys
+
+    def _conflict(self, key: Key) -> Dict:
+        kind, _, (day, time) = key
+        positions = sorted(self.buckets.get(key, ()))
+        label = self.lessons[positions[0]].get(RESOURCES[kind][1]) if positions else None
+        return {'type': kind, 'resource': label, 'day': day, 'timeSlot': time, 'lessons': positions,
+                'message': RESOURCES[kind][2].format(resource=label, day=day, time=time)}
+
+    def conflicts(self) -> List[Dict]:
+        return [self._conflict(key) for key, positions in self.buckets.items() if len(positions) > 1]
+
+    def conflict_messages(self) -> List[str]:
+        """One message per lesson beyond the first in each over-booked bucket"""
+        return [conflict['message'] for conflict in self.conflicts() for _ in conflict['lessons'][1:]]
+
+    def lesson(self, position) -> Dict:
+        if not isinstance(position, int) or not 0 <= position < len(self.lessons):
+            raise ValueError(f"No lesson {position!r} in this timetable")
+        return self.lessons[position]
+
+    def check_move(self, position: int, placement: Dict) -> List[Dict]:
+        """Lessons the lesson at position would clash with if given placement (slot and/or room fields)"""
+        moved = dict(self.lesson(position), **placement)
+        clashes = []
+        for key in self._keys(moved):
+            others = self.buckets.get(key, set()) - {position}
+            if others:
+                kind, _, (day, time) = key
+                clashes.append({'type': kind, 'resource': moved.get(RESOURCES[kind][1]), 'day': day,
+                                'timeSlot': time, 'lessons': sorted(others)})
+        return clashes
+
+    def apply(self, placements: Dict[int, Dict]) -> Dict[str, List[Dict]]:
+        """Update lessons with new placement fields; returns the conflicts introduced and resolved"""
+        updated = {position: dict(self.lesson(position), **fields) for position, fields in placements.items()}
+        touched = set()
+        for position, entry in updated.items():
+            touched.update(self._keys(self.lessons[position]))
+            touched.update(self._keys(entry))
+        before = {key for key in touched if len(self.buckets.get(key, ())) > 1}
+        resolved_details = {key: self._conflict(key) for key in before}
+
+        for position, entry in updated.items():
+            for key in self._keys(self.lessons[position]):
+                bucket = self.buckets[key]
+                bucket.discard(position)
+                if not bucket:
+                    del self.buckets[key]
+            self.lessons[position] = entry
+            for key in self._keys(entry):
+                self.buckets.setdefault(key, set()).add(position)
+
+        after = {key for key in touched if len(self.buckets.get(key, ())) > 1}
+        return {'introduced': [self._conflict(key) for key in after - before],
+                'resolved': [resolved_details[key] for key in before - after]}
+
+def edit_placements(index: OccupancyIndex, edits: List[Dict],
+                    placement_for: Callable[[Dict], Dict]) -> Dict[int, Dict]:
+    """New placement fields per lesson for a list of move/swap edits, applied in order
+
+    move: {'type': 'move', 'lesson': 3, 'timeslotId': 12, 'roomId': 4 (optional)}
+    swap: {'type': 'swap', 'lessons': [3, 8]} exchanges the two lessons' slots (rooms stay)
+    placement_for(edit) resolves a move's ids to the row fields it sets.
+    """
+    placements = {}
+
+    def current(position) -> Dict:
+        return dict(index.lesson(position), **placements.get(position, {}))
+
+    for edit in edits:
+        if edit.get('type') == 'move':
+            index.lesson(edit.get('lesson'))
+            placements.setdefault(edit['lesson'], {}).update(placement_for(edit))
+        elif edit.get('type') == 'swap':
+            first, second = (list(edit.get('lessons') or []) + [None, None])[:2]
+            a, b = current(first), current(second)
+            placements.setdefault(first, {}).update({field: b.get(field) for field in SLOT_FIELDS})
+            placements.setdefault(second, {}).update({field: a.get(field) for field in SLOT_FIELDS})
+        else:
+            raise ValueError(f"Unknown edit type {edit.get('type')!r}; use 'move' or 'swap'")
+    return placements
+
+class OccupancyRegistry:
+    """Occupancy indexes of saved timetables kept in memory between requests
+
+    Each entry is tagged with the timetable's stored revision and rebuilt when the row
+    was changed by another process. The least recently used entries are dropped.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self._indexes: 'OrderedDict[int, Tuple[int, OccupancyIndex]]' = OrderedDict()
+
+    def get(self, timetable_id: int, revision: int,
+            load_schedule: Callable[[], List[Dict]]) -> OccupancyIndex:
+        """Index of a timetable at revision, rebuilt from load_schedule() when missing or stale
+
+        The schedule is read and indexed without holding the lock. Callers hold the lock
+        while they read or apply edits to the returned index.
+        """
+        with self.lock:
+            entry = self._indexes.get(timetable_id)
+            if entry is not None and entry[0] == revision:
+                self._indexes.move_to_end(timetable_id)
+                return entry[1]
+        index = OccupancyIndex(load_schedule())
+        with self.lock:
+            entry = self._indexes.get(timetable_id)
+            if entry is not None and entry[0] > revision:
+                # A newer revision was indexed meanwhile; keep it cached
+                return index
+            if entry is None or entry[0] < revision:
+                entry = self._indexes[timetable_id] = (revision, index)
+            self._indexes.move_to_end(timetable_id)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+            return entry[1]
+
+    def holds(self, timetable_id: int, revision: int, index: OccupancyIndex) -> bool:
+        """Whether index is still the cached index of the timetable at revision (call under the lock)"""
+        entry = self._indexes.get(timetable_id)
+        return entry is not None and entry[0] == revision and entry[1] is index
+
+    def set_revision(self, timetable_id: int, revision: int):
+        with self.lock:
+            if timetable_id in self._indexes:
+                self._indexes[timetable_id] = (revision, self._indexes[timetable_id][1])
+
+    def discard(self, timetable_id: int):
+        with self.lock:
+            self._indexes.pop(timetable_id, None)
+
+occupancy_indexes = OccupancyRegistry()
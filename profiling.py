@@ -0,0 +1,107 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Called as hook(phase, seconds) each time a phase finishes
+PhaseHook = Callable[[str, float], None]
+
+PHASE_HOOKS: List[PhaseHook] = []
+
+def add_phase_hook(hook: PhaseHook) -> PhaseHook:
+    """Register an instrumentation hook that sees every timed phase of every run"""
+    PHASE_HOOKS.append(hook)
+    return hook
+
+class Timings:
+    """Wall-clock time per named phase of one generation run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # phase -> [seconds, calls]
+
+    def add(self, phase: str, seconds: float, calls: int = 1):
+        entry = self.phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+        for hook in PHASE_HOOKS:
+            hook(phase, seconds)
+
+    @contextmanager
+    def phase(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict:
+        """Breakdown for API responses: seconds and calls per phase plus the run total"""
+        return {
+            'total_seconds': round(time.perf_counter() - self.started, 4),
+            'phases': {phase: {'seconds': round(seconds, 4), 'calls': calls}
+                       for phase, (seconds, calls) in self.phases.items()}
+        }
+
+@contextmanager
+def profiled(enabled: bool, result: Dict, limit: int = 25):
+    """Run the block under cProfile when enabled and store its hottest functions in result['profile']"""
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        result['profile'] = profile_summary(profiler, limit)
+
+def profile_summary(profiler: cProfile.Profile, limit: int = 25) -> List[Dict]:
+    """Functions with the highest cumulative time, as JSON-friendly rows"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({'function': f"{filename.rsplit('/', 1)[-1]}:{line}({name})", 'calls': calls,
+                     'own_seconds': round(own, 4), 'cumulative_seconds': round(cumulative, 4)})
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:limit]
+
+class TimingStats:
+    """Per-phase timing aggregates over all finished runs of this server process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.total_seconds = 0.0
+        self.phases = {}  # phase -> {'runs', 'seconds', 'max_seconds'}
+
+    def record(self, timings: Optional[Dict]):
+        """Add one run's Timings.as_dict() breakdown"""
+        if not timings:
+            return
+        with self._lock:
+            self.runs += 1
+            self.total_seconds += timings['total_seconds']
+            for phase, entry in timings['phases'].items():
+                stats = self.phases.setdefault(phase, {'runs': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                stats['runs'] += 1
+                stats['seconds'] += entry['seconds']
+                stats['max_seconds'] = max(stats['max_seconds'], entry['seconds'])
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'total_seconds': round(self.total_seconds, 4),
+                'mean_seconds': round(self.total_seconds / self.runs, 4) if self.runs else 0,
+                'phases': {phase: {'runs': stats['runs'], 'seconds': round(stats['seconds'], 4),
+                                   'mean_seconds': round(stats['seconds'] / stats['runs'], 4),
+                                   'max_seconds': round(stats['max_seconds'], 4)}
+                           for phase, stats in self.phases.items()}
+            }
+
+timing_stats = TimingStats()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+from data_handler import DB_PATH, get_db_connection
+
+# Request parameters that change what a solver produces (maxSeconds only bounds a run,
+# and runs that hit it are never cached)
+CONFIG_PARAMS = ('algorithm', 'populationSize', 'generations', 'mutationRate',
+                 'maxIterations', 'seed', 'warmStartTimetableId', 'weights')
+
+def ensure_cache_table(conn):
+    """Create the result_cache table if it does not exist yet"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            data_hash TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            result TEXT NOT NULL,
+            genes TEXT,
+            shape_hash TEXT,
+            hits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Tables created before warm starts were limited to datasets of the same shape
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(result_cache)')}
+    if 'shape_hash' not in columns:
+        conn.execute('ALTER TABLE result_cache ADD COLUMN shape_hash TEXT')
+    conn.execute('DROP INDEX IF EXISTS idx_result_cache_config')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_warm ON result_cache (config_hash, shape_hash, created_at)')
+
+def _digest(value) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def fingerprint_dataset(data: Dict) -> str:
+    """Content hash of a problem snapshot, independent of row and list ordering"""
+    def canonical(record):
+        return {key: sorted(value) if isinstance(value, list) else value
+                for key, value in record.items()}
+
+    snapshot = {
+        entity: sorted((canonical(record) for record in records), key=lambda r: r['id'])
+        for entity, records in data.items()
+    }
+    for fac in snapshot.get('faculty', []):
+        fac['available_time_slots'] = {day: sorted(slots)
+                                       for day, slots in fac['available_time_slots'].items()}
+    return _digest(snapshot)
+
+def fingerprint_shape(data: Dict) -> str:
+    """Hash of the entity ids alone: datasets that share it only differ in attributes
+    (capacities, hours, availability, ...), so one's timetable is a fair GA seed for the other"""
+    return _digest({entity: sorted(record['id'] for record in records) for entity, records in data.items()})
+
+def fingerprint_config(params: Dict) -> str:
+    """Hash of the solver parameters (including seed) that affect the result"""
+    return _digest({name: params.get(name) for name in CONFIG_PARAMS})
+
+class ResultCache:
+    """Bounded on-disk cache of finished generation results with LRU eviction"""
+
+    def __init__(self, db_path: str = DB_PATH, max_entries: Optional[int] = None):
+        self.db_path = db_path
+        self.max_entries = max_entries or int(os.environ.get('SCHEDULIFY_CACHE_SIZE', 100))
+
+    def _connect(self):
+        conn = get_db_connection(self.db_path)
+        ensure_cache_table(conn)
+        return conn
+
+    @staticmethod
+    def make_key(data_hash: str, config_hash: str) -> str:
+        return f"{data_hash}:{config_hash}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached response payload and mark the entry as recently used"""
+        conn = self._connect()
+        row = conn.execute('SELECT result FROM result_cache WHERE cache_key = ?', (key,)).fetchone()
+        if row:
+            conn.execute('''
+                UPDATE result_cache SET hits = hits + 1, last_used_at = datetime('now')
+                WHERE cache_key = ?
+            ''', (key,))
+            conn.commit()
+        conn.close()
+        return json.loads(row['result']) if row else None
+
+    def put(self, data_hash: str, config_hash: str, result: Dict, genes: List[List[int]],
+            shape_hash: str):
+        """Store a finished result, evicting the least recently used entries beyond the limit"""
+        conn = self._connect()
+        conn.execute('''
+            INSERT OR REPLACE INTO result_cache (cache_key, data_hash, config_hash, result, genes, shape_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (self.make_key(data_hash, config_hash), data_hash, config_hash,
+              json.dumps(result), json.dumps(genes), shape_hash))
+        conn.execute('''
+            DELETE FROM result_cache WHERE cache_key NOT IN (
+                SELECT cache_key FROM result_cache ORDER BY last_used_at DESC, created_at DESC LIMIT ?
+            )
+        ''', (self.max_entries,))
+        conn.commit()
+        conn.close()
+
+    def warm_start_genes(self, config_hash: str, shape_hash: str) -> Optional[List[List[int]]]:
+        """Genes of the newest result produced with the same solver config on a dataset with
+        the same entity ids (see fingerprint_shape)"""
+        conn = self._connect()
+        row = conn.execute('''
+            SELECT genes FROM result_cache WHERE config_hash = ? AND shape_hash = ? AND genes IS NOT NULL
+            ORDER BY created_at DESC LIMIT 1
+        ''', (config_hash, shape_hash)).fetchone()
+        conn.close()
+        return json.loads(row['genes']) if row else None
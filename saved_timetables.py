@@ -0,0 +1,166 @@
+"""Saved timetables in user_timetables: storage encoding, listing and lookup
+
+Schedules are stored in schedule_blob as zlib-compressed JSON of the columnar encoding
+(entity tables plus integer-index rows, see schedule_format), so the division, subject,
+faculty and room labels are kept once per timetable instead of once per class. Rows
+written before this format keep their JSON text in schedule_data until migrated:
+
+    python saved_timetables.py migrate [--db timetable.db] [--vacuum]
+"""
+import argparse
+import json
+import sys
+import zlib
+from typing import Dict, List, Optional, Tuple
+from data_handler import DB_PATH, get_db_connection
+from schedule_format import from_columnar, to_columnar
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Listing columns; together with user_id they form the covering index below, so a
+# page of metadata is read without touching the (large) schedule_data of each row
+LISTING_COLUMNS = ('id', 'name', 'fitness_score', 'created_at', 'entry_count')
+
+# Schedule row fields that GET /api/timetable/my-timetables/<id> can filter on
+SCHEDULE_FILTERS = ('divisionId', 'facultyId', 'roomId')
+
+def encode_schedule(schedule: List[Dict]) -> bytes:
+    """Compressed storage form of schedule rows"""
+    document = to_columnar(schedule)
+    # Rows with extra or edited fields that the columnar tables cannot reproduce are kept as-is
+    if from_columnar(document) != schedule:
+        document = schedule
+    return zlib.compress(json.dumps(document, separators=(',', ':')).encode('utf-8'))
+
+def decode_schedule(schedule_blob: Optional[bytes], schedule_data: Optional[str] = None) -> List[Dict]:
+    """Schedule rows from either storage form of a user_timetables row"""
+    if schedule_blob is not None:
+        document = json.loads(zlib.decompress(schedule_blob))
+        return from_columnar(document) if isinstance(document, dict) else document
+    return json.loads(schedule_data) if schedule_data else []
+
+def ensure_timetable_schema(conn):
+    """Add the entry_count, schedule_blob and revision columns (migrating existing rows) and indexes"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(user_timetables)')}
+    if 'entry_count' not in columns:
+        conn.execute('ALTER TABLE user_timetables ADD COLUMN entry_count INTEGER')
+        conn.execute('''
+            UPDATE user_timetables
+            SET entry_count = CASE WHEN json_valid(schedule_data) THEN json_array_length(schedule_data) ELSE 0 END
+        ''')
+    if 'schedule_blob' not in columns:
+        conn.execute('ALTER TABLE user_timetables ADD COLUMN schedule_blob BLOB')
+        migrate_schedules(conn)
+    if 'revision' not in columns:
+        conn.execute('ALTER TABLE user_timetables ADD COLUMN revision INTEGER NOT NULL DEFAULT 0')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_user_timetables_listing
+        ON user_timetables (user_id, {', '.join(LISTING_COLUMNS)})
+    ''')
+    # Lets revision checks skip reading the schedule blob stored before the column
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_timetables_revision ON user_timetables (id, user_id, revision)')
+    conn.commit()
+
+def migrate_schedules(conn, batch_size: int = 200) -> int:
+    """Re-encode schedule_data JSON text into schedule_blob; returns the number of rows migrated
+
+    Rows whose text is not valid JSON are left untouched.
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, schedule_data FROM user_timetables
+            WHERE id > ? AND schedule_blob IS NULL AND schedule_data IS NOT NULL
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            return migrated
+        updates = []
+        for timetable_id, schedule_data in rows:
+            try:
+                updates.append((encode_schedule(json.loads(schedule_data)), timetable_id))
+            except ValueError:
+                continue
+        conn.executemany('UPDATE user_timetables SET schedule_blob = ?, schedule_data = NULL WHERE id = ?', updates)
+        conn.commit()
+        migrated += len(updates)
+        last_id = rows[-1][0]
+
+def list_timetables(conn, user_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                    before_id: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+    """One page of a user's saved timetables, newest first, and the cursor for the next page
+
+    Keyset pagination: the cursor is the last id of the page, so each page is an index
+    range scan however deep the user pages.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = f"SELECT {', '.join(LISTING_COLUMNS)} FROM user_timetables WHERE user_id = ?"
+    args = [user_id]
+    if before_id is not None:
+        query += ' AND id < ?'
+        args.append(before_id)
+    rows = conn.execute(query + ' ORDER BY id DESC LIMIT ?', args + [limit + 1]).fetchall()
+    page = [dict(row) for row in rows[:limit]]
+    next_cursor = page[-1]['id'] if len(rows) > limit else None
+    return page, next_cursor
+
+def get_timetable(conn, user_id: int, timetable_id: int) -> Optional[Dict]:
+    """A saved timetable with its decoded schedule, or None if the user has no such timetable"""
+    row = conn.execute(f'''
+        SELECT {', '.join(LISTING_COLUMNS)}, revision, schedule_blob, schedule_data FROM user_timetables
+        WHERE id = ? AND user_id = ?
+    ''', (timetable_id, user_id)).fetchone()
+    if not row:
+        return None
+    timetable = dict(row)
+    timetable['schedule'] = decode_schedule(timetable.pop('schedule_blob'), timetable.pop('schedule_data'))
+    return timetable
+
+def load_schedule(conn, timetable_id: int) -> Optional[List[Dict]]:
+    """Schedule rows of any saved timetable, or None if it does not exist"""
+    row = conn.execute('SELECT schedule_blob, schedule_data FROM user_timetables WHERE id = ?',
+                       (timetable_id,)).fetchone()
+    return decode_schedule(row[0], row[1]) if row else None
+
+def timetable_revision(conn, user_id: int, timetable_id: int) -> Optional[int]:
+    """Edit revision of one of the user's saved timetables, or None if there is no such timetable"""
+    row = conn.execute('SELECT revision FROM user_timetables WHERE id = ? AND user_id = ?',
+                       (timetable_id, user_id)).fetchone()
+    return row[0] if row else None
+
+def store_edited_schedule(conn, timetable_id: int, schedule: List[Dict], revision: int) -> bool:
+    """Write an edited schedule as revision + 1, unless the stored revision is no longer revision"""
+    updated = conn.execute('''
+        UPDATE user_timetables SET schedule_blob = ?, schedule_data = NULL, entry_count = ?, revision = revision + 1
+        WHERE id = ? AND revision = ?
+    ''', (encode_schedule(schedule), len(schedule), timetable_id, revision)).rowcount
+    conn.commit()
+    return bool(updated)
+
+def filter_schedule(schedule: List[Dict], filters: Dict[str, int]) -> List[Dict]:
+    """Schedule rows matching every {row field: id} filter"""
+    if not filters:
+        return schedule
+    return [entry for entry in schedule if all(entry.get(field) == value for field, value in filters.items())]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Migrate saved timetables to compressed storage')
+    parser.add_argument('command', choices=['migrate'])
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--vacuum', action='store_true', help='rebuild the database file to reclaim freed space')
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(args.db)
+    ensure_timetable_schema(conn)
+    migrated = migrate_schedules(conn)
+    print(f"✅ Migrated {migrated} saved timetable(s) to compressed storage")
+    if args.vacuum:
+        conn.execute('VACUUM')
+        print("🧹 Database vacuumed")
+    conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
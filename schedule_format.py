@@ -0,0 +1,79 @@
+"""Schedule row encodings for API responses
+
+The default format is one dict per class session with every label repeated. The
+columnar format lists each division, subject, faculty member, room and timeslot once
+and encodes sessions as rows of integer indexes into those tables:
+
+    {'format': 'columnar',
+     'columns': ['division', 'subject', 'faculty', 'room', 'timeslot'],
+     'tables': {'division': [{'id': 1, 'name': 'FY-A'}, ...], ...},
+     'rows': [[0, 2, 1, 0, 7], ...]}
+"""
+from typing import Dict, Iterable, List
+
+COLUMNAR = 'columnar'
+FORMATS = ('rows', COLUMNAR)
+
+# Table -> (id field, row fields kept in that table's entries as {entry key: row key})
+COLUMNS = {
+    'division': ('divisionId', {'name': 'division'}),
+    'subject': ('subjectId', {'label': 'subject', 'code': 'subjectCode', 'name': 'subjectName', 'type': 'type'}),
+    'faculty': ('facultyId', {'name': 'faculty'}),
+    'room': ('roomId', {'label': 'room'}),
+    'timeslot': ('timeslotId', {'day': 'day', 'time': 'timeSlot'}),
+}
+
+def index_by_id(records: Iterable[Dict]) -> Dict[int, Dict]:
+    """id -> record map, built once per data snapshot instead of scanning per lookup"""
+    return {record['id']: record for record in records}
+
+def to_columnar(schedule: List[Dict]) -> Dict:
+    """Encode schedule rows as entity tables plus integer-index rows"""
+    tables = {table: [] for table in COLUMNS}
+    positions = {table: {} for table in COLUMNS}
+    rows = []
+    for entry in schedule:
+        row = []
+        for table, (id_field, fields) in COLUMNS.items():
+            # Rows saved before ids were included are keyed by their labels
+            key = entry.get(id_field)
+            if key is None:
+                key = tuple(entry.get(field) for field in fields.values())
+            index = positions[table].get(key)
+            if index is None:
+                index = positions[table][key] = len(tables[table])
+                item = {'id': entry.get(id_field)}
+                item.update((name, entry.get(field)) for name, field in fields.items())
+                tables[table].append(item)
+            row.append(index)
+        rows.append(row)
+    return {'format': COLUMNAR, 'columns': list(COLUMNS), 'tables': tables, 'rows': rows}
+
+def from_columnar(data: Dict) -> List[Dict]:
+    """Expand a to_columnar() encoding back into schedule rows"""
+    expanded = {table: [] for table in COLUMNS}
+    for table, (id_field, fields) in COLUMNS.items():
+        for item in data['tables'][table]:
+            values = {field: item.get(name) for name, field in fields.items()}
+            if item.get('id') is not None:
+                values[id_field] = item['id']
+            expanded[table].append(values)
+
+    columns = data.get('columns', list(COLUMNS))
+    schedule = []
+    for row in data['rows']:
+        entry = {}
+        for table, index in zip(columns, row):
+            entry.update(expanded[table][index])
+        schedule.append(entry)
+    return schedule
+
+def format_schedule(schedule, fmt: str):
+    """Schedule rows in the requested response format ('rows' returns them unchanged)"""
+    return to_columnar(schedule) if fmt == COLUMNAR and isinstance(schedule, list) else schedule
+
+def parse_schedule(schedule) -> List[Dict]:
+    """Schedule rows from a request body that may use either format"""
+    if isinstance(schedule, dict) and schedule.get('format') == COLUMNAR:
+        return from_columnar(schedule)
+    return schedule or []
@@ -6,6 +6,22 @@ window.switchToSignup = switchToSignup;
 window.handleLogin = handleLogin;
 window.handleSignup = handleSignup;
 window.checkAuth = checkAuth;
+window.loadBootstrap = loadBootstrap;
+
+// One /api/bootstrap request per page load (current user plus all entity collections),
+// shared by everything that needs the user or the data
+let bootstrapRequest = null;
+function loadBootstrap() {
+    if (!bootstrapRequest) {
+        bootstrapRequest = fetch('http://localhost:5000/api/bootstrap', {
+            credentials: 'include'
+        }).then(response => response.json()).catch(error => {
+            bootstrapRequest = null;
+            throw error;
+        });
+    }
+    return bootstrapRequest;
+}
 
 // Switch forms
 function switchToLogin() {
@@ -118,11 +134,7 @@ async function handleSignup(event) {
 // Check auth status
 async function checkAuth() {
     try {
-        const response = await fetch('http://localhost:5000/api/auth/me', {
-            credentials: 'include'
-        });
-        
-        const data = await response.json();
+        const data = await loadBootstrap();
         
         if (data.success && data.user) {
             console.log('✅ User authenticated:', data.user.username);
@@ -1,5 +1,8 @@
 console.log('📊 Dashboard.js loading...');
 
+// Job currently being generated, so it can be stopped from the progress panel
+let currentJobId = null;
+
 // ===== GENERATE TIMETABLE =====
 async function generateSchedule() {
     console.log('🚀 generateSchedule called!');
@@ -20,6 +23,7 @@ async function generateSchedule() {
     const populationSize = parseInt(document.getElementById('population-size')?.value || 50);
     const generations = parseInt(document.getElementById('generations')?.value || 100);
     const mutationRate = parseFloat(document.getElementById('mutation-rate')?.value || 0.1);
+    const maxSeconds = parseFloat(document.getElementById('max-seconds')?.value) || null;
     
     console.log(`📊 Config: Division=${divisionId}, Pop=${populationSize}, Gen=${generations}, Mut=${mutationRate}`);
     
@@ -28,18 +32,21 @@ async function generateSchedule() {
     const results = document.getElementById('results');
     if (progress) progress.classList.remove('hidden');
     if (results) results.classList.add('hidden');
+    resetProgress();
     
     try {
         console.log('📡 Sending request to backend...');
         
-        const response = await fetch('http://localhost:5000/api/timetable/generate', {
+        const response = await fetch('http://localhost:5000/api/timetable/jobs', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
+            credentials: 'include',
             body: JSON.stringify({
                 divisionId: parseInt(divisionId),
                 populationSize,
                 generations,
-                mutationRate
+                mutationRate,
+                maxSeconds
             })
         });
         
@@ -51,7 +58,12 @@ async function generateSchedule() {
             throw new Error(`Server error ${response.status}`);
         }
         
-        const data = await response.json();
+        const { job_id: jobId } = await response.json();
+        console.log(`🧾 Generation job queued: ${jobId}`);
+        
+        currentJobId = jobId;
+        const data = await waitForJob(jobId);
+        currentJobId = null;
         console.log('✅ Data received:', data);
         
         if (progress) progress.classList.add('hidden');
@@ -86,6 +98,7 @@ async function generateSchedule() {
         }
         
     } catch (error) {
+        currentJobId = null;
         console.error('❌ Generation failed:', error);
         if (progress) progress.classList.add('hidden');
         alert(`Failed to generate timetable!\n\n${error.message}\n\nCheck:\n1. Flask server running\n2. Browser console (F12) for details`);
@@ -94,6 +107,99 @@ async function generateSchedule() {
     return false;
 }
 
+// ===== POLL GENERATION JOB =====
+async function fetchJobResult(jobId) {
+    const response = await fetch(`http://localhost:5000/api/timetable/jobs/${jobId}`, {
+        credentials: 'include'
+    });
+    if (!response.ok) {
+        throw new Error(`Server error ${response.status}`);
+    }
+    
+    const { job } = await response.json();
+    return job;
+}
+
+async function waitForJob(jobId, intervalMs = 1000) {
+    if (typeof EventSource !== 'undefined') {
+        await streamJobProgress(jobId);
+    }
+    
+    while (true) {
+        const job = await fetchJobResult(jobId);
+        if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+            return job.result || { success: false, error: job.error };
+        }
+        
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+// ===== STOP GENERATION =====
+async function stopGeneration() {
+    if (!currentJobId) return;
+    
+    console.log(`⏹️ Stopping job ${currentJobId}...`);
+    const text = document.querySelector('#progress p');
+    if (text) text.textContent = 'Stopping... keeping the best timetable so far';
+    
+    try {
+        await fetch(`http://localhost:5000/api/timetable/jobs/${currentJobId}`, {
+            method: 'DELETE',
+            credentials: 'include'
+        });
+    } catch (error) {
+        console.error('❌ Stop failed:', error);
+    }
+}
+
+// ===== LIVE PROGRESS (SSE) =====
+function streamJobProgress(jobId) {
+    return new Promise(resolve => {
+        const source = new EventSource(`http://localhost:5000/api/timetable/jobs/${jobId}/events`, {
+            withCredentials: true
+        });
+        
+        source.addEventListener('progress', (e) => {
+            updateProgress(JSON.parse(e.data));
+        });
+        
+        source.addEventListener('done', () => {
+            source.close();
+            resolve();
+        });
+        
+        // Fall back to polling if the stream cannot be kept open
+        source.onerror = () => {
+            console.warn('⚠️ Progress stream interrupted, falling back to polling');
+            source.close();
+            resolve();
+        };
+    });
+}
+
+function resetProgress() {
+    const fill = document.querySelector('#progress .progress-fill');
+    const text = document.querySelector('#progress p');
+    if (fill) fill.style.width = '0%';
+    if (text) text.textContent = 'Generating optimal schedule...';
+}
+
+function updateProgress(event) {
+    const fill = document.querySelector('#progress .progress-fill');
+    const text = document.querySelector('#progress p');
+    
+    if (fill) fill.style.width = `${event.progress}%`;
+    if (!text) return;
+    
+    if (event.type === 'generation') {
+        text.textContent = `Generation ${event.generation}/${event.total} · ` +
+            `Best ${event.best_fitness} · Avg ${event.avg_fitness} · Conflicts ${event.conflicts}`;
+    } else {
+        text.textContent = `Backtracking... ${event.progress}%`;
+    }
+}
+
 // ===== DISPLAY RESULTS =====
 function displayResults(data) {
     console.log('📊 Displaying results...');
@@ -137,6 +243,11 @@ document.addEventListener('DOMContentLoaded', function() {
     } else {
         console.warn('⚠️ Generate button not found yet');
     }
+    
+    const stopBtn = document.getElementById('stop-generation-btn');
+    if (stopBtn) {
+        stopBtn.addEventListener('click', stopGeneration);
+    }
 });
 
 // Also make it globally available as backup
@@ -9,10 +9,7 @@ window.handleHeaderLogout = handleHeaderLogout;
 // Check auth status and update header button
 async function updateHeaderAuth() {
 	try {
-		const response = await fetch('http://localhost:5000/api/auth/me', {
-			credentials: 'include'
-		});
-		const data = await response.json();
+		const data = await window.loadBootstrap();
 		
 		const authBtn = document.getElementById('headerAuthBtn');
 		
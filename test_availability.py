@@ -0,0 +1,122 @@
+"""Unit tests for faculty availability masks and timeslot grid generation"""
+from availability import (decode_mask, drop_bits, encode_mask, faculty_slot_ids, grid_timeslots, load_availability,
+                          mask_bits, mask_from_pairs, slot_lookup)
+from bulk_import import delete_many, insert_many
+from data_handler import get_db_connection
+
+def add_timeslots(conn, count):
+    return insert_many(conn, 'timeslots', [
+        {'day': 'Monday', 'start_time': f'{9 + i:02d}:00', 'end_time': f'{10 + i:02d}:00', 'description': ''}
+        for i in range(count)])
+
+def add_faculty(conn, mask):
+    return insert_many(conn, 'faculty', [{
+        'name': 'A', 'employee_id': 'E1', 'department': 'CS', 'email': None, 'max_hours': 20, 'year': 'SE',
+        'availability_bits': encode_mask(mask), 'subjects': [], 'divisions': []}])[0]
+
+def availability(conn, faculty_id):
+    timeslots = {row['id']: dict(row) for row in conn.execute('SELECT * FROM timeslots')}
+    row = conn.execute('SELECT * FROM faculty WHERE id = ?', (faculty_id,)).fetchone()
+    return load_availability(conn, row, timeslots)
+
+def test_mask_round_trip():
+    mask = (1 << 70) | (1 << 3) | 1
+    assert decode_mask(encode_mask(mask)) == mask
+    assert mask_bits(mask) == [0, 3, 70]
+    assert decode_mask(None) == 0
+
+def test_drop_bits_shifts_higher_bits_down():
+    assert drop_bits(0b10110, [1]) == 0b1010
+    assert drop_bits(0b10110, [0, 4]) == 0b011
+
+def test_mask_bits_are_positions_not_ids(db_path):
+    conn = get_db_connection(db_path)
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('timeslots', 1000)")
+    ids = add_timeslots(conn, 3)
+    lookup = slot_lookup(conn.execute('SELECT id, day, start_time, end_time FROM timeslots'))
+
+    mask, unknown = mask_from_pairs([('Monday', '10:00-11:00'), ('Monday', '12:00-13:00')], lookup)
+
+    assert ids[0] > 1000
+    assert (mask, unknown) == (0b10, ['12:00-13:00'])
+    faculty_id = add_faculty(conn, mask)
+    assert availability(conn, faculty_id) == (['Monday'], {'Monday': ['10:00-11:00']}, [ids[1]])
+    conn.close()
+
+def test_deleting_timeslots_compacts_masks(db_path):
+    conn = get_db_connection(db_path)
+    ids = add_timeslots(conn, 4)
+    faculty_id = add_faculty(conn, 0b1101)
+    conn.commit()
+
+    delete_many(conn, 'timeslots', [ids[0]])
+    delete_many(conn, 'timeslots', [ids[2]])
+
+    mask = conn.execute('SELECT availability_bits FROM faculty').fetchone()[0]
+    assert decode_mask(mask) == 0b10
+    assert availability(conn, faculty_id)[2] == [ids[3]]
+    conn.close()
+
+def test_delete_timeslot_endpoint_compacts_masks(client):
+    conn = get_db_connection()
+    ids = add_timeslots(conn, 3)
+    add_faculty(conn, 0b110)
+    conn.commit()
+    conn.close()
+
+    assert client.delete(f'/api/timeslots/{ids[1]}').get_json()['success']
+
+    conn = get_db_connection()
+    assert decode_mask(conn.execute('SELECT availability_bits FROM faculty').fetchone()[0]) == 0b10
+    conn.close()
+
+def test_grid_timeslots_skips_breaks():
+    records = grid_timeslots(['Monday', 'Tuesday'], '09:00', '13:00', 60, [('11:00', '11:30')], 'Lecture')
+
+    assert [(r['start_time'], r['end_time']) for r in records[:3]] == [
+        ('09:00', '10:00'), ('10:00', '11:00'), ('11:30', '12:30')]
+    assert len(records) == 6 and records[3]['day'] == 'Tuesday'
+    assert records[0]['description'] == 'Lecture'
+
+def test_grid_endpoint_keeps_existing_periods(client):
+    payload = {'days': ['monday'], 'startTime': '09:00', 'endTime': '11:00', 'periodMinutes': 60}
+
+    first = client.post('/api/timeslots/grid', json=payload).get_json()
+    second = client.post('/api/timeslots/grid', json=payload).get_json()
+
+    assert (first['created'], second['created'], second['skipped']) == (2, 0, 2)
+    assert client.post('/api/timeslots/grid', json={**payload, 'days': ['Funday']}).status_code == 400
+
+TIMESLOTS = [{'id': 4, 'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00'},
+             {'id': 6, 'day': 'Tuesday', 'start_time': '09:00', 'end_time': '10:00'}]
+
+def test_faculty_slot_ids_prefers_loaded_ids():
+    by_strings = {'available_days': ['Tuesday'], 'available_time_slots': {'Tuesday': ['09:00-10:00']}}
+
+    assert faculty_slot_ids(by_strings, TIMESLOTS) == {6}
+    assert faculty_slot_ids(dict(by_strings, available_slot_ids=[4]), TIMESLOTS) == {4}
+
+def test_faculty_without_a_mask_reads_the_legacy_rows(db_path):
+    conn = get_db_connection(db_path)
+    ids = add_timeslots(conn, 2)
+    faculty_id = insert_many(conn, 'faculty', [{
+        'name': 'A', 'employee_id': 'E1', 'department': 'CS', 'email': None, 'max_hours': 20, 'year': 'SE',
+        'availability_bits': None, 'subjects': [], 'divisions': []}])[0]
+    conn.execute("INSERT INTO faculty_availability (faculty_id, day) VALUES (?, 'Monday')", (faculty_id,))
+    conn.execute("INSERT INTO faculty_timeslots (faculty_id, day, time_slot) VALUES (?, 'Monday', '10:00-11:00')",
+                 (faculty_id,))
+
+    assert availability(conn, faculty_id) == (['Monday'], {'Monday': ['10:00-11:00']}, [ids[1]])
+    conn.close()
+
+def test_availability_endpoint_returns_slot_ids(client):
+    conn = get_db_connection()
+    ids = add_timeslots(conn, 2)
+    faculty_id = add_faculty(conn, 0b10)
+    conn.commit()
+    conn.close()
+
+    body = client.get(f'/api/faculty/{faculty_id}/availability').get_json()
+
+    assert body['available_slot_ids'] == [ids[1]]
+    assert body['available_slots'] == {'Monday': ['10:00-11:00']}
@@ -0,0 +1,29 @@
+"""Unit tests for the backtracking solver"""
+import sqlite3
+from backtracking import BacktrackingSolver
+from benchmarks.synthetic import make_dataset, write_database
+
+def test_schedules_standalone_subjects(tmp_path):
+    # Synthetic subjects, like single-component subjects created through the API, have is_component 0
+    db_path = str(tmp_path / 'timetable.db')
+    data = make_dataset(divisions=2, subjects_per_division=2, hours_per_week=2, faculty=3, rooms=2,
+                        days=2, periods_per_day=4)
+    write_database(data, db_path)
+
+    assignments, subjects, *_ = BacktrackingSolver(db_path).solve()
+
+    assert {s['id'] for s in subjects} == {s['id'] for s in data['subjects']}
+    assert len(assignments) == 2 * 2 * 2
+
+def test_skips_parent_subjects(tmp_path):
+    db_path = str(tmp_path / 'timetable.db')
+    write_database(make_dataset(divisions=1, subjects_per_division=1, hours_per_week=1, faculty=1, rooms=1,
+                                days=1, periods_per_day=2), db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO subjects (code, name, hours_per_week, type) VALUES ('P', 'Parent', 0, 'parent')")
+    conn.commit()
+    conn.close()
+
+    subjects = BacktrackingSolver(db_path).get_data()[0]
+
+    assert 'parent' not in {s['type'] for s in subjects}
@@ -0,0 +1,37 @@
+"""Unit tests for the combined /api/bootstrap endpoint"""
+from data_handler import fetch_all_data, get_db_connection
+
+def add_room(number):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO rooms (number, building, capacity, type) VALUES (?, 'Main', 40, 'classroom')", (number,))
+    conn.commit()
+    conn.close()
+
+def test_returns_user_and_every_collection(client):
+    add_room('R1')
+
+    body = client.get('/api/bootstrap').get_json()
+
+    assert body['success'] and body['user']['username'] == 'tester'
+    assert body['data'] == fetch_all_data()
+
+def test_revalidates_until_the_data_changes(client):
+    first = client.get('/api/bootstrap')
+    etag = first.headers['ETag']
+
+    repeat = client.get('/api/bootstrap', headers={'If-None-Match': etag})
+    add_room('R2')
+    changed = client.get('/api/bootstrap', headers={'If-None-Match': etag})
+
+    assert repeat.status_code == 304
+    assert changed.status_code == 200
+    assert [room['number'] for room in changed.get_json()['data']['rooms']] == ['R2']
+    assert changed.get_json()['data_version'] != first.get_json()['data_version']
+
+def test_etag_differs_after_logout(client):
+    etag = client.get('/api/bootstrap').headers['ETag']
+    client.post('/api/auth/logout')
+
+    response = client.get('/api/bootstrap', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200 and response.get_json()['user'] is None
@@ -0,0 +1,76 @@
+"""Unit tests for the branch and bound optimizer and its generation entry point"""
+import itertools
+import random
+from benchmarks.synthetic import make_dataset, write_database
+from constraint_handler import BranchAndBoundOptimizer
+from constraints import ProblemIndex, compile_constraints
+from generation import run_generation
+from init_db import init_database
+
+def random_problem(rng):
+    slots = [{'id': i + 1, 'day': day, 'start_time': f"{9 + period:02d}:00", 'end_time': f"{10 + period:02d}:00"}
+             for i, (day, period) in enumerate(itertools.product(['Monday', 'Tuesday'], range(3)))]
+    subjects = [{'id': 1, 'name': 'S1', 'hours_per_week': rng.randint(1, 2)},
+                {'id': 2, 'name': 'S2', 'hours_per_week': 1}]
+    divisions = [{'id': 1, 'name': 'A', 'student_count': rng.choice([30, 45, 60]), 'subjects': [1, 2]},
+                 {'id': 2, 'name': 'B', 'student_count': rng.choice([30, 45, 60]), 'subjects': [2]}]
+    faculty = [{'id': f, 'name': f"F{f}", 'max_hours': rng.randint(1, 4), 'available_days': ['Monday', 'Tuesday'],
+                'available_slot_ids': rng.sample(range(1, 7), 3), 'subjects': [1, 2], 'divisions': [1, 2]}
+               for f in (1, 2)]
+    rooms = [{'id': r, 'number': f"R{r}", 'capacity': rng.choice([25, 40, 70])} for r in (1, 2)]
+    return ProblemIndex(subjects, faculty, rooms, slots, divisions)
+
+def brute_force_best(constraints, optimizer):
+    """Best registry score over every combination of statically valid class placements"""
+    classes = optimizer.classes()
+    choices = {key: [gene for _, gene in optimizer._candidates(*key)] for key in set(classes)}
+    best = None
+    for combination in itertools.product(*[choices[key] for key in classes]):
+        state = constraints.new_state()
+        for gene in combination:
+            if not constraints.is_valid(state, gene):
+                break
+            state.add(gene)
+        else:
+            score, _ = constraints.evaluate(list(combination))
+            best = score if best is None else max(best, score)
+    return best
+
+def test_branch_and_bound_matches_brute_force():
+    rng = random.Random(5)
+    solved = 0
+    for _ in range(30):
+        constraints = compile_constraints(random_problem(rng))
+        optimizer = BranchAndBoundOptimizer(constraints)
+
+        genes = optimizer.optimize()
+
+        assert optimizer.proved_optimal
+        found = constraints.evaluate(genes)[0] if genes is not None else None
+        assert found == brute_force_best(constraints, optimizer)
+        solved += genes is not None
+    assert solved >= 10
+
+def synthetic_database(tmp_path, **shape):
+    path = str(tmp_path / 'timetable.db')
+    init_database(path)
+    write_database(make_dataset(**shape), path)
+    return path
+
+def test_run_generation_dispatches_branch_and_bound(tmp_path):
+    path = synthetic_database(tmp_path, divisions=2, subjects_per_division=2, hours_per_week=2, faculty=3,
+                              rooms=2, days=2, periods_per_day=3)
+
+    payload, status = run_generation({'algorithm': 'branch_and_bound', 'useCache': False}, path)
+
+    assert status == 200 and payload['algorithm'] == 'Branch and Bound'
+    assert len(payload['schedule']) == 8 and payload['conflict_count'] == 0
+    assert payload['generation_stats']['proved_optimal']
+
+def test_branch_and_bound_refuses_large_datasets(tmp_path):
+    path = synthetic_database(tmp_path, divisions=6, subjects_per_division=4, hours_per_week=2, faculty=6,
+                              rooms=4, days=5, periods_per_day=4)
+
+    payload, status = run_generation({'algorithm': 'branch_and_bound', 'useCache': False}, path)
+
+    assert status == 400 and 'limited to 40 classes' in payload['error']
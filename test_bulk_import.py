@@ -0,0 +1,63 @@
+"""Unit tests for streaming CSV import and batch create/delete"""
+import io
+from bulk_import import create_batch, delete_many, import_csv
+from data_handler import get_db_connection
+
+def rows(db_path, query, args=()):
+    conn = get_db_connection(db_path)
+    result = [tuple(row) for row in conn.execute(query, args)]
+    conn.close()
+    return result
+
+def test_csv_import_skips_invalid_rows_and_resolves_earlier_batches(db_path):
+    subjects = io.StringIO('code,name,hours_per_week,type\nCS1,Algorithms,3,theory\nCS2,Bad,0,theory\n'
+                           'CS3,Networks,2,lab\n')
+    summary = import_csv(subjects, 'subjects', db_path, batch_size=1)
+
+    assert (summary['imported'], summary['rejected'], summary['batches']) == (2, 1, 3)
+    assert summary['errors'][0]['line'] == 3
+
+    divisions = io.StringIO('name,year,student_count,subjects\nA,FY,40,CS1;CS3\nB,FY,30,CS9\n')
+    summary = import_csv(divisions, 'divisions', db_path)
+    assert (summary['imported'], summary['rejected']) == (1, 1)
+    assert sorted(rows(db_path, 'SELECT subject_id FROM division_subjects')) == [(1,), (2,)]
+
+def test_create_batch_writes_nothing_when_any_item_is_invalid(db_path):
+    conn = get_db_connection(db_path)
+    ids, errors = create_batch(conn, 'rooms', [{'number': 'R1', 'capacity': 40}, {'number': 'R2', 'capacity': -1}])
+    assert ids == [] and errors[0]['index'] == 1
+    ids, errors = create_batch(conn, 'rooms', [{'number': 'R1', 'capacity': 40}, {'number': 'R2', 'capacity': 60}])
+    conn.close()
+
+    assert errors == [] and ids == [1, 2]
+    assert rows(db_path, 'SELECT number FROM rooms ORDER BY id') == [('R1',), ('R2',)]
+
+def test_deleting_a_parent_subject_removes_its_components_junction_rows(db_path):
+    conn = get_db_connection(db_path)
+    conn.execute("INSERT INTO subjects (id, code, name, hours_per_week, type) VALUES (1, 'P', 'Parent', 4, 'parent')")
+    conn.execute("INSERT INTO subjects (id, code, name, hours_per_week, type, parent_subject_id, is_component) "
+                 "VALUES (2, 'PT', 'Theory', 3, 'theory', 1, 1)")
+    conn.execute("INSERT INTO subjects (id, code, name, hours_per_week, type) VALUES (3, 'O', 'Other', 2, 'theory')")
+    conn.execute("INSERT INTO faculty (id, name, employee_id) VALUES (1, 'Ada', 'E1')")
+    conn.execute("INSERT INTO divisions (id, name, year, student_count) VALUES (1, 'A', 'FY', 40)")
+    conn.executemany('INSERT INTO faculty_subjects (faculty_id, subject_id) VALUES (1, ?)', [(1,), (2,), (3,)])
+    conn.executemany('INSERT INTO division_subjects (division_id, subject_id) VALUES (1, ?)', [(1,), (2,), (3,)])
+    conn.commit()
+
+    assert delete_many(conn, 'subjects', [1]) == 1
+    conn.close()
+
+    assert rows(db_path, 'SELECT id FROM subjects') == [(3,)]
+    assert rows(db_path, 'SELECT subject_id FROM faculty_subjects') == [(3,)]
+    assert rows(db_path, 'SELECT subject_id FROM division_subjects') == [(3,)]
+
+def test_data_handler_streams_a_csv_file_into_the_database(db_path, tmp_path):
+    from data_handler import DataHandler
+    path = tmp_path / 'rooms.csv'
+    # Spreadsheet exports often start with a byte order mark
+    path.write_text('\ufeffnumber,building,capacity,type\nR1,Main,40,classroom\nL1,Lab block,30,lab\n', encoding='utf-8')
+
+    summary = DataHandler().import_csv_to_db(str(path), 'rooms', db_path)
+
+    assert summary['imported'] == 2
+    assert rows(db_path, 'SELECT number, type FROM rooms ORDER BY id') == [('R1', 'classroom'), ('L1', 'lab')]
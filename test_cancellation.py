@@ -0,0 +1,66 @@
+"""Unit tests for cooperative cancellation and time-budgeted generation runs"""
+from backtracking import BacktrackingSolver
+from cancellation import CancellationToken
+from data_handler import fetch_all_data, get_db_connection
+from genetic_algorithm import GeneticAlgorithm
+
+def cancelled_token():
+    token = CancellationToken()
+    token.cancel()
+    return token
+
+def test_token_reports_cancel_before_timeout():
+    token = CancellationToken()
+    assert token.stop_reason() is None and token.deadline is None
+
+    expired = CancellationToken(max_seconds=1e-9)
+    assert expired.is_expired() and expired.stop_reason() == 'timeout'
+
+    expired.cancel()
+    assert expired.stop_reason() == 'cancelled'
+
+def test_backtracking_returns_partial_schedule_when_cancelled(db_path, sample_problem):
+    sample_problem(db_path)
+    solver = BacktrackingSolver(db_path)
+
+    assignments, *_ = solver.solve(cancel_token=cancelled_token())
+
+    assert solver.stopped_reason == 'cancelled'
+    assert len(assignments) < 2
+
+def test_evolution_stops_after_the_current_generation(db_path, sample_problem):
+    sample_problem(db_path)
+    data = fetch_all_data(db_path)
+    ga = GeneticAlgorithm()
+    ga.population_size = 6
+
+    best, history = ga.evolve(data['subjects'], data['faculty'], data['rooms'], data['timeslots'],
+                              data['divisions'], cancel_token=cancelled_token())
+
+    assert ga.stopped_reason == 'cancelled'
+    assert len(history) == 1 and best is not None
+
+def test_generation_reports_timeout(client, sample_problem):
+    sample_problem('timetable.db')
+
+    payload = client.post('/api/timetable/generate', json={
+        'algorithm': 'genetic', 'maxSeconds': 1e-9, 'populationSize': 6}).get_json()
+
+    assert payload['success'] and payload['stopped_early'] == 'timeout'
+
+def insert_job(job_id, status, user_id=1):
+    conn = get_db_connection()
+    conn.execute('INSERT INTO generation_jobs (id, user_id, status) VALUES (?, ?, ?)', (job_id, user_id, status))
+    conn.commit()
+    conn.close()
+
+def test_cancel_endpoint(client):
+    insert_job('queued', 'queued')
+    insert_job('running', 'running')
+    insert_job('done', 'completed')
+    insert_job('other', 'queued', user_id=2)
+
+    assert client.delete('/api/timetable/jobs/queued').get_json()['status'] == 'cancelled'
+    assert client.delete('/api/timetable/jobs/running').get_json()['status'] == 'cancelling'
+    assert client.delete('/api/timetable/jobs/done').status_code == 409
+    assert client.delete('/api/timetable/jobs/other').status_code == 404
@@ -0,0 +1,141 @@
+"""Unit tests for the constraint registry and the models.py classes scored through it"""
+import pytest
+from constraint_handler import ConstraintHandler
+from constraints import ProblemIndex, compile_constraints, day_gaps, slot_periods
+from fitness_function import FitnessEvaluator, registry_weights
+from genetic_algorithm import TimetableGene
+from models import Faculty, Room, Schedule, ScheduleEntry, Subject, TimeSlot
+
+def test_day_gaps_counts_idle_periods_between_first_and_last_class():
+    assert day_gaps(0) == 0
+    assert day_gaps(0b1) == 0
+    assert day_gaps(0b111) == 0
+    assert day_gaps(0b101) == 1
+    assert day_gaps(0b1000100) == 3
+    assert day_gaps(0b1011000) == 1
+
+def test_day_gaps_matches_a_scan_of_the_bits():
+    for mask in range(1, 1 << 10):
+        bits = [period for period in range(10) if mask >> period & 1]
+        assert day_gaps(mask) == bits[-1] - bits[0] + 1 - len(bits)
+
+def test_slot_periods_orders_each_day_by_start_time():
+    slots = [
+        {'id': 7, 'day': 'Monday', 'start_time': '11:00'},
+        {'id': 3, 'day': 'Monday', 'start_time': '09:00'},
+        {'id': 5, 'day': 'Monday', 'start_time': '10:00'},
+        {'id': 4, 'day': 'Tuesday', 'start_time': '14:00'},
+    ]
+    assert slot_periods(slots) == {3: 0, 5: 1, 7: 2, 4: 0}
+
+def test_room_fit_penalises_only_undersized_rooms():
+    from constraints import empty_seats_penalty, room_fit_penalty
+    assert room_fit_penalty(capacity=30, student_count=55) == 2
+    assert room_fit_penalty(capacity=80, student_count=30) == 0
+    assert empty_seats_penalty(capacity=80, student_count=30) == 5
+    assert empty_seats_penalty(capacity=30, student_count=55) == 0
+
+SLOTS = [{'id': 1, 'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00'},
+         {'id': 2, 'day': 'Monday', 'start_time': '10:00', 'end_time': '11:00'},
+         {'id': 3, 'day': 'Monday', 'start_time': '11:00', 'end_time': '12:00'}]
+
+def make_index(max_hours=20, capacity=60):
+    subjects = [{'id': 1, 'name': 'Maths', 'hours_per_week': 2}]
+    faculty = [{'id': 1, 'name': 'Ada', 'max_hours': max_hours, 'available_days': ['Monday'],
+                'available_slot_ids': [1, 2, 3], 'subjects': [1], 'divisions': [1]}]
+    rooms = [{'id': 1, 'number': 'R1', 'capacity': capacity, 'type': 'classroom'}]
+    divisions = [{'id': 1, 'name': 'A', 'student_count': 40, 'subjects': [1]}]
+    return ProblemIndex(subjects, faculty, rooms, SLOTS, divisions)
+
+def gene(timeslot_id):
+    return TimetableGene(1, 1, 1, 1, timeslot_id)
+
+def test_weights_override_and_disable_constraints():
+    index = make_index(max_hours=1, capacity=20)
+    genes = [gene(1), gene(3)]
+
+    full, _ = compile_constraints(index, {'day_balance': 0}).evaluate(genes)
+    only_hard, _ = compile_constraints(index, {'day_balance': 0, 'student_gaps': 0, 'faculty_workload': 0,
+                                               'room_fit': 0}).evaluate(genes)
+
+    # Undersized room is a hard violation per class (30) plus a room fit cost of 2 units (5 each)
+    assert only_hard == 1000 - 2 * 30
+    # One gap (10), one hour over the maximum (10) and the room fit cost (2 classes x 2 units x 5)
+    assert full == only_hard - 10 - 10 - 20
+
+def test_unknown_or_negative_weights_are_rejected():
+    with pytest.raises(ValueError):
+        compile_constraints(make_index(), {'no_such_rule': 1})
+    with pytest.raises(ValueError):
+        compile_constraints(make_index(), {'room_fit': -1})
+
+def test_gap_bound_never_exceeds_the_gaps_left_after_placing_everything():
+    compiled = compile_constraints(make_index())
+    state = compiled.new_state()
+    state.add(gene(1))
+    state.add(gene(3))
+    student_gaps_bound = [bound for _, bound in compiled.bounds if bound.__name__ == '_student_gaps_bound'][0]
+
+    # Both required hours are placed, so the one gap stays
+    assert student_gaps_bound(compiled.index, state) == 1
+    state.remove(gene(3))
+    assert student_gaps_bound(compiled.index, state) == 0
+
+MONDAY = [TimeSlot(1, 'Monday', '09:00', '10:00'), TimeSlot(2, 'Monday', '10:00', '11:00')]
+
+MATHS = Subject(1, 'Maths', 'M1', 1, 2, 'lecture', 35)
+ROOMS = [Room(1, 'R1', 40, 'lecture'), Room(2, 'Lab', 40, 'lab'), Room(3, 'R3', 20, 'lecture')]
+
+def model_entry(slot, room=ROOMS[0]):
+    faculty = Faculty(1, 'Ada', 'CS', 1, available_slots=[1, 2])
+    return ScheduleEntry(MATHS, faculty, room, slot)
+
+def test_fitness_evaluator_scores_with_the_registry():
+    schedule = Schedule()
+    schedule.add_entry(model_entry(MONDAY[0]))
+    schedule.add_entry(model_entry(MONDAY[1]))
+
+    # One hour over the faculty maximum; everything else holds
+    assert FitnessEvaluator({'day_balance': 0}).evaluate(schedule) == 1000 - 10
+    assert FitnessEvaluator({'day_balance': 0, 'faculty_workload': 0}).evaluate(schedule) == 1000
+
+def test_fitness_evaluator_accepts_the_legacy_weight_names():
+    assert registry_weights({'hard_constraint': 1000, 'room_utilization': 5, 'student_gaps': 8, 'room_clash': 7}) == {
+        'student_gaps': 8, 'room_clash': 7, 'faculty_clash': 1000, 'room_fit': 5}
+    schedule = Schedule()
+    schedule.add_entry(model_entry(MONDAY[0]))
+    schedule.add_entry(model_entry(MONDAY[0]))  # faculty and room double-booked
+
+    legacy = FitnessEvaluator({'hard_constraint': 0}).evaluate(schedule)
+
+    assert legacy == FitnessEvaluator({'faculty_clash': 0, 'room_clash': 0}).evaluate(schedule)
+    assert legacy > FitnessEvaluator().evaluate(schedule)
+
+def test_constraint_handler_uses_the_registry_hard_constraints():
+    handler = ConstraintHandler(MONDAY, ROOMS, [Faculty(1, 'Ada', 'CS', 20, available_slots=[1])], [MATHS])
+    schedule = Schedule()
+
+    assert handler.is_valid_assignment(schedule, model_entry(MONDAY[0]))
+    assert not handler.is_valid_assignment(schedule, model_entry(MONDAY[1]))  # faculty unavailable
+    assert not handler.is_valid_assignment(schedule, model_entry(MONDAY[0], ROOMS[1]))  # wrong room type
+    assert not handler.is_valid_assignment(schedule, model_entry(MONDAY[0], ROOMS[2]))  # too small
+    schedule.add_entry(model_entry(MONDAY[0]))
+    assert not handler.is_valid_assignment(schedule, model_entry(MONDAY[0]))  # double-booked
+    # Disabling a hard constraint lifts it
+    relaxed = ConstraintHandler(MONDAY, ROOMS, [Faculty(1, 'Ada', 'CS', 20, available_slots=[1])], [MATHS],
+                                weights={'faculty_time': 0, 'faculty_day': 0})
+    assert relaxed.is_valid_assignment(Schedule(), model_entry(MONDAY[1]))
+
+def test_repair_moves_clashing_entries_and_drops_unplaceable_ones():
+    faculty = Faculty(1, 'Ada', 'CS', 20, available_slots=[1, 2])
+    handler = ConstraintHandler(MONDAY, ROOMS, [faculty], [MATHS])
+    schedule = Schedule()
+    for division_id in (7, 8, 9):
+        schedule.add_entry(ScheduleEntry(MATHS, faculty, ROOMS[0], MONDAY[0], division_id, f"D{division_id}"))
+
+    repaired = handler.repair_schedule(schedule)
+
+    # The faculty member has two available slots, so the third class has nowhere to go
+    assert [(e.division_id, e.division_name, e.time_slot.id) for e in repaired.entries] == [
+        (7, 'D7', 1), (8, 'D8', 2)]
+    assert repaired.get_conflicts_count() == 0
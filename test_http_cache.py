@@ -0,0 +1,53 @@
+"""Unit tests for data-version ETags, response compression and static cache headers"""
+import gzip
+from data_handler import get_db_connection
+
+def add_rows(sql, rows):
+    conn = get_db_connection()
+    conn.executemany(sql, rows)
+    conn.commit()
+    conn.close()
+
+def add_subjects(count, start=0):
+    add_rows('INSERT INTO subjects (code, name, hours_per_week, type) VALUES (?, ?, 3, ?)',
+             [(f'S{n}', f'Subject number {n} with a long enough name', 'theory') for n in range(start, start + count)])
+
+def test_etag_answers_304_until_the_table_changes(client):
+    first = client.get('/api/subjects')
+    etag = first.headers['ETag']
+
+    repeat = client.get('/api/subjects', headers={'If-None-Match': etag})
+    add_rows('INSERT INTO rooms (number, building, capacity, type) VALUES (?, ?, ?, ?)', [('R1', 'Main', 40, 'classroom')])
+    unrelated = client.get('/api/subjects', headers={'If-None-Match': etag})
+    add_subjects(1)
+    changed = client.get('/api/subjects', headers={'If-None-Match': etag})
+
+    assert etag.startswith('W/') and first.cache_control.no_cache
+    assert repeat.status_code == 304 and not repeat.get_data()
+    assert unrelated.status_code == 304
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+def test_large_json_is_gzipped_for_clients_that_accept_it(client):
+    add_subjects(30)
+
+    compressed = client.get('/api/subjects', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/api/subjects')
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert 'Content-Encoding' not in plain.headers
+
+def test_small_bodies_are_sent_uncompressed(client):
+    response = client.get('/api/subjects', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+
+def test_static_assets_are_cached_by_version(client):
+    versioned = client.get('/app.js?v=3')
+    unversioned = client.get('/app.js')
+    page = client.get('/')
+
+    assert versioned.cache_control.immutable and versioned.cache_control.max_age == 365 * 24 * 3600
+    assert unversioned.cache_control.max_age == 3600 and not unversioned.cache_control.no_cache
+    assert page.cache_control.no_cache
@@ -0,0 +1,154 @@
+"""Unit tests for the background generation job queue"""
+from data_handler import get_db_connection
+from job_queue import JobQueue
+
+def make_queue(db_path, monkeypatch, **kwargs):
+    """JobQueue whose dispatched job ids are recorded instead of run on the process pool"""
+    queue = JobQueue(db_path, **kwargs)
+    dispatched = []
+    monkeypatch.setattr(queue, '_dispatch', dispatched.append)
+    return queue, dispatched
+
+def insert_job(db_path, job_id, status, heartbeat_age=None, worker_pid=None):
+    """Job row whose worker last beat heartbeat_age seconds ago (never, if None)"""
+    conn = get_db_connection(db_path)
+    conn.execute("""
+        INSERT INTO generation_jobs (id, user_id, status, params, worker_pid, heartbeat_at)
+        VALUES (?, 1, ?, '{}', ?, CASE WHEN ? IS NULL THEN NULL ELSE datetime('now', '-' || ? || ' seconds') END)
+    """, (job_id, status, worker_pid, heartbeat_age, heartbeat_age))
+    conn.commit()
+    conn.close()
+
+def test_init_db_creates_job_and_cache_tables(db_path):
+    conn = get_db_connection(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert {'generation_jobs', 'job_events', 'result_cache'} <= tables
+
+def test_submit_persists_and_dispatches(db_path, monkeypatch):
+    queue, dispatched = make_queue(db_path, monkeypatch)
+    job_id = queue.submit(1, {'algorithm': 'genetic', 'seed': 3})
+
+    assert dispatched == [job_id]
+    job = queue.get(job_id)
+    assert job['status'] == 'queued'
+    assert job['params'] == {'algorithm': 'genetic', 'seed': 3}
+    assert queue.pending_count() == 1
+
+def test_submit_rejects_when_queue_is_full(db_path, monkeypatch):
+    queue, dispatched = make_queue(db_path, monkeypatch, max_queued=2)
+    assert queue.submit(1, {}) and queue.submit(1, {})
+    assert queue.submit(1, {}) is None
+    assert len(dispatched) == 2
+
+def test_recover_takes_back_only_stale_jobs(db_path, monkeypatch):
+    for job_id, status, age in [('queued', 'queued', None), ('dead', 'running', 300), ('live', 'running', 5),
+                                ('dead-cancel', 'cancelling', 300), ('live-cancel', 'cancelling', 5),
+                                ('done', 'completed', None)]:
+        insert_job(db_path, job_id, status, heartbeat_age=age, worker_pid=1)
+    queue, dispatched = make_queue(db_path, monkeypatch, stale_after=60)
+
+    assert queue.recover() == 2
+
+    assert dispatched == ['queued', 'dead']
+    assert [queue.status(job_id) for job_id in ('dead', 'live', 'dead-cancel', 'live-cancel', 'done')] == [
+        'queued', 'running', 'cancelled', 'cancelling', 'completed']
+    assert queue.get('dead')['worker_pid'] is None
+
+def test_recover_skips_jobs_another_process_took_back(db_path, monkeypatch):
+    insert_job(db_path, 'dead', 'running', heartbeat_age=300, worker_pid=1)
+    queue, dispatched = make_queue(db_path, monkeypatch, stale_after=60)
+    queue.recover()
+    # A worker of another process claims it before this one recovers again
+    conn = get_db_connection(db_path)
+    conn.execute("UPDATE generation_jobs SET status = 'running', worker_pid = 2, heartbeat_at = datetime('now')")
+    conn.commit()
+    conn.close()
+
+    queue.recover()
+
+    assert dispatched == ['dead'] and queue.get('dead')['worker_pid'] == 2
+
+def test_heartbeat_keeps_a_running_job_from_going_stale(db_path, monkeypatch):
+    import os
+    import time
+    from job_queue import JobHeartbeat
+    insert_job(db_path, 'a', 'running', heartbeat_age=300, worker_pid=os.getpid())
+    queue, dispatched = make_queue(db_path, monkeypatch, stale_after=60)
+
+    with JobHeartbeat(db_path, 'a', interval=0.01):
+        time.sleep(0.1)
+    queue.recover()
+
+    assert dispatched == [] and queue.status('a') == 'running'
+
+def test_worker_only_runs_and_finishes_jobs_it_claimed(db_path, monkeypatch):
+    import generation
+    from job_queue import _run_job
+    insert_job(db_path, 'taken', 'running', heartbeat_age=0, worker_pid=2)
+    insert_job(db_path, 'lost', 'queued')
+
+    def lose_job(params, db_path, **kwargs):
+        # Recovery hands the job to another worker while this one is still solving
+        conn = get_db_connection(db_path)
+        conn.execute("UPDATE generation_jobs SET worker_pid = 2 WHERE id = 'lost'")
+        conn.commit()
+        conn.close()
+        return {'success': True}, 200
+    monkeypatch.setattr(generation, 'run_generation', lose_job)
+    queue, _ = make_queue(db_path, monkeypatch)
+
+    assert _run_job('taken', db_path) is None
+    assert _run_job('lost', db_path) is None
+    assert queue.get('taken')['started_at'] is None
+    assert queue.get('lost')['status'] == 'running' and queue.get('lost')['result'] is None
+
+def test_progress_recorder_batches_events(db_path, monkeypatch):
+    from job_queue import JobProgressRecorder
+    insert_job(db_path, 'a', 'running')
+    queue, _ = make_queue(db_path, monkeypatch)
+    conn = get_db_connection(db_path)
+    recorder = JobProgressRecorder(conn, 'a', flush_interval=3600)
+
+    recorder({'generation': 1})
+    recorder({'generation': 2})
+    assert queue.events_since('a') == []
+    recorder.flush()
+    conn.close()
+
+    events = queue.events_since('a')
+    assert [item['event'] for item in events] == [{'generation': 1}, {'generation': 2}]
+    assert queue.events_since('a', events[0]['id']) == events[1:]
+
+def insert_finished_job_with_events(events):
+    """A completed job of the client's user (id 1) in the working directory's database"""
+    conn = get_db_connection()
+    conn.execute("INSERT INTO generation_jobs (id, user_id, status) VALUES ('job', 1, 'completed')")
+    conn.executemany("INSERT INTO job_events (job_id, event) VALUES ('job', ?)", [(event,) for event in events])
+    conn.commit()
+    conn.close()
+
+def test_event_stream_replays_progress_then_done(client):
+    insert_finished_job_with_events(['{"progress": 50}', '{"progress": 100}'])
+
+    response = client.get('/api/timetable/jobs/job/events')
+
+    assert response.mimetype == 'text/event-stream'
+    assert response.get_data(as_text=True) == (
+        'id: 1\nevent: progress\ndata: {"progress": 50}\n\n'
+        'id: 2\nevent: progress\ndata: {"progress": 100}\n\n'
+        'event: done\ndata: {"status": "completed"}\n\n'
+    )
+
+def test_event_stream_resumes_after_last_event_id(client):
+    insert_finished_job_with_events(['{"progress": 50}', '{"progress": 100}'])
+
+    body = client.get('/api/timetable/jobs/job/events', headers={'Last-Event-ID': '1'}).get_data(as_text=True)
+
+    assert 'id: 1\n' not in body and 'id: 2\n' in body
+
+def test_event_stream_rejects_malformed_last_event_id(client):
+    insert_finished_job_with_events([])
+
+    assert client.get('/api/timetable/jobs/job/events', headers={'Last-Event-ID': 'abc'}).status_code == 400
+    assert client.get('/api/timetable/jobs/job/events?after=1.5').status_code == 400
@@ -0,0 +1,43 @@
+"""Unit tests for the rate-limited logging setup"""
+import json
+import logging
+import types
+import log
+from log import JsonFormatter, RateLimitFilter, TextFormatter, get_logger
+
+def make_record(level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord('schedulify.test', level, 'solver.py', lineno, 'Gen %d', (1,), None)
+    record.__dict__.update(extra)
+    return record
+
+def test_rate_limit_keeps_per_second_records_per_call_site(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(log, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+    limiter = RateLimitFilter(per_second=2)
+
+    kept = [limiter.filter(make_record()) for _ in range(5)]
+    other_site = limiter.filter(make_record(lineno=11))
+    warning = limiter.filter(make_record(logging.WARNING))
+    clock[0] += 1
+    next_second = make_record()
+
+    assert kept == [True, True, False, False, False]
+    assert other_site and warning
+    assert limiter.filter(next_second) and next_second.suppressed == 3
+
+def test_zero_rate_disables_the_limit():
+    limiter = RateLimitFilter(per_second=0)
+    assert all(limiter.filter(make_record()) for _ in range(100))
+
+def test_formatters_report_suppressed_records_and_extra_fields():
+    record = make_record(suppressed=4, job_id='abc')
+
+    assert TextFormatter().format(record).endswith('Gen 1 (4 similar messages suppressed)')
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry['message'], entry['job_id'], entry['suppressed']) == ('Gen 1', 'abc', 4)
+
+def test_module_loggers_share_the_schedulify_root():
+    logger = get_logger('generation')
+
+    assert logger.name == 'schedulify.generation'
+    assert logging.getLogger('schedulify').handlers
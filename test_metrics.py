@@ -0,0 +1,56 @@
+"""Unit tests for the Prometheus metrics registry and generation run recording"""
+from metrics import GENERATION_RUNS, SQLITE_QUERIES, Counter, Histogram, count_query, record_run
+
+def run_count(outcome):
+    return GENERATION_RUNS.value(algorithm='genetic', outcome=outcome)
+
+def test_counter_and_histogram_render_in_text_format():
+    counter = Counter('demo_total', 'Demo counter', ('kind',))
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    histogram = Histogram('demo_seconds', 'Demo histogram', buckets=(0.1, 1))
+    histogram.observe(0.5)
+
+    assert 'demo_total{kind="a"} 3' in counter.render()
+    text = histogram.render()
+    assert 'demo_seconds_bucket{le="0.1"} 0' in text and 'demo_seconds_bucket{le="+Inf"} 1' in text
+    assert 'demo_seconds_count 1' in text
+
+def test_stopped_runs_get_their_own_outcome():
+    before = {outcome: run_count(outcome) for outcome in ('success', 'failure', 'cancelled', 'timeout')}
+
+    record_run({'algorithm': 'genetic', 'success': True, 'stopped_early': 'timeout'})
+    record_run({'algorithm': 'genetic', 'success': True, 'stopped_early': 'cancelled'})
+    record_run({'algorithm': 'genetic', 'success': False, 'stopped_early': 'cancelled'})
+    record_run({'algorithm': 'genetic', 'success': True, 'stopped_early': None})
+
+    assert {outcome: run_count(outcome) - count for outcome, count in before.items()} == {
+        'success': 1, 'failure': 0, 'cancelled': 2, 'timeout': 1}
+
+def test_worker_statement_counts_are_added_to_the_server_counter():
+    count_query('  select 1')
+    before = SQLITE_QUERIES.value(statement='select')
+
+    record_run({'algorithm': 'genetic', 'success': True, 'sqlite_queries': {'select': 5, 'insert': 1}})
+
+    assert SQLITE_QUERIES.value(statement='select') == before + 5
+
+def test_job_worker_reports_the_statements_it_ran(db_path):
+    from data_handler import get_db_connection
+    from job_queue import _run_job
+    conn = get_db_connection(db_path)
+    conn.execute("INSERT INTO generation_jobs (id, user_id, status, params) VALUES "
+                 "('job', 1, 'queued', '{\"algorithm\": \"backtracking\"}')")
+    conn.commit()
+    conn.close()
+
+    summary = _run_job('job', db_path)
+
+    assert summary['algorithm'] == 'backtracking'
+    assert summary['sqlite_queries']['select'] > 0 and summary['sqlite_queries']['update'] >= 2
+
+def test_metrics_endpoint_serves_the_registry(client):
+    response = client.get('/metrics')
+
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert 'schedulify_generation_runs_total' in response.get_data(as_text=True)
@@ -0,0 +1,69 @@
+"""Unit tests for the models.py dataclasses and the bucket-indexed Schedule"""
+import pytest
+from models import Faculty, Room, Schedule, ScheduleEntry, Subject, TimeSlot
+
+MONDAY_9 = TimeSlot(1, 'Monday', '09:00', '10:00')
+MONDAY_10 = TimeSlot(2, 'Monday', '10:00', '11:00')
+
+def make_entry(slot=MONDAY_9, faculty_id=1, room_id=1, division_id=None):
+    subject = Subject(faculty_id, f"Subject {faculty_id}", f"S{faculty_id}", faculty_id, 2, 'lecture', 30)
+    faculty = Faculty(faculty_id, f"Faculty {faculty_id}", 'CS', 20, available_slots=[1, 2])
+    room = Room(room_id, f"R{room_id}", 40, 'lecture')
+    return ScheduleEntry(subject, faculty, room, slot, division_id)
+
+def test_conflicts_are_counted_per_clashing_pair():
+    schedule = Schedule()
+    for entry in [make_entry(faculty_id=1, room_id=1), make_entry(faculty_id=1, room_id=2),
+                  make_entry(faculty_id=2, room_id=1), make_entry(MONDAY_10, faculty_id=1, room_id=1)]:
+        schedule.add_entry(entry)
+
+    assert schedule.get_conflicts_count() == 2
+    assert schedule.double_bookings('faculty') == 1
+    assert schedule.double_bookings('room') == 1
+
+def test_division_clash_only_for_the_same_division():
+    schedule = Schedule()
+    schedule.add_entry(make_entry(faculty_id=1, room_id=1, division_id=7))
+    schedule.add_entry(make_entry(faculty_id=2, room_id=2, division_id=8))
+    schedule.add_entry(make_entry(faculty_id=3, room_id=3))
+
+    assert schedule.get_conflicts_count() == 0
+    assert schedule.check_conflicts(make_entry(faculty_id=4, room_id=4, division_id=7))
+    assert schedule.is_free(MONDAY_9.id, faculty_id=4, room_id=4, division_id=9)
+    assert not schedule.is_free(MONDAY_9.id, division_id=7)
+
+def test_remove_entry_releases_its_bookings():
+    schedule = Schedule()
+    first, second = make_entry(faculty_id=1, room_id=1), make_entry(faculty_id=1, room_id=2)
+    schedule.add_entry(first)
+    schedule.add_entry(second)
+
+    schedule.remove_entry(first)
+
+    assert list(schedule.entries) == [second]
+    assert schedule.get_conflicts_count() == 0
+    assert schedule.is_free(MONDAY_9.id, room_id=1)
+    assert schedule.slot_of(first) is None
+
+def test_entries_cannot_be_changed_behind_the_index():
+    schedule = Schedule()
+    schedule.add_entry(make_entry(faculty_id=1))
+
+    with pytest.raises(AttributeError):
+        schedule.entries = []
+    with pytest.raises(TypeError):
+        schedule.entries[0] = make_entry(faculty_id=2)
+    with pytest.raises(AttributeError):
+        schedule.entries.append(make_entry(faculty_id=2))
+    # A view, not a copy: it follows later add_entry calls
+    entries = schedule.entries
+    schedule.add_entry(make_entry(faculty_id=3))
+    assert len(entries) == 2 and entries is schedule.entries
+    assert not schedule.is_free(MONDAY_9.id, faculty_id=1)
+
+def test_models_and_genes_are_slotted():
+    from genetic_algorithm import Timetable, TimetableGene
+    entry = make_entry()
+    for obj in [entry, entry.subject, entry.faculty, entry.room, entry.time_slot,
+                TimetableGene(1, 1, 1, 1, 1), Timetable([])]:
+        assert not hasattr(obj, '__dict__'), type(obj).__name__
@@ -0,0 +1,105 @@
+"""Unit tests for the occupancy index of saved timetables"""
+from occupancy import OccupancyIndex, OccupancyRegistry, edit_placements
+
+def lesson(day, time, faculty, room, division, **ids):
+    return dict(day=day, timeSlot=time, faculty=faculty, room=room, division=division, **ids)
+
+def test_rows_with_a_null_id_fall_back_to_their_label():
+    # facultyId null (e.g. a row saved before ids were stored) is indexed by the faculty name
+    index = OccupancyIndex([lesson('Mon', '9', 'Ada', 'R1', 'A', facultyId=None),
+                            lesson('Mon', '9', 'Ada', 'R2', 'B', facultyId=None),
+                            lesson('Mon', '9', 'Bob', 'R3', 'C', facultyId=None)])
+
+    assert [(c['type'], c['resource'], c['lessons']) for c in index.conflicts()] == [('faculty', 'Ada', [0, 1])]
+
+def test_move_reports_introduced_and_resolved_conflicts():
+    index = OccupancyIndex([lesson('Mon', '9', 'Ada', 'R1', 'A'), lesson('Mon', '9', 'Ada', 'R2', 'B'),
+                            lesson('Mon', '10', 'Bob', 'R1', 'C')])
+    assert [c['type'] for c in index.conflicts()] == ['faculty']
+
+    assert index.check_move(1, {'timeSlot': '10', 'room': 'R1'}) == [
+        {'type': 'room', 'resource': 'R1', 'day': 'Mon', 'timeSlot': '10', 'lessons': [2]}]
+    changes = index.apply({1: {'timeSlot': '10', 'room': 'R3'}})
+
+    assert [c['type'] for c in changes['resolved']] == ['faculty'] and changes['introduced'] == []
+    assert index.conflicts() == []
+
+def test_swap_exchanges_slots_but_keeps_rooms():
+    index = OccupancyIndex([lesson('Mon', '9', 'Ada', 'R1', 'A'), lesson('Tue', '11', 'Bob', 'R2', 'B')])
+
+    placements = edit_placements(index, [{'type': 'swap', 'lessons': [0, 1]}], lambda edit: {})
+
+    assert placements[0]['day'] == 'Tue' and placements[1]['timeSlot'] == '9'
+    assert 'room' not in placements[0]
+
+def test_registry_rebuilds_stale_revisions_and_evicts_least_recently_used():
+    registry = OccupancyRegistry(max_entries=2)
+    loads = []
+
+    def loader(name):
+        return lambda: loads.append(name) or []
+
+    first = registry.get(1, 0, loader('1@0'))
+    assert registry.get(1, 0, loader('again')) is first
+    assert registry.get(1, 1, loader('1@1')) is not first
+    registry.get(2, 0, loader('2@0'))
+    registry.get(3, 0, loader('3@0'))
+    registry.get(1, 1, loader('1@1 after eviction'))
+
+    assert loads == ['1@0', '1@1', '2@0', '3@0', '1@1 after eviction']
+
+def test_registry_loads_schedules_without_holding_its_lock():
+    import threading
+    registry = OccupancyRegistry()
+    acquired = []
+
+    def try_lock():
+        acquired.append(registry.lock.acquire(timeout=1))
+        if acquired[-1]:
+            registry.lock.release()
+
+    def load():
+        # Another request thread can still use the registry while this one reads the database
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return []
+
+    index = registry.get(1, 0, load)
+
+    assert acquired == [True]
+    assert registry.holds(1, 0, index) and not registry.holds(1, 1, index)
+
+def saved_timetable(client):
+    """Save two clashing lessons (same faculty at Monday 09:00) and return the timetable id"""
+    from data_handler import get_db_connection
+    conn = get_db_connection()
+    conn.executemany("INSERT INTO timeslots (id, day, start_time, end_time) VALUES (?, 'Monday', ?, ?)",
+                     [(1, '09:00', '10:00'), (2, '10:00', '11:00')])
+    conn.execute("INSERT INTO rooms (id, number, building, capacity) VALUES (1, 'R1', 'Main', 40)")
+    conn.commit()
+    conn.close()
+    rows = [dict(lesson('Monday', '09:00 - 10:00', 'Ada', 'R1 (Main)', 'A'), facultyId=1, roomId=1, divisionId=1,
+                 timeslotId=1),
+            dict(lesson('Monday', '09:00 - 10:00', 'Ada', 'R2 (Main)', 'B'), facultyId=1, roomId=2, divisionId=2,
+                 timeslotId=1)]
+    return client.post('/api/timetable/save', json={'name': 'Week', 'schedule': rows}).get_json()['id']
+
+def test_edit_endpoints_check_apply_and_version_edits(client):
+    timetable_id = saved_timetable(client)
+    base = f'/api/timetable/my-timetables/{timetable_id}'
+
+    assert client.get(f'{base}/conflicts').get_json()['conflict_count'] == 1
+    check = client.post(f'{base}/check-move', json={'lesson': 1, 'timeslotId': 2}).get_json()
+    assert check['valid'] and check['revision'] == 0
+
+    edited = client.post(f'{base}/edits', json={'revision': 0, 'edits': [
+        {'type': 'move', 'lesson': 1, 'timeslotId': 2}]}).get_json()
+    assert edited['revision'] == 1 and [c['type'] for c in edited['resolved']] == ['faculty']
+    assert client.get(f'{base}/conflicts').get_json()['conflicts'] == []
+    schedule = client.get(base).get_json()['timetable']['schedule']
+    assert schedule[1]['timeslotId'] == 2 and schedule[1]['timeSlot'] == '10:00 - 11:00'
+
+    stale = client.post(f'{base}/edits', json={'revision': 0, 'edits': [{'type': 'swap', 'lessons': [0, 1]}]})
+    assert stale.status_code == 409
+    assert client.post(f'{base}/check-move', json={'lesson': 1, 'timeslotId': 99}).status_code == 400
@@ -0,0 +1,58 @@
+"""Unit tests for per-phase generation timings and the profiling toggle"""
+import profiling
+from benchmarks.synthetic import make_dataset, write_database
+from generation import run_generation
+from profiling import Timings, TimingStats, profiled
+
+def test_phases_accumulate_and_reach_hooks(monkeypatch):
+    seen = []
+    monkeypatch.setattr(profiling, 'PHASE_HOOKS', [])
+    profiling.add_phase_hook(lambda phase, seconds: seen.append(phase))
+    timings = Timings()
+
+    for _ in range(2):
+        with timings.phase('fitness'):
+            pass
+    timings.add('search', 0.5, calls=3)
+
+    breakdown = timings.as_dict()
+    assert breakdown['phases']['fitness']['calls'] == 2
+    assert breakdown['phases']['search'] == {'seconds': 0.5, 'calls': 3}
+    assert seen == ['fitness', 'fitness', 'search']
+
+def test_profiled_only_when_enabled():
+    result = {}
+    with profiled(False, result):
+        sum(range(10))
+    assert result == {}
+
+    with profiled(True, result, limit=5):
+        sorted(range(10))
+    assert 0 < len(result['profile']) <= 5
+    assert {'function', 'calls', 'own_seconds', 'cumulative_seconds'} <= set(result['profile'][0])
+
+def test_timing_stats_aggregate_runs():
+    stats = TimingStats()
+    stats.record({'total_seconds': 1.0, 'phases': {'search': {'seconds': 0.25, 'calls': 1}}})
+    stats.record({'total_seconds': 3.0, 'phases': {'search': {'seconds': 0.75, 'calls': 1}}})
+    stats.record(None)
+
+    snapshot = stats.snapshot()
+    assert (snapshot['runs'], snapshot['mean_seconds']) == (2, 2.0)
+    assert snapshot['phases']['search'] == {'runs': 2, 'seconds': 1.0, 'mean_seconds': 0.5, 'max_seconds': 0.75}
+
+def test_generation_payload_carries_timings_and_profile(tmp_path):
+    db_path = str(tmp_path / 'timetable.db')
+    write_database(make_dataset(divisions=1, subjects_per_division=2, hours_per_week=1, faculty=2, rooms=2,
+                                days=1, periods_per_day=3), db_path)
+
+    plain, _ = run_generation({'algorithm': 'backtracking'}, db_path)
+    profiled_run, _ = run_generation({'algorithm': 'backtracking', 'profile': True}, db_path)
+
+    assert {'data_load', 'search'} <= set(plain['timings']['phases'])
+    assert 'profile' not in plain
+    # Profiling bypasses the result cached by the first run
+    assert not profiled_run['cached'] and profiled_run['profile']
+
+def test_timing_metrics_endpoint(client):
+    assert set(client.get('/api/metrics/timings').get_json()['timings']) >= {'runs', 'phases'}
@@ -0,0 +1,83 @@
+"""Unit tests for the generation result cache and its fingerprints"""
+import copy
+from data_handler import fetch_all_data, get_db_connection
+from generation import run_generation
+from result_cache import ResultCache, fingerprint_config, fingerprint_dataset, fingerprint_shape
+
+def test_dataset_fingerprint_ignores_ordering(db_path, sample_problem):
+    sample_problem(db_path)
+    data = fetch_all_data(db_path)
+    shuffled = {entity: list(reversed(records)) for entity, records in copy.deepcopy(data).items()}
+    for division in shuffled['divisions']:
+        division['subjects'] = list(reversed(division['subjects']))
+
+    assert fingerprint_dataset(shuffled) == fingerprint_dataset(data)
+    shuffled['rooms'][0]['capacity'] += 1
+    assert fingerprint_dataset(shuffled) != fingerprint_dataset(data)
+    assert fingerprint_shape(shuffled) == fingerprint_shape(data)
+    shuffled['rooms'].append(dict(shuffled['rooms'][0], id=99))
+    assert fingerprint_shape(shuffled) != fingerprint_shape(data)
+
+def test_config_fingerprint_covers_solver_params_only():
+    params = {'algorithm': 'genetic', 'seed': 1}
+
+    assert fingerprint_config(dict(params, maxSeconds=5)) == fingerprint_config(params)
+    assert fingerprint_config(dict(params, seed=2)) != fingerprint_config(params)
+
+def test_put_get_and_lru_eviction(db_path):
+    cache = ResultCache(db_path, max_entries=2)
+    cache.put('d1', 'c', {'n': 1}, [[1, 2, 3, 4, 5]], 's1')
+    cache.put('d2', 'c', {'n': 2}, [], 's2')
+    conn = get_db_connection(db_path)
+    conn.execute("UPDATE result_cache SET created_at = '2000-01-01', last_used_at = '2000-01-01'")
+    conn.commit()
+    conn.close()
+
+    assert cache.get(ResultCache.make_key('d1', 'c')) == {'n': 1}
+    cache.put('d3', 'c', {'n': 3}, [], 's3')
+
+    assert cache.get(ResultCache.make_key('d2', 'c')) is None
+    assert cache.get(ResultCache.make_key('d1', 'c')) == {'n': 1}
+    assert cache.warm_start_genes('c', 's1') == [[1, 2, 3, 4, 5]]
+    assert cache.warm_start_genes('c', 's2') is None
+    assert cache.warm_start_genes('other', 's1') is None
+
+def test_run_generation_returns_cached_result(db_path, sample_problem):
+    sample_problem(db_path)
+    params = {'algorithm': 'backtracking'}
+
+    first, status = run_generation(params, db_path)
+    second, _ = run_generation(params, db_path)
+    uncached, _ = run_generation(dict(params, useCache=False), db_path)
+
+    assert status == 200 and not first['cached']
+    assert second['cached'] and second['schedule'] == first['schedule']
+    assert not uncached['cached']
+    data_hash = fingerprint_dataset(fetch_all_data(db_path))
+    assert ResultCache(db_path).get(ResultCache.make_key(data_hash, fingerprint_config(params)))
+
+def bump_room_capacity(db_path):
+    conn = get_db_connection(db_path)
+    conn.execute('UPDATE rooms SET capacity = capacity + 1 WHERE id = 1')
+    conn.commit()
+    conn.close()
+
+def test_warm_start_needs_the_same_entities_and_no_seed(db_path, sample_problem):
+    sample_problem(db_path)
+    params = {'populationSize': 6, 'generations': 2}
+    seeded = dict(params, seed=1)
+    run_generation(params, db_path)
+    run_generation(seeded, db_path)
+    bump_room_capacity(db_path)
+
+    warm, _ = run_generation(params, db_path)
+    cold_seeded, _ = run_generation(seeded, db_path)
+    conn = get_db_connection(db_path)
+    conn.execute("INSERT INTO rooms (id, number, building, capacity, type) VALUES (3, 'R3', 'Main', 60, 'classroom')")
+    conn.commit()
+    conn.close()
+    other_entities, _ = run_generation(params, db_path)
+
+    assert warm['warm_started'] and not warm['cached']
+    assert not cold_seeded['warm_started'] and not cold_seeded['cached']
+    assert not other_entities['warm_started']
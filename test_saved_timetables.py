@@ -0,0 +1,94 @@
+"""Unit tests for saved timetable listing, lookup and storage"""
+import json
+import sqlite3
+import zlib
+from data_handler import get_db_connection
+from saved_timetables import (MAX_PAGE_SIZE, decode_schedule, encode_schedule, ensure_timetable_schema,
+                              get_timetable, list_timetables, main, migrate_schedules)
+
+ROWS = [{'division': 'SE-A', 'subject': 'CS101 - Programming', 'subjectCode': 'CS101', 'subjectName': 'Programming',
+         'faculty': 'Dr. Rao', 'room': '101 (Main)', 'day': 'Monday', 'timeSlot': f'{hour:02d}:00 - {hour + 1:02d}:00',
+         'type': 'theory', 'divisionId': 1, 'subjectId': 2, 'facultyId': 3 + hour % 2, 'roomId': 4,
+         'timeslotId': hour}
+        for hour in (9, 10)]
+
+def insert_timetables(db_path, count, user_id=1):
+    conn = get_db_connection(db_path)
+    ensure_timetable_schema(conn)
+    conn.executemany('INSERT INTO user_timetables (user_id, name, schedule_blob, entry_count) VALUES (?, ?, ?, ?)',
+                     [(user_id, f'T{n}', encode_schedule(ROWS), len(ROWS)) for n in range(count)])
+    conn.commit()
+    return conn
+
+def test_pages_follow_the_cursor_newest_first(db_path):
+    conn = insert_timetables(db_path, 5)
+    insert_timetables(db_path, 2, user_id=2).close()
+
+    first, cursor = list_timetables(conn, 1, limit=2)
+    second, cursor = list_timetables(conn, 1, limit=2, before_id=cursor)
+    last, end = list_timetables(conn, 1, limit=2, before_id=cursor)
+    conn.close()
+
+    assert [t['name'] for t in first + second + last] == ['T4', 'T3', 'T2', 'T1', 'T0']
+    assert end is None
+    assert set(first[0]) == {'id', 'name', 'fitness_score', 'created_at', 'entry_count'}
+
+def test_page_size_is_clamped(db_path):
+    conn = insert_timetables(db_path, 3)
+
+    assert len(list_timetables(conn, 1, limit=0)[0]) == 1
+    assert list_timetables(conn, 1, limit=MAX_PAGE_SIZE + 50)[1] is None
+    conn.close()
+
+def test_listing_uses_the_covering_index(db_path):
+    conn = insert_timetables(db_path, 1)
+
+    plan = ' '.join(row[3] for row in conn.execute(
+        'EXPLAIN QUERY PLAN SELECT id, name, fitness_score, created_at, entry_count FROM user_timetables '
+        'WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT 3', (1, 10)))
+    conn.close()
+
+    assert 'COVERING INDEX idx_user_timetables_listing' in plan
+
+def test_endpoints_page_and_filter(client):
+    for name in ('first', 'second'):
+        client.post('/api/timetable/save', json={'name': name, 'schedule': ROWS})
+
+    page = client.get('/api/timetable/my-timetables?limit=1').get_json()
+    rest = client.get(f"/api/timetable/my-timetables?limit=1&cursor={page['next_cursor']}").get_json()
+    timetable_id = page['timetables'][0]['id']
+    filtered = client.get(f'/api/timetable/my-timetables/{timetable_id}?facultyId=3').get_json()['timetable']
+
+    assert [t['name'] for t in page['timetables'] + rest['timetables']] == ['second', 'first']
+    assert 'schedule' not in page['timetables'][0]
+    assert [row['timeslotId'] for row in filtered['schedule']] == [10]
+    assert client.get('/api/timetable/my-timetables/999').status_code == 404
+
+def test_schedules_are_stored_columnar_and_compressed():
+    blob = encode_schedule(ROWS)
+
+    assert json.loads(zlib.decompress(blob))['format'] == 'columnar'
+    assert decode_schedule(blob) == ROWS
+    # Rows the columnar tables cannot reproduce are stored as they are
+    edited = [dict(ROWS[0], note='moved')]
+    assert decode_schedule(encode_schedule(edited)) == edited
+    assert decode_schedule(None, json.dumps(ROWS)) == ROWS and decode_schedule(None) == []
+
+def test_legacy_rows_are_migrated(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE user_timetables (id INTEGER PRIMARY KEY, user_id INTEGER, name TEXT, '
+                 'fitness_score REAL, created_at TIMESTAMP, schedule_data TEXT)')
+    conn.executemany('INSERT INTO user_timetables (id, user_id, name, schedule_data) VALUES (?, 1, ?, ?)',
+                     [(1, 'old', json.dumps(ROWS)), (2, 'broken', 'not json')])
+    conn.commit()
+    conn.close()
+
+    assert main(['migrate', '--db', db_path]) == 0
+
+    conn = get_db_connection(db_path)
+    rows = conn.execute('SELECT id, entry_count, schedule_data IS NULL AS moved FROM user_timetables').fetchall()
+    assert [tuple(row) for row in rows] == [(1, 2, 1), (2, 0, 0)]
+    assert get_timetable(conn, 1, 1)['schedule'] == ROWS
+    assert migrate_schedules(conn) == 0
+    conn.close()
@@ -0,0 +1,58 @@
+"""Unit tests for schedule row building and the columnar schedule encoding"""
+from generation import build_schedule
+from genetic_algorithm import Timetable, TimetableGene
+from schedule_format import format_schedule, from_columnar, parse_schedule, to_columnar
+
+DATA = {
+    'subjects': [{'id': 2, 'code': 'CS101', 'name': 'Programming', 'type': 'theory'}],
+    'faculty': [{'id': 3, 'name': 'Dr. Rao'}],
+    'rooms': [{'id': 4, 'number': '101', 'building': 'Main'}],
+    'timeslots': [{'id': 5, 'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00'},
+                  {'id': 6, 'day': 'Monday', 'start_time': '10:00', 'end_time': '11:00'}],
+    'divisions': [{'id': 1, 'name': 'SE-A'}],
+}
+
+def schedule():
+    return build_schedule(Timetable([TimetableGene(1, 2, 3, 4, 5), TimetableGene(1, 2, 3, 4, 6),
+                                     TimetableGene(1, 2, 3, 99, 6)]), DATA)
+
+def test_build_schedule_labels_rows_and_skips_unknown_ids():
+    rows = schedule()
+
+    assert len(rows) == 2
+    assert rows[0] == {'division': 'SE-A', 'subject': 'CS101 - Programming', 'subjectCode': 'CS101',
+                       'subjectName': 'Programming', 'faculty': 'Dr. Rao', 'room': '101 (Main)',
+                       'day': 'Monday', 'timeSlot': '09:00 - 10:00', 'type': 'theory', 'divisionId': 1,
+                       'subjectId': 2, 'facultyId': 3, 'roomId': 4, 'timeslotId': 5}
+
+def test_columnar_lists_each_entity_once_and_round_trips():
+    rows = schedule()
+
+    encoded = to_columnar(rows)
+
+    assert encoded['rows'] == [[0, 0, 0, 0, 0], [0, 0, 0, 0, 1]]
+    assert [len(encoded['tables'][table]) for table in encoded['columns']] == [1, 1, 1, 1, 2]
+    assert from_columnar(encoded) == rows
+
+def test_rows_without_ids_are_keyed_by_label():
+    rows = [{key: value for key, value in row.items() if not key.endswith('Id')} for row in schedule()]
+
+    encoded = to_columnar(rows)
+
+    assert encoded['tables']['timeslot'][1] == {'id': None, 'day': 'Monday', 'time': '10:00 - 11:00'}
+    assert from_columnar(encoded) == rows
+
+def test_format_and_parse_accept_either_encoding():
+    rows = schedule()
+
+    assert format_schedule(rows, 'rows') is rows
+    assert parse_schedule(format_schedule(rows, 'columnar')) == rows
+    assert parse_schedule(rows) is rows and parse_schedule(None) == []
+
+def test_check_conflicts_accepts_columnar_schedules(client):
+    clashing = schedule()
+    clashing[1].update(timeslotId=5, timeSlot='09:00 - 10:00')
+
+    body = client.post('/api/timetable/check-conflicts', json={'schedule': to_columnar(clashing)}).get_json()
+
+    assert body['success'] and body['conflicts']
@@ -0,0 +1,31 @@
+"""Unit tests for the synthetic institution generator used by the benchmarks"""
+from benchmarks.synthetic import make_dataset, write_database
+from data_handler import fetch_all_data
+
+def test_same_arguments_give_the_same_dataset():
+    assert make_dataset(divisions=3, seed=7) == make_dataset(divisions=3, seed=7)
+    assert make_dataset(divisions=3, seed=7) != make_dataset(divisions=3, seed=8)
+
+def test_dataset_shape():
+    data = make_dataset(divisions=4, subjects_per_division=3, faculty=5, rooms=6, days=2, periods_per_day=3,
+                        lab_rooms=0.5)
+
+    assert len(data['divisions']) == 4 and all(len(d['subjects']) == 3 for d in data['divisions'])
+    assert len(data['timeslots']) == 6
+    assert sum(room['type'] == 'lab' for room in data['rooms']) == 3
+    # Every subject can be taught by someone
+    taught = {sid for fac in data['faculty'] for sid in fac['subjects']}
+    assert taught == {s['id'] for s in data['subjects']}
+
+def test_written_database_loads_back(tmp_path):
+    db_path = str(tmp_path / 'timetable.db')
+    data = make_dataset(divisions=2, subjects_per_division=2, faculty=3, rooms=2, days=2, periods_per_day=2,
+                        availability=0.5)
+    write_database(data, db_path)
+
+    loaded = fetch_all_data(db_path)
+
+    assert {d['id']: sorted(d['subjects']) for d in loaded['divisions']} == \
+        {d['id']: sorted(d['subjects']) for d in data['divisions']}
+    assert {f['id']: sorted(f['available_slot_ids']) for f in loaded['faculty']} == \
+        {f['id']: f['available_slot_ids'] for f in data['faculty']}
@@ -0,0 +1,49 @@
+"""Unit tests for warm-starting the GA from a saved timetable"""
+from data_handler import fetch_all_data
+from generation import saved_schedule_to_genes
+from genetic_algorithm import GeneticAlgorithm, TimetableGene
+
+ALL_DATA = {
+    'divisions': [{'id': 1, 'name': 'SE-A'}],
+    'subjects': [{'id': 2, 'code': 'CS101'}],
+    'faculty': [{'id': 3, 'name': 'Dr. Rao'}],
+    'rooms': [{'id': 4, 'number': '101', 'building': 'Main'}],
+    'timeslots': [{'id': 5, 'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00'}],
+}
+
+def as_tuples(genes):
+    return [(g.division_id, g.subject_id, g.faculty_id, g.room_id, g.timeslot_id) for g in genes]
+
+def test_rows_with_ids_map_directly():
+    row = {'divisionId': 11, 'subjectId': 12, 'facultyId': 13, 'roomId': 14, 'timeslotId': 15, 'division': 'SE-A'}
+
+    assert as_tuples(saved_schedule_to_genes([row], ALL_DATA)) == [(11, 12, 13, 14, 15)]
+
+def test_rows_with_labels_are_matched_and_unknown_rows_skipped():
+    row = {'division': 'SE-A', 'subjectCode': 'CS101', 'faculty': 'Dr. Rao', 'room': '101 (Main)',
+           'day': 'Monday', 'timeSlot': '09:00 - 10:00'}
+
+    genes = saved_schedule_to_genes([row, dict(row, faculty='Someone else')], ALL_DATA)
+
+    assert as_tuples(genes) == [(1, 2, 3, 4, 5)]
+
+def test_seeded_population_starts_from_the_saved_timetable(db_path, sample_problem):
+    sample_problem(db_path)
+    data = fetch_all_data(db_path)
+    args = (data['subjects'], data['faculty'], data['rooms'], data['timeslots'], data['divisions'])
+    ga = GeneticAlgorithm(seed=1)
+    ga.population_size = 6
+    # Faculty 1 teaches subject 1 and faculty 2 subject 2, both available in every slot
+    seed_genes = [TimetableGene(1, 1, 1, 1, 1), TimetableGene(1, 2, 2, 1, 2)]
+
+    population = ga.initialize_population(*args, seed_genes=seed_genes)
+
+    assert len(population) == 6
+    assert sorted(as_tuples(population[0].genes)) == sorted(as_tuples(seed_genes))
+
+def test_unknown_warm_start_timetable_is_rejected(client, sample_problem):
+    sample_problem('timetable.db')
+
+    response = client.post('/api/timetable/generate', json={'warmStartTimetableId': 999})
+
+    assert response.status_code == 404